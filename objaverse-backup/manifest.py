@@ -0,0 +1,266 @@
+"""SQLite manifest of what has been saved to a download or render directory.
+
+Checking which objects already exist with `fs.glob` lists the whole directory, which
+gets very slow on network filesystems with hundreds of thousands of entries. With a
+manifest, every successful write adds a row in its own transaction, and existence
+checks become index lookups. The manifest lives on the local disk (SQLite locking is
+not reliable over network filesystems), so `reconcile` rebuilds it from storage when
+it gets out of sync, e.g. when files are written or removed by another machine.
+
+Rows are grouped by namespace, one for each kind of saved file:
+
+- "github/repos/{save_repo_format}": keyed by "{org}/{repo}".
+- "sketchfab/glbs": keyed by the Sketchfab uid.
+- "smithsonian/objects": keyed by the uid of the file identifier.
+- "renders": keyed by the save uid of the rendered object.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Optional, Set
+
+import fsspec
+from fsspec.implementations.local import LocalFileSystem
+from loguru import logger
+
+from objaverse.utils import get_uid_from_str
+
+RENDERS_NAMESPACE = "renders"
+
+
+def get_manifest_path(base_dir: str) -> str:
+    """Returns the default manifest path of a download or render directory.
+
+    Args:
+        base_dir (str): The download or render directory. Supports all file systems
+            supported by fsspec.
+
+    Returns:
+        str: Path of the manifest under ~/.objaverse/manifests, named after the
+            protocol and absolute path of base_dir.
+    """
+    fs, path = fsspec.core.url_to_fs(base_dir)
+    if isinstance(fs, LocalFileSystem):
+        base_url = f"file://{os.path.abspath(os.path.expanduser(path))}"
+    else:
+        protocol = fs.protocol if isinstance(fs.protocol, str) else fs.protocol[0]
+        base_url = f"{protocol}://{path}"
+    return os.path.join(
+        os.path.expanduser("~/.objaverse/manifests"),
+        f"{get_uid_from_str(base_url)}.sqlite",
+    )
+
+
+class Manifest:
+    """Index of the saved files of a download or render directory.
+
+    The connection is opened lazily in each process, so a Manifest can be passed to
+    the processes of a Pool.
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        """Opens the manifest, creating it if it does not exist.
+
+        Args:
+            manifest_path (str): Local path of the SQLite database.
+        """
+        self.manifest_path = os.path.expanduser(manifest_path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def __getstate__(self) -> Dict[str, str]:
+        return dict(manifest_path=self.manifest_path)
+
+    def __setstate__(self, state: Dict[str, str]) -> None:
+        self.__init__(state["manifest_path"])
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            connection = sqlite3.connect(self.manifest_path, timeout=60)
+            # WAL lets readers run while the download processes add rows
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, path TEXT NOT NULL, "
+                    "added REAL NOT NULL, PRIMARY KEY (namespace, key))"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS reconciled ("
+                    "namespace TEXT PRIMARY KEY, reconciled REAL NOT NULL)"
+                )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def add(self, namespace: str, key: str, path: str) -> None:
+        """Records a file once it has been written successfully.
+
+        Args:
+            namespace (str): Namespace of the file, see the module docstring.
+            key (str): Key of the file within the namespace.
+            path (str): Path of the file in storage.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (namespace, key, path, time.time()),
+            )
+
+    def remove(self, namespace: str, key: str) -> None:
+        """Removes the entry of a file, e.g. after it was deleted from storage."""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+
+    def contains(self, namespace: str, key: str) -> bool:
+        """Returns whether a file has been recorded."""
+        row = self.connection.execute(
+            "SELECT 1 FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return row is not None
+
+    def keys(self, namespace: str) -> Set[str]:
+        """Returns the keys of every file recorded in a namespace."""
+        rows = self.connection.execute(
+            "SELECT key FROM entries WHERE namespace = ?", (namespace,)
+        )
+        return {key for (key,) in rows}
+
+    def is_reconciled(self, namespace: str) -> bool:
+        """Returns whether the namespace has been built from storage at least once."""
+        row = self.connection.execute(
+            "SELECT 1 FROM reconciled WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row is not None
+
+    def reconcile(self, namespace: str, entries: Dict[str, str]) -> None:
+        """Replaces every entry of a namespace in a single transaction.
+
+        Args:
+            namespace (str): Namespace to rebuild.
+            entries (Dict[str, str]): Maps the key to the path of each file found in
+                storage.
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM entries WHERE namespace = ?", (namespace,)
+            )
+            self.connection.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?)",
+                ((namespace, key, path, now) for key, path in entries.items()),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO reconciled VALUES (?, ?)", (namespace, now)
+            )
+        logger.info(f"Reconciled {namespace} with {len(entries)} entries")
+
+    def get_keys(self, namespace: str, scan: Callable[[], Dict[str, str]]) -> Set[str]:
+        """Returns the keys of a namespace, scanning storage only the first time.
+
+        Args:
+            namespace (str): Namespace to look up.
+            scan (Callable[[], Dict[str, str]]): Lists the files of the namespace in
+                storage, see `reconcile`. Only called if the namespace has never been
+                reconciled.
+
+        Returns:
+            Set[str]: The keys of the files in the namespace.
+        """
+        if not self.is_reconciled(namespace):
+            self.reconcile(namespace, scan())
+        return self.keys(namespace)
+
+
+def scan_renders(render_dir: str) -> Dict[str, str]:
+    """Lists the rendered objects of a render directory.
+
+    Args:
+        render_dir (str): Directory where the objects are rendered.
+
+    Returns:
+        Dict[str, str]: Maps the save uid to the path of each renders/*.zip file.
+    """
+    fs, path = fsspec.core.url_to_fs(render_dir)
+    try:
+        zip_files = fs.glob(os.path.join(path, "renders", "*.zip"), refresh=True)
+    except TypeError:
+        # s3fs may not support refresh depending on the version
+        zip_files = fs.glob(os.path.join(path, "renders", "*.zip"))
+    return {zip_file.split("/")[-1].split(".")[0]: zip_file for zip_file in zip_files}
+
+
+def reconcile(
+    download_dir: Optional[str] = "~/.objaverse",
+    render_dir: Optional[str] = None,
+    save_repo_format: str = "zip",
+    manifest_path: Optional[str] = None,
+) -> Dict[str, int]:
+    """Rebuilds the manifests from storage.
+
+    Args:
+        download_dir (Optional[str], optional): Download directory of the GitHub,
+            Sketchfab and Smithsonian objects. If None, skips them. Defaults to
+            "~/.objaverse".
+        render_dir (Optional[str], optional): Render directory of
+            main_download.render_objects. If None, skips it. Defaults to None.
+        save_repo_format (str, optional): Format the GitHub repos were saved with.
+            Defaults to "zip".
+        manifest_path (Optional[str], optional): Path of the manifest. If None, uses
+            `get_manifest_path` of each directory. Defaults to None.
+
+    Returns:
+        Dict[str, int]: The number of entries of each rebuilt namespace.
+    """
+    # imported here since the downloaders import this module
+    from objaverse.xl.github import GitHubDownloader
+    from objaverse.xl.sketchfab import SketchfabDownloader
+    from objaverse.xl.smithsonian import SmithsonianDownloader
+
+    counts = {}
+    if download_dir is not None:
+        manifest = Manifest(manifest_path or get_manifest_path(download_dir))
+        for namespace, entries in (
+            (
+                GitHubDownloader.get_manifest_namespace(save_repo_format),
+                GitHubDownloader.scan_downloaded_repos(download_dir, save_repo_format),
+            ),
+            (
+                SketchfabDownloader.MANIFEST_NAMESPACE,
+                SketchfabDownloader.scan_downloaded_objects(download_dir),
+            ),
+            (
+                SmithsonianDownloader.MANIFEST_NAMESPACE,
+                SmithsonianDownloader.scan_downloaded_objects(download_dir),
+            ),
+        ):
+            manifest.reconcile(namespace, entries)
+            counts[namespace] = len(entries)
+    if render_dir is not None:
+        manifest = Manifest(manifest_path or get_manifest_path(render_dir))
+        entries = scan_renders(render_dir)
+        manifest.reconcile(RENDERS_NAMESPACE, entries)
+        counts[RENDERS_NAMESPACE] = len(entries)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the manifests from storage.")
+    parser.add_argument("--download_dir", type=str, default="~/.objaverse")
+    parser.add_argument("--no_download_dir", action="store_true")
+    parser.add_argument("--render_dir", type=str, default=None)
+    parser.add_argument("--save_repo_format", type=str, default="zip")
+    parser.add_argument("--manifest_path", type=str, default=None)
+    args = parser.parse_args()
+    reconcile(
+        download_dir=None if args.no_download_dir else args.download_dir,
+        render_dir=args.render_dir,
+        save_repo_format=args.save_repo_format,
+        manifest_path=args.manifest_path,
+    )
@@ -0,0 +1,345 @@
+"""Benchmarks for the ReCamMaster rendering pipeline."""
+
+import json
+import os
+import glob
+import statistics
+import sys
+import subprocess
+import tempfile
+import time
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import fire
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from encoding import ENCODE_PROFILES, budget_threads, encode_frames
+from trajectory import get_c2w, parse_matrix, recammaster_to_w2c
+
+DEFAULT_BLENDER_PATH = os.path.join("/data1", "blender-3.2.2-linux-x64/blender")
+
+
+def _run_blender_script(
+    object_path: str, output_dir: str, blender_path: str, extra_args: str
+) -> Dict[str, Any]:
+    """Renders an object with blender_script.py and returns its timings.
+
+    Args:
+        object_path (str): Path to the object file.
+        output_dir (str): Directory to render the object to.
+        blender_path (str): Path to the Blender executable.
+        extra_args (str): Extra arguments to pass to blender_script.py.
+
+    Returns:
+        Dict[str, Any]: The contents of the timings.json written by the render.
+    """
+    script_path = os.path.join(os.path.dirname(__file__), "blender_script.py")
+    args = f"--object_path '{object_path}' --output_dir {output_dir} {extra_args}"
+    command = f"xvfb-run -a {blender_path} --background --python {script_path} -- {args}"
+    logger.info(command)
+    subprocess.run(
+        ["bash", "-c", command],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    with open(os.path.join(output_dir, "timings.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def persistent_data(
+    object_path: str,
+    num_renders: int = 81,
+    engine: str = "CYCLES",
+    device: str = "GPU",
+    blender_path: str = DEFAULT_BLENDER_PATH,
+) -> Dict[str, Dict[str, float]]:
+    """Reports how much faster frames 1..N-1 render than frame 0, with and without
+    persistent render data.
+
+    The preflight check is disabled, so that its preview renders don't absorb the
+    cold start of frame 0. The shader warm-up (EEVEE only) still runs before frame 0,
+    so its time is reported next to frame 0.
+
+    Args:
+        object_path (str): Path to the object file to render.
+        num_renders (int, optional): Number of frames to render. Defaults to 81.
+        engine (str, optional): Render engine. Defaults to "CYCLES".
+        device (str, optional): Cycles device. Defaults to "GPU".
+        blender_path (str, optional): Path to the Blender executable.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For "with" and "without" persistent data, the
+            shader warm-up time, the frame 0 time, the mean time of the remaining
+            frames, and the ratio of the last two.
+    """
+    results = {}
+    for use_persistent_data in (False, True):
+        extra_args = (
+            f"--num_renders {num_renders} --engine {engine} --device {device} "
+            "--no_preflight"
+        )
+        if not use_persistent_data:
+            extra_args += " --no_persistent_data"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            timings = _run_blender_script(
+                object_path, temp_dir, blender_path, extra_args
+            )
+
+        warmup = timings["warmup"]
+        first_frame = timings["frames"][0]
+        other_frames = statistics.mean(timings["frames"][1:])
+        label = "with" if use_persistent_data else "without"
+        logger.info(
+            f"{label} persistent data: warm-up took {warmup:.3f}s, "
+            f"frame 0 took {first_frame:.3f}s, frames "
+            f"1..{len(timings['frames']) - 1} took {other_frames:.3f}s on average "
+            f"({first_frame / other_frames:.2f}x faster)"
+        )
+        results[label] = dict(
+            warmup=warmup,
+            first_frame=first_frame,
+            other_frames=other_frames,
+            speedup=first_frame / other_frames,
+        )
+    return results
+
+
+def _legacy_get_c2w(
+    cameras: np.ndarray, transform_matrix: np.ndarray
+) -> np.ndarray:
+    """The per-frame loop that blender_script.py used before trajectory.py."""
+    w2cs = []
+    for cam in cameras:
+        cam = cam[:, [1, 2, 0, 3]]
+        cam[:3, 1] *= -1.0
+        cam[:3, 3] /= 100
+        w2cs.append(np.linalg.inv(cam))
+
+    target_cam_c2w = np.eye(4)
+    abs2rel = target_cam_c2w @ w2cs[0]
+    ret_poses = [target_cam_c2w] + [abs2rel @ np.linalg.inv(w2c) for w2c in w2cs[1:]]
+    ret_poses = [transform_matrix @ x for x in ret_poses]
+    return np.array(ret_poses, dtype=np.float32)
+
+
+def _time_call(fn: Callable[[], Any], repeats: int) -> float:
+    """Returns the mean number of seconds a call to fn takes."""
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start_time) / repeats
+
+
+def trajectory_math(
+    extrinsics_path: str = os.path.join(os.path.dirname(__file__), "extrinsics.json"),
+    num_trajectories: int = 100,
+    repeats: int = 10,
+) -> Dict[str, float]:
+    """Compares the batched c2w conversion of trajectory.py against the per-frame loop.
+
+    Args:
+        extrinsics_path (str, optional): Path to the ReCamMaster extrinsics.json.
+        num_trajectories (int, optional): Number of trajectories converted per call,
+            cycling through the cameras of extrinsics.json. Defaults to 100.
+        repeats (int, optional): Number of timed calls. Defaults to 10.
+
+    Returns:
+        Dict[str, float]: Seconds per call of each version, their ratio, and the
+            largest absolute difference between their outputs.
+    """
+    with open(extrinsics_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    cam_names = sorted(data["frame0"].keys())
+    num_frames = len(data)
+    trajectories: List[np.ndarray] = []
+    for i in range(num_trajectories):
+        cam_name = cam_names[i % len(cam_names)]
+        cameras = np.stack(
+            [parse_matrix(data[f"frame{j}"][cam_name]) for j in range(num_frames)]
+        )
+        trajectories.append(np.transpose(cameras, (0, 2, 1)))
+    transform_matrix = np.array(
+        [[1, 0, 0, 0], [0, 0, 1, 0], [0, -1, 0, 0], [0, 0, 0, 1]]
+    )
+
+    def run_legacy():
+        return [_legacy_get_c2w(t, transform_matrix) for t in trajectories]
+
+    def run_batched():
+        return [get_c2w(recammaster_to_w2c(t), transform_matrix) for t in trajectories]
+
+    max_abs_diff = max(
+        float(np.abs(legacy - batched).max())
+        for legacy, batched in zip(run_legacy(), run_batched())
+    )
+    legacy_time = _time_call(run_legacy, repeats)
+    batched_time = _time_call(run_batched, repeats)
+    logger.info(
+        f"{num_trajectories} trajectories of {num_frames} frames: per-frame loop "
+        f"{legacy_time * 1000:.2f}ms, batched {batched_time * 1000:.2f}ms "
+        f"({legacy_time / batched_time:.1f}x faster), max abs diff {max_abs_diff:.2e}"
+    )
+    return dict(
+        legacy=legacy_time,
+        batched=batched_time,
+        speedup=legacy_time / batched_time,
+        max_abs_diff=max_abs_diff,
+    )
+
+
+def encode(
+    frames_dir: str,
+    profiles: Sequence[str] = tuple(ENCODE_PROFILES),
+    concurrent_slots: int = 1,
+    num_frames: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Measures the encode fps and video size of each encode profile.
+
+    Args:
+        frames_dir (str): Directory with rendered frames named 000.png, 001.png, ...
+        profiles (Sequence[str], optional): Profiles to measure. Defaults to all of
+            ENCODE_PROFILES.
+        concurrent_slots (int, optional): Number of concurrent encodes to budget the
+            threads for. Defaults to 1.
+        num_frames (Optional[int], optional): Number of frames to encode. If None,
+            encodes every frame in frames_dir. Defaults to None.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The encode statistics of each profile, see
+            `encoding.encode_video`.
+    """
+    if num_frames is None:
+        num_frames = len(glob.glob(os.path.join(frames_dir, "[0-9][0-9][0-9].png")))
+    input_pattern = os.path.join(frames_dir, "%03d.png")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for profile in profiles:
+            threads = budget_threads(profile, concurrent_slots)
+            results[profile] = encode_frames(
+                input_pattern,
+                os.path.join(temp_dir, f"{profile}.mp4"),
+                num_frames,
+                profile=profile,
+                threads=threads,
+            )
+            logger.info(
+                f"{profile}: {results[profile]['fps']:.1f} fps with {threads} threads, "
+                f"{results[profile]['bytes'] / 1e6:.2f} MB"
+            )
+    return results
+
+
+def _legacy_group_objects(
+    objects: pd.DataFrame, processes: int
+) -> Dict[str, Dict[str, str]]:
+    """The row-wise repoIdHash and Pool grouping that GitHubDownloader used before."""
+
+    def get_repo_id_with_hash(item: pd.Series) -> str:
+        org, repo = item["fileIdentifier"].split("/")[3:5]
+        commit_hash = item["fileIdentifier"].split("/")[6]
+        return f"{org}/{repo}/{commit_hash}"
+
+    objects = objects.copy()
+    objects["repoIdHash"] = objects.apply(get_repo_id_with_hash, axis=1)
+    groups = list(objects.groupby("repoIdHash"))
+    with Pool(processes=processes) as pool:
+        return dict(pool.imap_unordered(_legacy_process_group, groups))
+
+
+def _legacy_process_group(group):
+    key, group_df = group
+    return key, group_df.set_index("fileIdentifier")["sha256"].to_dict()
+
+
+def repo_grouping(
+    parquet_path: Optional[str] = None,
+    processes: Optional[int] = None,
+    skip_legacy: bool = False,
+    legacy_sample: Optional[int] = None,
+) -> Dict[str, float]:
+    """Compares the vectorised repo grouping of GitHubDownloader against the
+    row-wise apply and Pool groupby it replaced.
+
+    The repo ids and the grouping are computed with pandas/numpy. The only per-object
+    Python work left is filling the {fileIdentifier: sha256} dictionary of each repo,
+    which the return type of _group_objects_by_repo needs.
+
+    Args:
+        parquet_path (Optional[str], optional): Path to the GitHub annotations
+            parquet. If None, uses GitHubDownloader.get_annotations(), which
+            downloads the full parquet (~10M rows). Defaults to None.
+        processes (Optional[int], optional): Number of processes of the legacy Pool.
+            If None, uses os.cpu_count(). Defaults to None.
+        skip_legacy (bool, optional): Only time the vectorised grouping, e.g. when
+            the legacy version does not fit in memory. Defaults to False.
+        legacy_sample (Optional[int], optional): If not None, compares against the
+            legacy version on a random sample of this many objects instead of every
+            object, which keeps the comparison feasible on the full parquet. The
+            vectorised grouping is still timed on every object. Defaults to None.
+
+    Returns:
+        Dict[str, float]: Seconds taken by each version and their ratio.
+    """
+    sys.path.append("..")
+    from objaverse.xl.github import GitHubDownloader
+
+    if parquet_path is None:
+        objects = GitHubDownloader.get_annotations()
+    else:
+        objects = pd.read_parquet(parquet_path)
+    objects = objects[["fileIdentifier", "sha256"]]
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    def run_vectorised():
+        repo_id_hashes = GitHubDownloader._get_repo_id_hashes(objects["fileIdentifier"])
+        return GitHubDownloader._group_objects_by_repo(repo_id_hashes, objects)
+
+    start_time = time.perf_counter()
+    grouped = run_vectorised()
+    vectorised_time = time.perf_counter() - start_time
+    logger.info(
+        f"{len(objects)} objects in {len(grouped)} repos: vectorised grouping took "
+        f"{vectorised_time:.2f}s"
+    )
+    results = dict(vectorised=vectorised_time)
+    if skip_legacy:
+        return results
+
+    if legacy_sample is not None and legacy_sample < len(objects):
+        objects = objects.sample(n=legacy_sample, random_state=0)
+        start_time = time.perf_counter()
+        grouped = run_vectorised()
+        vectorised_time = time.perf_counter() - start_time
+        logger.info(
+            f"sample of {len(objects)} objects in {len(grouped)} repos: vectorised "
+            f"grouping took {vectorised_time:.2f}s"
+        )
+        results.update(sample=len(objects), sample_vectorised=vectorised_time)
+
+    start_time = time.perf_counter()
+    legacy_grouped = _legacy_group_objects(objects, processes)
+    legacy_time = time.perf_counter() - start_time
+    assert legacy_grouped == grouped, "The vectorised grouping differs from legacy"
+    logger.info(
+        f"legacy grouping with {processes} processes took {legacy_time:.2f}s "
+        f"({legacy_time / vectorised_time:.1f}x slower)"
+    )
+    results.update(legacy=legacy_time, speedup=legacy_time / vectorised_time)
+    return results
+
+
+if __name__ == "__main__":
+    fire.Fire(
+        {
+            "persistent_data": persistent_data,
+            "trajectory_math": trajectory_math,
+            "encode": encode,
+            "repo_grouping": repo_grouping,
+        }
+    )
@@ -5,13 +5,38 @@ import json
 import math
 import os
 import random
+import shutil
 import sys
-from typing import Any, Callable, Dict, Generator, List, Literal, Optional, Set, Tuple
+import tempfile
+import time
+import traceback
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import bpy
 import numpy as np
+from bpy_extras.object_utils import world_to_camera_view
 from mathutils import Matrix, Vector
 
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from camera_io import save_trajectory
+from trajectory import (
+    TRAJECTORY_FAMILIES,
+    generate_trajectory,
+    load_recammaster_c2ws,
+    set_camera_from_c2w_matrix,
+)
+
 IMPORT_FUNCTIONS: Dict[str, Callable] = {
     "obj": bpy.ops.import_scene.obj,
     "glb": bpy.ops.import_scene.gltf,
@@ -26,6 +51,12 @@ IMPORT_FUNCTIONS: Dict[str, Callable] = {
     "blend": bpy.ops.wm.append,
 }
 
+# Node-graph signatures of the materials that have already been compiled by EEVEE in
+# this Blender process. Blender keeps compiled GPU passes around, so objects whose
+# materials share a topology with an earlier object do not need another warm-up. This
+# only helps when several objects are rendered in the same process (--object_list).
+_WARMED_MATERIAL_SIGNATURES: Set[str] = set()
+
 
 def reset_cameras() -> None:
     """Resets the cameras in the scene to a single default camera."""
@@ -738,58 +769,456 @@ class MetadataExtractor:
         }
 
 
-def parse_matrix(matrix_str):
-    rows = matrix_str.strip().split('] [')
-    matrix = []
-    for row in rows:
-        row = row.replace('[', '').replace(']', '')
-        if len((list(map(float, row.split())))) == 3:
-            matrix.append((list(map(float, row.split()))) +[0.])
-        else:
-            matrix.append(list(map(float, row.split())))
-    return np.array(matrix)
-
-
-def get_c2w(w2cs, transform_matrix, relative_c2w=True):
-    if relative_c2w:
-        target_cam_c2w = np.array([
-            [1, 0, 0, 0],
-            [0, 1, 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ])
-        abs2rel = target_cam_c2w @ w2cs[0]
-        ret_poses = [target_cam_c2w, ] + [abs2rel @ np.linalg.inv(w2c) for w2c in w2cs[1:]]
-    else:
-        ret_poses = [np.linalg.inv(w2c) for w2c in w2cs]
-    ret_poses = [transform_matrix @ x for x in ret_poses]
-    return np.array(ret_poses, dtype=np.float32)
+def _get_material_signature(material: bpy.types.Material) -> str:
+    """Returns a string describing the node-graph topology of a material.
 
+    Materials with the same node types, links and blend method compile to the same
+    GLSL shader in EEVEE, regardless of their names or input values.
 
-def set_camera_from_c2w_matrix(cam: bpy.types.Object, c2w_matrix: np.ndarray) -> None:
-    """将camera-to-world矩阵应用于Blender相机
-    
-    这是get_3x4_RT_matrix_from_blender函数的逆过程
-    
     Args:
-        cam (bpy.types.Object): Blender相机对象
-        c2w_matrix (np.ndarray): 相机到世界的转换矩阵(4x4或3x4)
+        material (bpy.types.Material): The material to describe.
+
+    Returns:
+        str: The signature of the material.
     """
-    # 确保是4x4矩阵
-    if c2w_matrix.shape == (3, 4):
-        # 添加[0,0,0,1]行
-        c2w_matrix = np.vstack([c2w_matrix, np.array([0, 0, 0, 1])])
-    
-    # 转换为Blender的Matrix对象
-    mat = Matrix(
-        ((c2w_matrix[0, 0], c2w_matrix[0, 1], c2w_matrix[0, 2], c2w_matrix[0, 3]),
-         (c2w_matrix[1, 0], c2w_matrix[1, 1], c2w_matrix[1, 2], c2w_matrix[1, 3]),
-         (c2w_matrix[2, 0], c2w_matrix[2, 1], c2w_matrix[2, 2], c2w_matrix[2, 3]),
-         (0, 0, 0, 1))
+    if not material.use_nodes or material.node_tree is None:
+        return f"{material.blend_method}:no_nodes"
+    nodes = sorted(node.bl_idname for node in material.node_tree.nodes)
+    links = sorted(
+        f"{link.from_node.bl_idname}.{link.from_socket.identifier}"
+        f"->{link.to_node.bl_idname}.{link.to_socket.identifier}"
+        for link in material.node_tree.links
     )
-    
-    # 设置相机的matrix_world
-    cam.matrix_world = mat
+    return f"{material.blend_method}:{'|'.join(nodes)}:{'|'.join(links)}"
+
+
+def _get_scene_material_signatures() -> Set[str]:
+    """Returns the signatures of the materials used in the scene."""
+    return {
+        _get_material_signature(material)
+        for material in bpy.data.materials
+        if material.users > 0
+    }
+
+
+def warm_up_shaders(resolution_percentage: int = 10) -> float:
+    """Compiles all materials in the scene with a throw-away low-resolution render.
+
+    With EEVEE, the first render of a set of materials triggers GLSL compilation, which
+    would otherwise be attributed to the first frame of the trajectory. The warm-up is
+    skipped if every material in the scene has a signature that was already compiled
+    earlier in this process.
+
+    Args:
+        resolution_percentage (int, optional): Resolution percentage used for the
+            warm-up render. Defaults to 10.
+
+    Returns:
+        float: Number of seconds spent on the warm-up. 0 if it was skipped.
+    """
+    if scene.render.engine != "BLENDER_EEVEE":
+        return 0.0
+
+    signatures = _get_scene_material_signatures()
+    if _WARMED_MATERIAL_SIGNATURES and signatures <= _WARMED_MATERIAL_SIGNATURES:
+        return 0.0
+
+    start_time = time.perf_counter()
+    original_percentage = scene.render.resolution_percentage
+    scene.render.resolution_percentage = resolution_percentage
+    try:
+        bpy.ops.render.render(write_still=False)
+    finally:
+        scene.render.resolution_percentage = original_percentage
+    _WARMED_MATERIAL_SIGNATURES.update(signatures)
+    return time.perf_counter() - start_time
+
+
+def set_camera_for_frame(cam: bpy.types.Object, c2w_matrix: np.ndarray) -> None:
+    """Places the camera at a trajectory frame given by its camera-to-world matrix.
+
+    Args:
+        cam (bpy.types.Object): The camera object.
+        c2w_matrix (np.ndarray): Camera-to-world matrix of the frame (4x4 or 3x4).
+
+    Returns:
+        None
+    """
+    set_camera_from_c2w_matrix(cam, c2w_matrix)
+
+    cam.rotation_euler.x += math.radians(180)    # for cam01 ~ cam06 
+    # cam.location.z *= -1        # for cam07/08
+    # cam.rotation_euler.x *= -1        # for others
+
+
+def get_render_border(
+    cam: bpy.types.Object, bbox_min: Vector, bbox_max: Vector, padding: float = 0.02
+) -> Optional[Tuple[float, float, float, float]]:
+    """Returns the region of the frame covered by the projected scene bounding box.
+
+    Args:
+        cam (bpy.types.Object): The camera object, already placed at the frame.
+        bbox_min (Vector): Minimum corner of the scene bounding box.
+        bbox_max (Vector): Maximum corner of the scene bounding box.
+        padding (float, optional): Padding added to each side of the region, as a
+            fraction of the frame size. Defaults to 0.02.
+
+    Returns:
+        Optional[Tuple[float, float, float, float]]: The (min_x, max_x, min_y, max_y)
+            of the region in normalized frame coordinates, or None if the whole frame
+            should be rendered because the bounding box is behind or around the camera,
+            or does not overlap the frame.
+    """
+    # make sure the camera matrix_world reflects the frame
+    bpy.context.view_layer.update()
+
+    corners = [
+        Vector((x, y, z))
+        for x in (bbox_min.x, bbox_max.x)
+        for y in (bbox_min.y, bbox_max.y)
+        for z in (bbox_min.z, bbox_max.z)
+    ]
+    projected = [world_to_camera_view(scene, cam, corner) for corner in corners]
+    if any(coord.z <= cam.data.clip_start for coord in projected):
+        return None
+
+    min_x = max(0.0, min(coord.x for coord in projected) - padding)
+    max_x = min(1.0, max(coord.x for coord in projected) + padding)
+    min_y = max(0.0, min(coord.y for coord in projected) - padding)
+    max_y = min(1.0, max(coord.y for coord in projected) + padding)
+    if min_x >= max_x or min_y >= max_y:
+        return None
+    return min_x, max_x, min_y, max_y
+
+
+def _read_image_pixels(image_path: str) -> np.ndarray:
+    """Reads an image from disk with Blender.
+
+    Args:
+        image_path (str): Path to the image.
+
+    Returns:
+        np.ndarray: float32 RGBA pixels of the image with shape [height, width, 4]. Rows
+            are ordered bottom to top, as in Blender.
+    """
+    image = bpy.data.images.load(image_path)
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)
+
+
+def preflight_check(
+    cam: bpy.types.Object,
+    c2ws: np.ndarray,
+    num_frames: int = 4,
+    resolution: Tuple[int, int] = (104, 60),
+    samples: int = 16,
+    min_alpha_coverage: float = 0.002,
+    min_luminance: float = 0.02,
+) -> Tuple[Optional[str], List[Dict[str, float]]]:
+    """Renders a few cheap frames along the trajectory to reject bad objects early.
+
+    Objects that come out empty, tiny, fully transparent or all black (missing textures,
+    degenerate geometry, lights-only scenes) are rejected before the full trajectory is
+    rendered.
+
+    Args:
+        cam (bpy.types.Object): The camera object.
+        c2ws (np.ndarray): Camera-to-world matrices of the trajectory.
+        num_frames (int, optional): Number of frames to sample evenly along the
+            trajectory. Defaults to 4.
+        resolution (Tuple[int, int], optional): Resolution of the preview frames.
+            Defaults to (104, 60).
+        samples (int, optional): Number of render samples of the preview frames. With
+            Cycles adaptive sampling, raised to at least adaptive_min_samples so the
+            preview is not noisier than the final frames. Defaults to 16.
+        min_alpha_coverage (float, optional): Minimum fraction of opaque pixels that
+            the object must cover in at least one frame. Defaults to 0.002.
+        min_luminance (float, optional): Minimum mean luminance of the opaque pixels
+            over all frames. Defaults to 0.02.
+
+    Returns:
+        Tuple[Optional[str], List[Dict[str, float]]]: The reason the object was
+            rejected, or None if it passed, and the statistics of each preview frame.
+    """
+    render = scene.render
+    original_settings = dict(
+        resolution_x=render.resolution_x,
+        resolution_y=render.resolution_y,
+        resolution_percentage=render.resolution_percentage,
+        filepath=render.filepath,
+    )
+    original_cycles_samples = scene.cycles.samples
+    original_eevee_samples = scene.eevee.taa_render_samples
+
+    frame_indices = np.unique(
+        np.linspace(0, len(c2ws) - 1, num_frames).round().astype(int)
+    )
+    stats = []
+    try:
+        render.resolution_x, render.resolution_y = resolution
+        render.resolution_percentage = 100
+        if scene.cycles.use_adaptive_sampling:
+            scene.cycles.samples = max(samples, scene.cycles.adaptive_min_samples)
+        else:
+            scene.cycles.samples = samples
+        scene.eevee.taa_render_samples = samples
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i in frame_indices:
+                set_camera_for_frame(cam, c2ws[i])
+                render.filepath = os.path.join(temp_dir, f"{i:03d}.png")
+                bpy.ops.render.render(write_still=True)
+
+                pixels = _read_image_pixels(render.filepath)
+                alpha = pixels[..., 3]
+                luminance = pixels[..., :3] @ np.array([0.2126, 0.7152, 0.0722])
+                stats.append(
+                    dict(
+                        frame=int(i),
+                        alpha_coverage=float(np.mean(alpha > 0.5)),
+                        alpha_sum=float(alpha.sum()),
+                        luminance_sum=float((luminance * alpha).sum()),
+                    )
+                )
+    finally:
+        for key, value in original_settings.items():
+            setattr(render, key, value)
+        scene.cycles.samples = original_cycles_samples
+        scene.eevee.taa_render_samples = original_eevee_samples
+
+    max_coverage = max(frame_stats["alpha_coverage"] for frame_stats in stats)
+    alpha_sum = sum(frame_stats["alpha_sum"] for frame_stats in stats)
+    if alpha_sum == 0:
+        return "empty or fully transparent", stats
+    if max_coverage < min_alpha_coverage:
+        return f"tiny (max alpha coverage {max_coverage:.4f})", stats
+    luminance_sum = sum(frame_stats["luminance_sum"] for frame_stats in stats)
+    mean_luminance = luminance_sum / alpha_sum
+    if mean_luminance < min_luminance:
+        return f"all black (mean luminance {mean_luminance:.4f})", stats
+    return None, stats
+
+
+class RenderPassWriter:
+    """Writes depth, normal and mask passes from the same render as the RGBA frames.
+
+    The passes are routed through compositor File Output nodes, so they come out of
+    the `bpy.ops.render.render` call of each frame without a second render. They are
+    first written as EXR files to a temporary directory, then converted to their final
+    format in `passes_dir`:
+
+    - depth: `depth/000.exr` (float16) or, with depth_format="uint16", a single
+      `depth.npz` with the depth quantized linearly over depth_range.
+    - normal: `normal/000.exr` (float16, world space).
+    - mask: a single `masks.npz` with the alpha > 0.5 masks packed to 1 bit per pixel.
+
+    `passes.json` in `passes_dir` describes how to decode them.
+    """
+
+    PASS_SOCKETS = {"depth": "Depth", "normal": "Normal", "mask": "Alpha"}
+
+    def __init__(
+        self,
+        passes: Sequence[str],
+        passes_dir: str,
+        depth_format: Literal["exr", "uint16"] = "exr",
+        depth_range: Tuple[float, float] = (0.0, 6.0),
+    ) -> None:
+        """Adds the File Output nodes of the passes to the compositor.
+
+        The nodes start muted, so warm-up and preflight renders do not write passes.
+
+        Args:
+            passes (Sequence[str]): Passes to write, any of "depth", "normal", "mask".
+            passes_dir (str): Directory where the passes will be saved.
+            depth_format (Literal["exr", "uint16"], optional): How to save the depth
+                pass. Defaults to "exr".
+            depth_range (Tuple[float, float], optional): Near and far depth mapped to
+                0 and 65535 with depth_format="uint16". Depth beyond the far plane
+                (including the background) is clamped to it. Defaults to (0.0, 6.0).
+
+        Raises:
+            ValueError: If a pass or the depth format is not supported.
+
+        Returns:
+            None
+        """
+        unknown_passes = set(passes) - set(self.PASS_SOCKETS)
+        if unknown_passes:
+            raise ValueError(
+                f"passes must be any of {', '.join(self.PASS_SOCKETS)}. "
+                f"Got {', '.join(sorted(unknown_passes))}."
+            )
+        if depth_format not in ("exr", "uint16"):
+            raise ValueError(f"depth_format must be exr or uint16. Got {depth_format}.")
+
+        self.passes = list(passes)
+        self.passes_dir = passes_dir
+        self.depth_format = depth_format
+        self.depth_range = depth_range
+        self.temp_dir = tempfile.mkdtemp(dir=passes_dir)
+        self.depths: List[np.ndarray] = []
+        self.masks: List[np.ndarray] = []
+        self.mask_width = 0
+        self.frame_indices: List[int] = []
+
+        view_layer = bpy.context.view_layer
+        view_layer.use_pass_z = "depth" in self.passes
+        view_layer.use_pass_normal = "normal" in self.passes
+
+        scene.use_nodes = True
+        tree = scene.node_tree
+        render_layers = next(
+            (node for node in tree.nodes if node.type == "R_LAYERS"), None
+        )
+        if render_layers is None:
+            render_layers = tree.nodes.new("CompositorNodeRLayers")
+
+        self.nodes: Dict[str, bpy.types.Node] = {}
+        for render_pass in self.passes:
+            node = tree.nodes.new("CompositorNodeOutputFile")
+            node.base_path = self.temp_dir
+            node.format.file_format = "OPEN_EXR"
+            node.format.exr_codec = "ZIP"
+            node.format.color_mode = "RGB" if render_pass == "normal" else "BW"
+            # uint16 depth is quantized from full precision floats
+            node.format.color_depth = (
+                "32" if render_pass == "depth" and depth_format == "uint16" else "16"
+            )
+            node.file_slots[0].path = f"{render_pass}_"
+            node.mute = True
+            tree.links.new(
+                render_layers.outputs[self.PASS_SOCKETS[render_pass]], node.inputs[0]
+            )
+            self.nodes[render_pass] = node
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Enables or disables writing the passes on the next renders."""
+        for node in self.nodes.values():
+            node.mute = not enabled
+
+    def collect(self, frame_index: int) -> None:
+        """Moves or converts the passes written by the last render.
+
+        Args:
+            frame_index (int): Index of the rendered frame in the trajectory.
+
+        Returns:
+            None
+        """
+        self.frame_indices.append(frame_index)
+        for render_pass in self.passes:
+            path = os.path.join(
+                self.temp_dir, f"{render_pass}_{scene.frame_current:04d}.exr"
+            )
+            if render_pass == "mask":
+                # Blender images are stored bottom to top
+                alpha = _read_image_pixels(path)[::-1, :, 0]
+                self.mask_width = alpha.shape[1]
+                self.masks.append(np.packbits(alpha > 0.5, axis=-1))
+                os.remove(path)
+            elif render_pass == "depth" and self.depth_format == "uint16":
+                near, far = self.depth_range
+                depth = _read_image_pixels(path)[::-1, :, 0]
+                depth = np.clip((depth - near) / (far - near), 0.0, 1.0)
+                self.depths.append(np.round(depth * 65535).astype(np.uint16))
+                os.remove(path)
+            else:
+                pass_dir = os.path.join(self.passes_dir, render_pass)
+                os.makedirs(pass_dir, exist_ok=True)
+                os.replace(path, os.path.join(pass_dir, f"{frame_index:03d}.exr"))
+
+    def save(self) -> None:
+        """Saves the packed passes and passes.json, and removes the temporary files.
+
+        Returns:
+            None
+        """
+        frame_indices = np.array(self.frame_indices, dtype=np.int32)
+        info: Dict[str, Any] = dict(passes=self.passes)
+        if self.masks:
+            np.savez_compressed(
+                os.path.join(self.passes_dir, "masks.npz"),
+                masks=np.stack(self.masks),
+                width=np.int32(self.mask_width),
+                frame_indices=frame_indices,
+            )
+            info["mask"] = dict(
+                format="npz", decode="np.unpackbits(masks, axis=-1)[..., :width]"
+            )
+        if "depth" in self.passes:
+            info["depth"] = dict(format=self.depth_format, units="camera z distance")
+        if self.depths:
+            np.savez_compressed(
+                os.path.join(self.passes_dir, "depth.npz"),
+                depth=np.stack(self.depths),
+                depth_range=np.array(self.depth_range, dtype=np.float32),
+                frame_indices=frame_indices,
+            )
+            info["depth"].update(
+                depth_range=list(self.depth_range),
+                decode="near + depth / 65535 * (far - near)",
+            )
+        if "normal" in self.passes:
+            info["normal"] = dict(format="exr", space="world")
+
+        with open(
+            os.path.join(self.passes_dir, "passes.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(info, f, indent=2)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def configure_cycles(device: Literal["GPU", "CPU"]) -> None:
+    """Configures the Cycles render settings for the given device.
+
+    The GPU profile renders a fixed 128 samples with denoising on CUDA. The CPU profile
+    uses adaptive sampling with a noise threshold, OpenImageDenoise, and automatic
+    thread count and tile size, so that CPU-only render nodes can still produce full
+    trajectories at a usable throughput. Persistent data across frames is managed by
+    `render_object`.
+
+    Args:
+        device (Literal["GPU", "CPU"]): Device to render on.
+
+    Returns:
+        None
+    """
+    cycles = scene.cycles
+    cycles.diffuse_bounces = 1
+    cycles.glossy_bounces = 1
+    cycles.transparent_max_bounces = 3
+    cycles.transmission_bounces = 3
+    cycles.filter_width = 0.01
+    cycles.use_denoising = True
+
+    cycles_preferences = bpy.context.preferences.addons["cycles"].preferences
+    if device == "GPU":
+        cycles.device = "GPU"
+        cycles.samples = 128
+        cycles_preferences.get_devices()
+        cycles_preferences.compute_device_type = "CUDA"  # or "OPENCL"
+    elif device == "CPU":
+        cycles.device = "CPU"
+        cycles_preferences.compute_device_type = "NONE"
+        cycles_preferences.get_devices()
+        for cycles_device in cycles_preferences.devices:
+            cycles_device.use = cycles_device.type == "CPU"
+
+        # stop sampling pixels once they are below the noise threshold
+        cycles.samples = 128
+        cycles.use_adaptive_sampling = True
+        cycles.adaptive_threshold = 0.05
+        cycles.adaptive_min_samples = 16
+        cycles.denoiser = "OPENIMAGEDENOISE"
+        scene.render.threads_mode = "AUTO"
+        cycles.use_auto_tile = True
+    else:
+        raise ValueError(f"device must be one of GPU, CPU. Got {device}.")
 
 
 def render_object(
@@ -797,6 +1226,16 @@ def render_object(
     num_renders: int,
     only_northern_hemisphere: bool,
     output_dir: str,
+    use_persistent_data: bool = True,
+    preflight: bool = True,
+    crop_to_object: bool = False,
+    camera_format: Literal["npz", "npy"] = "npz",
+    trajectory: str = "recammaster",
+    cam_name: Optional[str] = None,
+    trajectory_params: Optional[Dict[str, Any]] = None,
+    passes: Sequence[str] = (),
+    depth_format: Literal["exr", "uint16"] = "exr",
+    depth_range: Tuple[float, float] = (0.0, 6.0),
 ) -> None:
     """Saves rendered images with its camera matrix and metadata of the object.
 
@@ -809,14 +1248,53 @@ def render_object(
             holes.
         output_dir (str): Path to the directory where the rendered images and metadata
             will be saved.
+        use_persistent_data (bool, optional): Whether to keep the render data (BVH,
+            image uploads) between the frames of the trajectory. Only the camera
+            changes between frames, so nothing else is mutated inside the render loop.
+            Defaults to True.
+        preflight (bool, optional): Whether to render a few low-resolution frames first
+            and skip the object if they come out empty, tiny or black. Skipped objects
+            get a rejected.json with the reason in output_dir. The preview frames
+            compile the EEVEE shaders, so they replace the shader warm-up, and the
+            "preflight" time in timings.json includes the compilation. Defaults to
+            True.
+        crop_to_object (bool, optional): Whether to only render the region of each
+            frame covered by the projected scene bounding box. The rest of the frame is
+            left transparent, so the saved frames keep their full size. Defaults to
+            False.
+        camera_format (Literal["npz", "npy"], optional): How to save the camera poses.
+            "npz" saves a single trajectory.npz per trajectory (see camera_io.py),
+            "npy" saves one file per frame plus camera_intrinsics.npy. Defaults to
+            "npz".
+        trajectory (str, optional): Camera trajectory to render. "recammaster" loads
+            the `cam_name` trajectory from the ReCamMaster extrinsics, any of
+            TRAJECTORY_FAMILIES generates a procedural trajectory with num_renders
+            frames. Defaults to "recammaster".
+        cam_name (Optional[str], optional): Name of the trajectory, used for the
+            cameras_{cam_name} directory and the video. If None, uses "cam03" for the
+            ReCamMaster trajectory and "cam_{trajectory}" otherwise. Defaults to None.
+        trajectory_params (Optional[Dict[str, Any]], optional): Keyword arguments
+            passed to `generate_trajectory`, e.g. {"angle": 90, "elevation": 15}.
+            Defaults to None.
+        passes (Sequence[str], optional): Extra render passes to save from the same
+            render as the frames, any of "depth", "normal", "mask". They are saved to
+            passes_{cam_name} (see RenderPassWriter). Defaults to ().
+        depth_format (Literal["exr", "uint16"], optional): How to save the depth pass.
+            Defaults to "exr".
+        depth_range (Tuple[float, float], optional): Near and far depth of the uint16
+            depth quantization. Defaults to (0.0, 6.0).
 
     Returns:
         None
     """
+    timings: Dict[str, Any] = {}
+    start_time = time.perf_counter()
+
     os.makedirs(output_dir, exist_ok=True)
     frames_dir = os.path.join(output_dir, "frames")
     videos_dir = os.path.join(output_dir, "videos")
-    cam_name = "cam03"  
+    if cam_name is None:
+        cam_name = "cam03" if trajectory == "recammaster" else f"cam_{trajectory}"
     cameras_dir = os.path.join(output_dir, f"cameras_{cam_name}")
     os.makedirs(frames_dir, exist_ok=True)
     os.makedirs(cameras_dir, exist_ok=True)
@@ -879,30 +1357,17 @@ def render_object(
     # randomize the lighting
     randomize_lighting()
 
-    # set camera from recammaster
-    extrinsics_path = '/home/xu_zifan/HOIrecon/objaverse-backup/scripts/rendering/extrinsics.json'
-    if not os.path.exists(extrinsics_path):
-        raise RuntimeError("load extrinsics file failed")
+    if trajectory == "recammaster":
+        # set camera from recammaster
+        extrinsics_path = '/home/xu_zifan/HOIrecon/objaverse-backup/scripts/rendering/extrinsics.json'
+        # transform_matrix = np.array([[1, 0, 0, 0], [0, 0, -1, 0], [0, 1, 0, 0], [0, 0, 0, 1]]) # for trajctory cam07/08
+        transform_matrix = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, -1, 0, 0], [0, 0, 0, 1]])   # for others
 
-    with open(extrinsics_path, 'r') as file:
-        data = json.load(file)
-    
-    
-    cameras = [parse_matrix(data[f"frame{i}"][cam_name]) for i in range(0, 81, 1)]
-    cameras = np.transpose(np.stack(cameras), (0, 2, 1))
-    w2cs = []
-    for cam in cameras:
-        if cam.shape[0] == 3:
-            cam = np.vstack((cam, np.array([[0, 0, 0, 1]])))
-        cam = cam[:, [1, 2, 0, 3]]
-        cam[:3, 1] *= -1.
-        cam[:3, 3] /= 100
-        w2cs.append(np.linalg.inv(cam))
-    
-    # transform_matrix = np.array([[1, 0, 0, 0], [0, 0, -1, 0], [0, 1, 0, 0], [0, 0, 0, 1]]) # for trajctory cam07/08
-    transform_matrix = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, -1, 0, 0], [0, 0, 0, 1]])   # for others
-    
-    c2ws = get_c2w(w2cs, transform_matrix, True)
+        c2ws = load_recammaster_c2ws(extrinsics_path, cam_name, transform_matrix)
+    else:
+        c2ws = generate_trajectory(
+            trajectory, num_frames=num_renders, **(trajectory_params or {})
+        )
     
     render_count = min(num_renders, len(c2ws))
 
@@ -914,33 +1379,103 @@ def render_object(
     fy = focal_length / sensor_height
     cx = 0.5
     cy = 0.5
-    intrin_path = os.path.join(cameras_dir, "camera_intrinsics.npy")
-    np.save(intrin_path, np.array([fx, fy, cx, cy], dtype=np.float32))
+    intrinsics = np.array([fx, fy, cx, cy], dtype=np.float32)
 
-    for i in range(render_count):
-        # 获取相机对象
-        camera = bpy.data.objects["Camera"]
+    # 移除相机的所有约束 (在渲染循环之外, 避免每帧使持久化数据失效)
+    camera = bpy.data.objects["Camera"]
+    for constraint in list(camera.constraints):
+        camera.constraints.remove(constraint)
+
+    scene.render.use_persistent_data = use_persistent_data
+    timings["use_persistent_data"] = use_persistent_data
+
+    # the passes are set up muted before the preflight or warm-up so their shaders get
+    # compiled too
+    pass_writer = None
+    if passes:
+        passes_dir = os.path.join(output_dir, f"passes_{cam_name}")
+        os.makedirs(passes_dir, exist_ok=True)
+        pass_writer = RenderPassWriter(passes, passes_dir, depth_format, depth_range)
+
+    timings["setup"] = time.perf_counter() - start_time
+
+    # the preflight runs first so rejected objects don't pay for the warm-up
+    if preflight:
+        preflight_start_time = time.perf_counter()
+        reason, preflight_stats = preflight_check(camera, c2ws[:render_count])
+        timings["preflight"] = time.perf_counter() - preflight_start_time
+        if reason is not None:
+            print(f"Skipping {object_file}: {reason}")
+            if pass_writer is not None:
+                shutil.rmtree(pass_writer.passes_dir, ignore_errors=True)
+            with open(
+                os.path.join(output_dir, "rejected.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(dict(reason=reason, stats=preflight_stats), f, indent=2)
+            timings["total"] = time.perf_counter() - start_time
+            with open(
+                os.path.join(output_dir, "timings.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(timings, f, indent=2)
+            return
+        # the preview frames compiled the shaders of the object
+        if scene.render.engine == "BLENDER_EEVEE":
+            _WARMED_MATERIAL_SIGNATURES.update(_get_scene_material_signatures())
+    else:
+        timings["warmup"] = warm_up_shaders()
 
-        # 临时移除相机的所有约束
-        for constraint in camera.constraints:
-            camera.constraints.remove(constraint)
-        
+    bbox_min, bbox_max = scene_bbox()
+    if pass_writer is not None:
+        pass_writer.set_enabled(True)
+    rt_matrices = []
+    timings["frames"] = []
+    for i in range(render_count):
         # 从c2ws列表设置相机参数
-        set_camera_from_c2w_matrix(camera, c2ws[i])
+        set_camera_for_frame(camera, c2ws[i])
+
+        # 只渲染物体投影所在的区域, 其余部分保持透明
+        border = None
+        if crop_to_object:
+            border = get_render_border(camera, bbox_min, bbox_max)
+        scene.render.use_border = border is not None
+        if border is not None:
+            scene.render.use_crop_to_border = False
+            (
+                scene.render.border_min_x,
+                scene.render.border_max_x,
+                scene.render.border_min_y,
+                scene.render.border_max_y,
+            ) = border
 
-        camera.rotation_euler.x += math.radians(180)    # for cam01 ~ cam06 
-        # camera.location.z *= -1        # for cam07/08
-        # camera.rotation_euler.x *= -1        # for others
-        
         # 渲染图像
         render_path = os.path.join(frames_dir, f"{i:03d}.png")
         scene.render.filepath = render_path
+        frame_start_time = time.perf_counter()
         bpy.ops.render.render(write_still=True)
-        
-        # 保存相机RT矩阵 (验证相机设置是否正确)
-        rt_matrix = get_3x4_RT_matrix_from_blender(camera)
-        rt_matrix_path = os.path.join(cameras_dir, f"{i:03d}.npy")
-        np.save(rt_matrix_path, rt_matrix)
+        timings["frames"].append(time.perf_counter() - frame_start_time)
+        if pass_writer is not None:
+            pass_writer.collect(i)
+
+        # 记录相机RT矩阵 (验证相机设置是否正确)
+        rt_matrices.append(np.array(get_3x4_RT_matrix_from_blender(camera)))
+    scene.render.use_border = False
+    if pass_writer is not None:
+        pass_writer.save()
+
+    # 保存相机参数
+    if camera_format == "npz":
+        save_trajectory(cameras_dir, np.stack(rt_matrices), intrinsics)
+    elif camera_format == "npy":
+        for i, rt_matrix in enumerate(rt_matrices):
+            np.save(os.path.join(cameras_dir, f"{i:03d}.npy"), rt_matrix)
+        np.save(os.path.join(cameras_dir, "camera_intrinsics.npy"), intrinsics)
+    else:
+        raise ValueError(f"camera_format must be one of npz, npy. Got {camera_format}.")
+
+    # save the per-object timings, with the warm-up kept apart from the frames
+    timings["total"] = time.perf_counter() - start_time
+    with open(os.path.join(output_dir, "timings.json"), "w", encoding="utf-8") as f:
+        json.dump(timings, f, indent=2)
 
 
 if __name__ == "__main__":
@@ -948,21 +1483,36 @@ if __name__ == "__main__":
     parser.add_argument(
         "--object_path",
         type=str,
-        required=True,
+        default=None,
         help="Path to the object file",
     )
     parser.add_argument(
         "--output_dir",
         type=str,
-        required=True,
+        default=None,
         help="Path to the directory where the rendered images and metadata will be saved.",
     )
+    parser.add_argument(
+        "--object_list",
+        type=str,
+        default=None,
+        help="JSON lines file of objects to render one after the other in this Blender "
+        "process, each with an object_path and output_dir, instead of --object_path "
+        "and --output_dir. Compiled shaders are reused across the objects.",
+    )
     parser.add_argument(
         "--engine",
         type=str,
         default="BLENDER_EEVEE",
         choices=["CYCLES", "BLENDER_EEVEE"],
     )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="GPU",
+        choices=["GPU", "CPU"],
+        help="Device to render on with CYCLES. Selects the matching sampling profile.",
+    )
     parser.add_argument(
         "--only_northern_hemisphere",
         action="store_true",
@@ -975,8 +1525,81 @@ if __name__ == "__main__":
         default=12,
         help="Number of renders to save of the object.",
     )
+    parser.add_argument(
+        "--no_persistent_data",
+        action="store_true",
+        help="Rebuild the render data for every frame instead of keeping it.",
+        default=False,
+    )
+    parser.add_argument(
+        "--camera_format",
+        type=str,
+        default="npz",
+        choices=["npz", "npy"],
+        help="Save the camera poses as one npz per trajectory or one npy per frame.",
+    )
+    parser.add_argument(
+        "--crop_to_object",
+        action="store_true",
+        help="Only render the region of each frame covered by the object.",
+        default=False,
+    )
+    parser.add_argument(
+        "--no_preflight",
+        action="store_true",
+        help="Do not reject empty, tiny or black objects with a low-resolution preview.",
+        default=False,
+    )
+    parser.add_argument(
+        "--trajectory",
+        type=str,
+        default="recammaster",
+        choices=["recammaster", *TRAJECTORY_FAMILIES],
+        help="Load the ReCamMaster trajectory or generate a procedural one.",
+    )
+    parser.add_argument(
+        "--cam_name",
+        type=str,
+        default=None,
+        help="Name of the trajectory. Defaults to cam03 or cam_<trajectory>.",
+    )
+    parser.add_argument(
+        "--trajectory_params",
+        type=json.loads,
+        default=None,
+        help='JSON keyword arguments of generate_trajectory, e.g. \'{"angle": 90}\'.',
+    )
+    parser.add_argument(
+        "--passes",
+        type=str,
+        nargs="*",
+        default=[],
+        choices=list(RenderPassWriter.PASS_SOCKETS),
+        help="Extra render passes to save from the same render as the frames.",
+    )
+    parser.add_argument(
+        "--depth_format",
+        type=str,
+        default="exr",
+        choices=["exr", "uint16"],
+        help="Save depth as float16 EXR files or as uint16 in a single npz.",
+    )
+    parser.add_argument(
+        "--depth_range",
+        type=float,
+        nargs=2,
+        default=(0.0, 6.0),
+        help="Near and far depth of the uint16 depth quantization.",
+    )
     argv = sys.argv[sys.argv.index("--") + 1 :]
     args = parser.parse_args(argv)
+    if args.object_list is not None:
+        with open(args.object_list, "r", encoding="utf-8") as f:
+            objects = [json.loads(line) for line in f if line.strip()]
+    elif args.object_path is not None and args.output_dir is not None:
+        objects = [dict(object_path=args.object_path, output_dir=args.output_dir)]
+    else:
+        parser.error("--object_list or --object_path and --output_dir are required")
 
     context = bpy.context
     scene = context.scene
@@ -991,24 +1614,37 @@ if __name__ == "__main__":
     render.resolution_percentage = 100
 
     # Set cycles settings
-    scene.cycles.device = "GPU"
-    scene.cycles.samples = 128
-    scene.cycles.diffuse_bounces = 1
-    scene.cycles.glossy_bounces = 1
-    scene.cycles.transparent_max_bounces = 3
-    scene.cycles.transmission_bounces = 3
-    scene.cycles.filter_width = 0.01
-    scene.cycles.use_denoising = True
     scene.render.film_transparent = True
-    bpy.context.preferences.addons["cycles"].preferences.get_devices()
-    bpy.context.preferences.addons[
-        "cycles"
-    ].preferences.compute_device_type = "CUDA"  # or "OPENCL"
+    configure_cycles(args.device)
 
     # Render the images
-    render_object(
-        object_file=args.object_path,
-        num_renders=args.num_renders,
-        only_northern_hemisphere=args.only_northern_hemisphere,
-        output_dir=args.output_dir,
-    )
+    failed_objects = []
+    for obj in objects:
+        try:
+            render_object(
+                object_file=obj["object_path"],
+                num_renders=args.num_renders,
+                only_northern_hemisphere=args.only_northern_hemisphere,
+                output_dir=obj["output_dir"],
+                use_persistent_data=not args.no_persistent_data,
+                preflight=not args.no_preflight,
+                crop_to_object=args.crop_to_object,
+                camera_format=args.camera_format,
+                trajectory=args.trajectory,
+                cam_name=args.cam_name,
+                trajectory_params=args.trajectory_params,
+                passes=args.passes,
+                depth_format=args.depth_format,
+                depth_range=tuple(args.depth_range),
+            )
+        except Exception:
+            # a single object keeps the original behaviour of failing the process
+            if len(objects) == 1:
+                raise
+            traceback.print_exc()
+            failed_objects.append(obj["object_path"])
+    if failed_objects:
+        print(f"Failed to render {len(failed_objects)}/{len(objects)} objects:")
+        for object_path in failed_objects:
+            print(f"  {object_path}")
+        sys.exit(1)
@@ -0,0 +1,128 @@
+"""Reading and writing the camera poses of rendered trajectories.
+
+Each trajectory is stored as a single `trajectory.npz` in its `cameras_camXX`
+directory instead of one `.npy` file per frame. The archive holds:
+
+- `extrinsics`: float32 array of shape [N, 3, 4] with the world-to-camera RT matrix of
+  each frame, as returned by `get_3x4_RT_matrix_from_blender`.
+- `intrinsics`: float32 array of [fx, fy, cx, cy], normalized by the sensor size.
+- `frame_indices`: int32 array of shape [N] with the index of each frame.
+
+`expand_trajectory` writes the legacy per-frame layout (`000.npy`, `001.npy`, ...,
+`camera_intrinsics.npy`) for tools that still expect it.
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+TRAJECTORY_FILENAME = "trajectory.npz"
+INTRINSICS_FILENAME = "camera_intrinsics.npy"
+
+
+def save_trajectory(
+    cameras_dir: str,
+    extrinsics: np.ndarray,
+    intrinsics: np.ndarray,
+    frame_indices: Optional[np.ndarray] = None,
+) -> str:
+    """Saves the camera poses of a trajectory to a single npz file.
+
+    Args:
+        cameras_dir (str): Directory of the trajectory, e.g. `<uid>/cameras_cam03`.
+        extrinsics (np.ndarray): World-to-camera RT matrices of shape [N, 3, 4].
+        intrinsics (np.ndarray): Camera intrinsics [fx, fy, cx, cy].
+        frame_indices (Optional[np.ndarray], optional): Index of each frame. If None,
+            the frames are numbered from 0 to N - 1. Defaults to None.
+
+    Returns:
+        str: Path to the saved npz file.
+    """
+    extrinsics = np.asarray(extrinsics, dtype=np.float32).reshape(-1, 3, 4)
+    if frame_indices is None:
+        frame_indices = np.arange(len(extrinsics))
+    path = os.path.join(cameras_dir, TRAJECTORY_FILENAME)
+    np.savez(
+        path,
+        extrinsics=extrinsics,
+        intrinsics=np.asarray(intrinsics, dtype=np.float32),
+        frame_indices=np.asarray(frame_indices, dtype=np.int32),
+    )
+    return path
+
+
+def load_trajectory(path: str) -> Dict[str, np.ndarray]:
+    """Loads the camera poses of a trajectory.
+
+    Args:
+        path (str): Path to a `trajectory.npz` file, or to a `cameras_camXX` directory
+            in either the consolidated or the legacy per-frame layout.
+
+    Raises:
+        FileNotFoundError: If no camera poses are found at the path.
+
+    Returns:
+        Dict[str, np.ndarray]: Dictionary with keys "extrinsics", "intrinsics", and
+            "frame_indices" as described in the module docstring.
+    """
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, TRAJECTORY_FILENAME)):
+        path = os.path.join(path, TRAJECTORY_FILENAME)
+
+    if os.path.isfile(path):
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+
+    # legacy layout with one npy file per frame
+    frame_paths = sorted(
+        frame_path
+        for frame_path in glob.glob(os.path.join(path, "*.npy"))
+        if os.path.basename(frame_path) != INTRINSICS_FILENAME
+    )
+    if len(frame_paths) == 0:
+        raise FileNotFoundError(f"No camera poses found at {path}")
+    return {
+        "extrinsics": np.stack([np.load(p) for p in frame_paths]).astype(np.float32),
+        "intrinsics": np.load(os.path.join(path, INTRINSICS_FILENAME)),
+        "frame_indices": np.array(
+            [int(os.path.splitext(os.path.basename(p))[0]) for p in frame_paths],
+            dtype=np.int32,
+        ),
+    }
+
+
+def expand_trajectory(path: str, out_dir: Optional[str] = None) -> List[str]:
+    """Writes the legacy per-frame `.npy` files of a consolidated trajectory.
+
+    Args:
+        path (str): Path to a `trajectory.npz` file or to the directory containing it.
+        out_dir (Optional[str], optional): Directory to write the files to. If None,
+            they are written next to the npz file. Defaults to None.
+
+    Returns:
+        List[str]: Paths of the written files.
+    """
+    trajectory = load_trajectory(path)
+    if out_dir is None:
+        out_dir = path if os.path.isdir(path) else os.path.dirname(path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = []
+    for frame_index, rt_matrix in zip(
+        trajectory["frame_indices"], trajectory["extrinsics"]
+    ):
+        frame_path = os.path.join(out_dir, f"{frame_index:03d}.npy")
+        np.save(frame_path, rt_matrix)
+        written.append(frame_path)
+
+    intrinsics_path = os.path.join(out_dir, INTRINSICS_FILENAME)
+    np.save(intrinsics_path, trajectory["intrinsics"])
+    written.append(intrinsics_path)
+    return written
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire({"expand": expand_trajectory})
@@ -0,0 +1,192 @@
+"""Named ffmpeg encode profiles for the trajectory videos.
+
+Several renders are encoded side by side, so every profile runs with an explicit
+thread count from `budget_threads` instead of letting each ffmpeg grab every core.
+The profiles are:
+
+- "standard": libx264 with the default preset and -crf 23, as used so far.
+- "throughput": libx264 -preset veryfast -crf 23, capped at 4 threads.
+- "archival": libx264 -preset slow -crf 18.
+- "lossless": libx264rgb -qp 0, which keeps the RGB values of the frames exactly.
+"""
+
+import os
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+ENCODE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "standard": dict(
+        codec="libx264", pix_fmt="yuv420p", args=["-crf", "23"], max_threads=None
+    ),
+    "throughput": dict(
+        codec="libx264",
+        pix_fmt="yuv420p",
+        args=["-preset", "veryfast", "-crf", "23"],
+        max_threads=4,
+    ),
+    "archival": dict(
+        codec="libx264",
+        pix_fmt="yuv420p",
+        args=["-preset", "slow", "-crf", "18"],
+        max_threads=None,
+    ),
+    "lossless": dict(
+        codec="libx264rgb",
+        pix_fmt="rgb24",
+        args=["-preset", "veryfast", "-qp", "0"],
+        max_threads=None,
+    ),
+}
+
+
+def _get_profile(profile: str) -> Dict[str, Any]:
+    if profile not in ENCODE_PROFILES:
+        raise ValueError(
+            f"profile must be one of {', '.join(ENCODE_PROFILES)}. Got {profile}."
+        )
+    return ENCODE_PROFILES[profile]
+
+
+def budget_threads(
+    profile: str = "standard",
+    concurrent_slots: int = 1,
+    cpu_count: Optional[int] = None,
+) -> int:
+    """Returns the number of ffmpeg threads of each of several concurrent encodes.
+
+    Args:
+        profile (str, optional): Name of the encode profile. Defaults to "standard".
+        concurrent_slots (int, optional): Number of encodes (or renders) running at
+            the same time. Defaults to 1.
+        cpu_count (Optional[int], optional): Number of cores to share. If None, uses
+            os.cpu_count(). Defaults to None.
+
+    Returns:
+        int: Threads per encode, at least 1 and at most the cap of the profile.
+    """
+    if cpu_count is None:
+        cpu_count = os.cpu_count() or 1
+    threads = max(1, cpu_count // max(1, concurrent_slots))
+    max_threads = _get_profile(profile)["max_threads"]
+    if max_threads is not None:
+        threads = min(threads, max_threads)
+    return threads
+
+
+def get_encode_args(profile: str = "standard", threads: Optional[int] = None) -> List[str]:
+    """Returns the ffmpeg output arguments of an encode profile.
+
+    Args:
+        profile (str, optional): Name of the encode profile. Defaults to "standard".
+        threads (Optional[int], optional): Number of ffmpeg threads. If None, uses
+            `budget_threads(profile)`. Defaults to None.
+
+    Returns:
+        List[str]: The codec, pixel format, quality and thread arguments.
+    """
+    settings = _get_profile(profile)
+    if threads is None:
+        threads = budget_threads(profile)
+    return [
+        "-c:v", settings["codec"],
+        "-pix_fmt", settings["pix_fmt"],
+        *settings["args"],
+        "-threads", str(threads),
+    ]
+
+
+def encode_video(
+    input_args: Sequence[str],
+    output_path: str,
+    num_frames: int,
+    profile: str = "standard",
+    threads: Optional[int] = None,
+    fps: int = 30,
+    filter_args: Sequence[str] = (),
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Encodes a video with ffmpeg and measures the encode throughput.
+
+    Args:
+        input_args (Sequence[str]): ffmpeg input arguments, e.g. ["-i", "in.mp4"].
+        output_path (str): Path of the video to write.
+        num_frames (int): Number of frames to encode.
+        profile (str, optional): Name of the encode profile. Defaults to "standard".
+        threads (Optional[int], optional): Number of ffmpeg threads. If None, uses
+            `budget_threads(profile)`. Defaults to None.
+        fps (int, optional): Frame rate of the output video. Defaults to 30.
+        filter_args (Sequence[str], optional): Extra output arguments placed before
+            the encode arguments, e.g. ["-vf", "..."]. Defaults to ().
+        timeout (Optional[float], optional): Timeout of the ffmpeg call in seconds.
+            Defaults to None.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails.
+        subprocess.TimeoutExpired: If ffmpeg does not finish within the timeout.
+
+    Returns:
+        Dict[str, Any]: The profile, threads, seconds, encode fps and size in bytes of
+            the video.
+    """
+    if threads is None:
+        threads = budget_threads(profile)
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-y",
+        *input_args,
+        *filter_args,
+        "-frames:v", str(num_frames),
+        "-r", str(fps),
+        *get_encode_args(profile, threads),
+        output_path,
+    ]
+    start_time = time.perf_counter()
+    subprocess.run(
+        ffmpeg_cmd, check=True, capture_output=True, text=True, timeout=timeout
+    )
+    seconds = time.perf_counter() - start_time
+    return dict(
+        profile=profile,
+        threads=threads,
+        seconds=seconds,
+        fps=num_frames / seconds if seconds > 0 else float("inf"),
+        bytes=os.path.getsize(output_path),
+    )
+
+
+def encode_frames(
+    input_pattern: str,
+    output_path: str,
+    num_frames: int,
+    profile: str = "standard",
+    threads: Optional[int] = None,
+    fps: int = 30,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Encodes an image sequence such as `frames/%03d.png` starting at frame 0.
+
+    Args:
+        input_pattern (str): printf-style pattern of the frame paths.
+        output_path (str): Path of the video to write.
+        num_frames (int): Number of frames to encode.
+        profile (str, optional): Name of the encode profile. Defaults to "standard".
+        threads (Optional[int], optional): Number of ffmpeg threads. If None, uses
+            `budget_threads(profile)`. Defaults to None.
+        fps (int, optional): Frame rate of the video. Defaults to 30.
+        timeout (Optional[float], optional): Timeout of the ffmpeg call in seconds.
+            Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The encode statistics, see `encode_video`.
+    """
+    input_args = ["-framerate", str(fps), "-start_number", "0", "-i", input_pattern]
+    return encode_video(
+        input_args,
+        output_path,
+        num_frames,
+        profile=profile,
+        threads=threads,
+        fps=fps,
+        timeout=timeout,
+    )
@@ -20,6 +20,12 @@ from loguru import logger
 import sys
 sys.path.append('..')
 import objaverse.xl as oxl
+from objaverse.manifest import (
+    RENDERS_NAMESPACE,
+    Manifest,
+    get_manifest_path,
+    scan_renders,
+)
 from objaverse.utils import get_uid_from_str
 
 
@@ -72,6 +78,7 @@ def handle_found_object(
     render_timeout: int,
     successful_log_file: Optional[str] = "handle-found-object-successful.csv",
     failed_log_file: Optional[str] = "handle-found-object-failed.csv",
+    manifest: Optional[Manifest] = None,
 ) -> bool:
     """Called when an object is successfully found and downloaded.
 
@@ -97,6 +104,8 @@ def handle_found_object(
             complete.
         successful_log_file (str): Name of the log file to save successful renders to.
         failed_log_file (str): Name of the log file to save failed renders to.
+        manifest (Optional[Manifest]): If not None, the saved render zip is recorded
+            in it.
 
     Returns: True if the object was rendered successfully, False otherwise.
     """
@@ -134,6 +143,8 @@ def handle_found_object(
             # rendering. Generally, I'd only recommend using MacOS for debugging and
             # small rendering jobs, since CYCLES is much slower than BLENDER_EEVEE.
             args += " --engine CYCLES"
+            if not using_gpu:
+                args += " --device CPU"
         else:
             raise NotImplementedError(f"Platform {platform.system()} is not supported.")
 
@@ -159,6 +170,16 @@ def handle_found_object(
             stderr=subprocess.DEVNULL,
         )
         
+        # check if the object was rejected by the low-resolution preflight render
+        rejected_path = os.path.join(target_directory, "rejected.json")
+        if os.path.exists(rejected_path):
+            with open(rejected_path, "r", encoding="utf-8") as f:
+                reason = json.load(f)["reason"]
+            logger.warning(f"Skipped object {file_identifier}: {reason}")
+            if failed_log_file is not None:
+                log_processed_object(failed_log_file, file_identifier, sha256, reason)
+            return False
+
         # check that the renders were saved successfully
         png_files = glob.glob(os.path.join(target_directory, "*.png"))
         metadata_files = glob.glob(os.path.join(target_directory, "*.json"))
@@ -206,6 +227,12 @@ def handle_found_object(
             os.path.join(f"{target_directory}.zip"),
             os.path.join(path, "renders", f"{save_uid}.zip"),
         )
+        if manifest is not None:
+            manifest.add(
+                RENDERS_NAMESPACE,
+                save_uid,
+                os.path.join(path, "renders", f"{save_uid}.zip"),
+            )
 
         # log that this object was rendered successfully
         if successful_log_file is not None:
@@ -254,6 +281,7 @@ def handle_modified_object(
     only_northern_hemisphere: bool,
     gpu_devices: Union[int, List[int]],
     render_timeout: int,
+    manifest: Optional[Manifest] = None,
 ) -> None:
     """Called when a modified object is found and downloaded.
 
@@ -280,6 +308,8 @@ def handle_modified_object(
             If 0, the CPU will be used for rendering.
         render_timeout (int): Number of seconds to wait for the rendering job to
             complete.
+        manifest (Optional[Manifest]): If not None, the saved render zip is recorded
+            in it.
 
     Returns:
         None
@@ -296,6 +326,7 @@ def handle_modified_object(
         render_timeout=render_timeout,
         successful_log_file=None,
         failed_log_file=None,
+        manifest=manifest,
     )
 
     if success:
@@ -410,10 +441,12 @@ def render_objects(
     download_dir: Optional[str] = "~/.objaverse",
     num_renders: int = 12,
     processes: Optional[int] = None,
-    save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "files"]] = "files",
+    save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]] = "files",
     only_northern_hemisphere: bool = False,
     render_timeout: int = 300,
     gpu_devices: Optional[Union[int, List[int]]] = None,
+    use_manifest: bool = False,
+    manifest_path: Optional[str] = None,
 ) -> None:
     """Renders objects in the Objaverse-XL dataset with Blender
 
@@ -426,7 +459,7 @@ def render_objects(
         processes (Optional[int], optional): Number of processes to use for downloading
             the objects. If None, defaults to multiprocessing.cpu_count() * 3. Defaults
             to None.
-        save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "files"]], optional):
+        save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]], optional):
             If not None, the GitHub repo will be deleted after rendering each object
             from it.
         only_northern_hemisphere (bool, optional): Only render the northern hemisphere
@@ -440,6 +473,14 @@ def render_objects(
             gpu_devices - 1. If a list, the GPU device will be randomly selected from
             the list. If 0, the CPU will be used for rendering. If None, all available
             GPUs will be used. Defaults to None.
+        use_manifest (bool, optional): Whether to look up the rendered and downloaded
+            objects in SQLite manifests instead of globbing render_dir and
+            download_dir, and to record each saved render and download in them. Run
+            `python -m objaverse.manifest` to rebuild them from storage. Defaults to
+            False.
+        manifest_path (Optional[str], optional): Local path of the manifest. If None,
+            uses `objaverse.manifest.get_manifest_path` of render_dir and of
+            download_dir. Defaults to None.
 
     Returns:
         None
@@ -475,15 +516,15 @@ def render_objects(
     objects = get_random_textured_objects_from_objaverse(n=10)
     logger.info(f"随机选择了 {len(objects)} 个带纹理的物体进行渲染")
 
-    # get the already rendered objects
-    fs, path = fsspec.core.url_to_fs(render_dir)
-    try:
-        zip_files = fs.glob(os.path.join(path, "renders", "*.zip"), refresh=True)
-    except TypeError:
-        # s3fs may not support refresh depending on the version
-        zip_files = fs.glob(os.path.join(path, "renders", "*.zip"))
-
-    saved_ids = set(zip_file.split("/")[-1].split(".")[0] for zip_file in zip_files)
+    # get the already rendered objects, from the manifest if enabled
+    render_manifest = None
+    if use_manifest:
+        render_manifest = Manifest(manifest_path or get_manifest_path(render_dir))
+        saved_ids = render_manifest.get_keys(
+            RENDERS_NAMESPACE, partial(scan_renders, render_dir)
+        )
+    else:
+        saved_ids = set(scan_renders(render_dir))
     logger.info(f"Found {len(saved_ids)} objects already rendered.")
 
     # filter out the already rendered objects
@@ -507,6 +548,7 @@ def render_objects(
             only_northern_hemisphere=only_northern_hemisphere,
             gpu_devices=parsed_gpu_devices,
             render_timeout=render_timeout,
+            manifest=render_manifest,
         ),
         handle_new_object=handle_new_object,
         handle_modified_object=partial(
@@ -516,8 +558,11 @@ def render_objects(
             only_northern_hemisphere=only_northern_hemisphere,
             gpu_devices=parsed_gpu_devices,
             render_timeout=render_timeout,
+            manifest=render_manifest,
         ),
         handle_missing_object=handle_missing_object,
+        use_manifest=use_manifest,
+        manifest_path=manifest_path,
     )
 
 
@@ -24,6 +24,9 @@ sys.path.append('..')
 import objaverse.xl as oxl
 from objaverse.utils import get_uid_from_str
 
+from encoding import budget_threads, encode_frames
+from revideo import create_static_video_from_image
+
 
 def log_processed_object(csv_filename: str, *args) -> None:
     args = ",".join([str(arg) for arg in args])
@@ -52,6 +55,9 @@ def handle_found_object(
     render_timeout: int,
     successful_log_file: Optional[str] = "handle-found-object-successful.csv",
     failed_log_file: Optional[str] = "handle-found-object-failed.csv",
+    static_cam00: bool = False,
+    encode_profile: str = "standard",
+    encode_slots: int = 1,
 ) -> bool:
     save_uid = get_uid_from_str(file_identifier)
     args = f"--object_path '{local_path}' --num_renders {num_renders}"
@@ -81,6 +87,8 @@ def handle_found_object(
             platform.system() == "Linux" and not using_gpu
         ):
             args += " --engine CYCLES"
+            if not using_gpu:
+                args += " --device CPU"
         else:
             raise NotImplementedError(f"Platform {platform.system()} is not supported.")
 
@@ -103,6 +111,16 @@ def handle_found_object(
             stderr=subprocess.DEVNULL,
         )
 
+        # check if the object was rejected by the low-resolution preflight render
+        rejected_path = os.path.join(target_directory, "rejected.json")
+        if os.path.exists(rejected_path):
+            with open(rejected_path, "r", encoding="utf-8") as f:
+                reason = json.load(f)["reason"]
+            logger.warning(f"Skipped object {file_identifier}: {reason}")
+            if failed_log_file is not None:
+                log_processed_object(failed_log_file, file_identifier, sha256, reason)
+            return False
+
         frames_dir = os.path.join(target_directory, "frames")
         videos_dir = os.path.join(target_directory, "videos")
         input_pattern = os.path.join(frames_dir, "%03d.png")
@@ -128,25 +146,32 @@ def handle_found_object(
 
         render_count = num_renders
         video_path = os.path.join(videos_dir, f"{cam_name}.mp4")
-        # 使用ffmpeg将图片序列转换为视频
-        # -framerate 30: 设置帧率为30fps
-        # -i input_pattern: 输入图片序列
-        # -c:v libx264: 使用H.264编码
-        # -pix_fmt yuv420p: 设置像素格式以确保兼容性
-        # -crf 23: 设置质量（0-51，数值越小质量越高）
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-y",  # 覆盖输出文件
-            "-framerate", "30",  # 帧率
-            "-start_number", "0",  # 起始帧编号
-            "-i", input_pattern,  # 输入图片模式
-            "-frames:v", str(render_count),  # 限制帧数
-            "-c:v", "libx264",  # 视频编码器
-            "-pix_fmt", "yuv420p",  # 像素格式
-            "-crf", "23",  # 质量参数
-            video_path
-        ]
-        subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True)
+        # 使用ffmpeg将图片序列转换为视频, 线程数按同时运行的编码数分配
+        encode_threads = budget_threads(encode_profile, encode_slots)
+        encode_stats = encode_frames(
+            input_pattern,
+            video_path,
+            render_count,
+            profile=encode_profile,
+            threads=encode_threads,
+        )
+        logger.info(
+            f"Encoded {video_path} with the {encode_profile} profile and "
+            f"{encode_threads} threads: {encode_stats['fps']:.1f} fps, "
+            f"{encode_stats['bytes'] / 1e6:.1f} MB"
+        )
+
+        # 所有轨迹的第000帧都是同一个初始位姿, 直接用它生成静态相机cam00,
+        # 不需要之后再从cam01.mp4解码
+        cam00_path = os.path.join(videos_dir, "cam00.mp4")
+        if static_cam00 and not os.path.exists(cam00_path):
+            create_static_video_from_image(
+                os.path.join(frames_dir, "000.png"),
+                cam00_path,
+                num_frames=render_count,
+                threads=encode_threads,
+                profile=encode_profile,
+            )
 
         # cameras_dir = os.path.join(target_directory, "cameras")
         # png_files = glob.glob(os.path.join(frames_dir, "*.png"))
@@ -365,7 +390,7 @@ def render_objects(
     download_dir: Optional[str] = "~/.objaverse",
     num_renders: int = 81,
     processes: Optional[int] = None,
-    save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "files"]] = "files",
+    save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]] = "files",
     only_northern_hemisphere: bool = False,
     render_timeout: int = 9000,
     gpu_devices: Optional[Union[int, List[int]]] = None,
@@ -373,6 +398,9 @@ def render_objects(
     local_objects_file: Optional[str] = "/data1/DATA/graspxl-objaverse/objects_with_texture.txt",
     object_paths_gz: Optional[str] = "/data1/DATA/graspxl-objaverse/object-paths.json.gz",
     local_n: int = 1,
+    static_cam00: bool = False,
+    encode_profile: str = "standard",
+    encode_slots: int = 1,
 ) -> None:
     if platform.system() not in ["Linux", "Darwin"]:
         raise NotImplementedError(
@@ -427,6 +455,9 @@ def render_objects(
                     only_northern_hemisphere=only_northern_hemisphere,
                     gpu_devices=parsed_gpu_devices,
                     render_timeout=render_timeout,
+                    static_cam00=static_cam00,
+                    encode_profile=encode_profile,
+                    encode_slots=encode_slots,
                 )
                 if not success:
                     logger.error(f"Rendering failed for {file_identifier}")
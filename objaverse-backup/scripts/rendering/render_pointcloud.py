@@ -1,130 +1,474 @@
-import open3d as o3d
-import numpy as np
-import imageio.v2 as imageio
+"""渲染点云绕圈视频，用于批量预览重建结果
+
+示例:
+    python render_pointcloud.py "/data1/xzf_data/test_data/*.ply" --out_dir previews
+    python render_pointcloud.py a.ply,b.ply --processes 4 --save_frames
+
+每个 PLY 的输出写入 {out_dir}/{ply 文件名}/orbit.mp4（以及可选的 frames/ 目录）。
+同一进程内的所有文件共用一个 OffscreenRenderer，只替换其中的几何体。
+"""
+
+import glob
+import hashlib
+import multiprocessing
 import os
-import datetime
-from open3d.visualization import rendering
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-# ====== 配置区域 ======
-PLY_PATH   = "/data1/xzf_data/test_data/litevggt_counter.ply"   # TODO: 换成你的 ply 路径
+import fire
+import imageio.v2 as imageio
+import numpy as np
+import open3d as o3d
+from open3d.visualization import rendering
 
+# ====== 默认配置 ======
 WIDTH, HEIGHT = 1280, 720
 FPS      = 30
 DURATION = 8
-N_FRAMES = FPS * DURATION
 
 # 控制“看起来多大”的尺度因子：越小越近，物体越大
 RADIUS_SCALE = 0.8
+
+# 开启降采样时（--points_per_pixel）的建议值：每个像素最多分配的点数，
+# 超出 WIDTH * HEIGHT * POINTS_PER_PIXEL 的点云先做体素降采样
+POINTS_PER_PIXEL = 0.5
 # =====================
 
-# === 根据 PLY 文件名 + 时间戳，动态生成不冲突的输出路径 ===
-base_name = os.path.splitext(os.path.basename(PLY_PATH))[0]
-run_tag   = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+# 每个工作进程各自持有的渲染器，由 _init_worker 创建
+_WORKER_RENDERER: Optional[rendering.OffscreenRenderer] = None
+
 
-OUT_DIR    = f"frames_{base_name}_{run_tag}"
-VIDEO_PATH = f"{base_name}_orbit_{run_tag}.mp4"
+def get_point_budget(
+    width: int = WIDTH, height: int = HEIGHT, points_per_pixel: float = POINTS_PER_PIXEL
+) -> int:
+    """根据屏幕分辨率计算渲染需要的点数上限
 
-os.makedirs(OUT_DIR, exist_ok=True)
-print("Frames will be saved to:", OUT_DIR)
-print("Video will be saved to :", VIDEO_PATH)
+    Args:
+        width: 图像宽度
+        height: 图像高度
+        points_per_pixel: 每个像素最多分配的点数
 
-# 1. 读取点云
-pcd = o3d.io.read_point_cloud(PLY_PATH)
-print(pcd)
-print("Has colors:", pcd.has_colors())
+    Returns:
+        int: 点数上限
+    """
+    return int(width * height * points_per_pixel)
 
-if not pcd.has_colors():
-    # 在白背景上稍微深一点
-    pcd.paint_uniform_color([0.2, 0.5, 0.9])
 
-# ================== 法向估计（优化版） ==================
-num_points = np.asarray(pcd.points).shape[0]
-print(f"Point count: {num_points}")
+def downsample_to_budget(
+    pcd: o3d.geometry.PointCloud, point_budget: int, max_iterations: int = 6
+) -> o3d.geometry.PointCloud:
+    """体素降采样，使点数不超过 point_budget
 
-# 千万级点云不要做全局一致化，否则基本跑不完
-print("Estimating normals (fast mode for large point cloud)...")
+    点云大多分布在表面上，点数近似与体素边长的平方成反比，据此迭代调整体素大小。
 
-if num_points > 2_000_000:
-    # 大点云：只用 KNN 做局部法向估计，不做 orient_normals_consistent_tangent_plane
-    # KNN 不依赖半径，对分布更鲁棒；邻居数量控制在 16 左右即可产生平滑法向
-    pcd.estimate_normals(
-        search_param=o3d.geometry.KDTreeSearchParamKNN(knn=16)
+    Args:
+        pcd: 点云
+        point_budget: 点数上限
+        max_iterations: 最多尝试的体素大小次数
+
+    Returns:
+        o3d.geometry.PointCloud: 降采样后的点云（点数不超过上限时返回原点云）
+    """
+    num_points = len(pcd.points)
+    if num_points <= point_budget:
+        return pcd
+
+    diag = np.linalg.norm(pcd.get_axis_aligned_bounding_box().get_extent())
+    # 初始猜测：点均匀分布在包围盒对角线尺度的表面上
+    voxel_size = diag / np.sqrt(point_budget)
+    down = pcd
+    for _ in range(max_iterations):
+        down = pcd.voxel_down_sample(voxel_size)
+        if len(down.points) <= point_budget:
+            break
+        voxel_size *= np.sqrt(len(down.points) / point_budget) * 1.05
+    print(
+        f"Voxel downsampled {num_points} -> {len(down.points)} points "
+        f"(voxel size {voxel_size:.4g}, budget {point_budget})"
     )
-else:
-    # 小点云：可以用稍微精细一点的设置（可选）
-    bbox_for_normals = pcd.get_axis_aligned_bounding_box()
-    extent_normals   = bbox_for_normals.get_extent()
-    diag             = np.linalg.norm(extent_normals)
-
-    pcd.estimate_normals(
-        search_param=o3d.geometry.KDTreeSearchParamHybrid(
-            radius=diag * 0.05,
-            max_nn=64
+    return down
+
+
+def estimate_normals(
+    pcd: o3d.geometry.PointCloud, num_points: Optional[int] = None
+) -> None:
+    """估计并归一化点云法向（原地修改）
+
+    Args:
+        pcd: 点云
+        num_points: 原始点云（降采样前）的点数，决定是否做全局一致化。None 表示使用
+            pcd 的点数
+    """
+    # ================== 法向估计（优化版） ==================
+    if num_points is None:
+        num_points = np.asarray(pcd.points).shape[0]
+
+    # 千万级点云不要做全局一致化，否则基本跑不完
+    print("Estimating normals (fast mode for large point cloud)...")
+
+    if num_points > 2_000_000:
+        # 大点云：只用 KNN 做局部法向估计，不做 orient_normals_consistent_tangent_plane
+        # KNN 不依赖半径，对分布更鲁棒；邻居数量控制在 16 左右即可产生平滑法向
+        pcd.estimate_normals(
+            search_param=o3d.geometry.KDTreeSearchParamKNN(knn=16)
         )
-    )
-    # 只有在点数不太大时才做全局一致化
-    pcd.orient_normals_consistent_tangent_plane(50)
+    else:
+        # 小点云：可以用稍微精细一点的设置（可选）
+        bbox_for_normals = pcd.get_axis_aligned_bounding_box()
+        extent_normals   = bbox_for_normals.get_extent()
+        diag             = np.linalg.norm(extent_normals)
+
+        pcd.estimate_normals(
+            search_param=o3d.geometry.KDTreeSearchParamHybrid(
+                radius=diag * 0.05,
+                max_nn=64
+            )
+        )
+        # 只有在点数不太大时才做全局一致化
+        pcd.orient_normals_consistent_tangent_plane(50)
+
+    # 法向归一化一下（虽然大部分情况下内部会做，这里显式一下）
+    pcd.normalize_normals()
+    # =====================================================
+
+
+def _hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """计算文件的 sha256，用作法向缓存的键"""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def load_point_cloud(
+    ply_path: str,
+    point_budget: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+) -> o3d.geometry.PointCloud:
+    """读取点云，并在需要时降采样、上色、估计法向
+
+    Args:
+        ply_path: PLY 文件路径
+        point_budget: 点数上限，超出时先做体素降采样，法向只在降采样后的点云上估计。
+            None 表示不降采样
+        cache_dir: 如果不为 None，将降采样后的点、颜色和法向缓存到该目录，
+            以文件内容的 sha256 和 point_budget 为键，再次渲染同一文件时直接读取
+
+    Returns:
+        o3d.geometry.PointCloud: 带颜色和法向的点云
+    """
+    cache_path = None
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(
+            cache_dir, f"{_hash_file(ply_path)}_{point_budget or 'full'}.npz"
+        )
+        if os.path.exists(cache_path):
+            print("Loading cached normals from", cache_path)
+            with np.load(cache_path) as cached:
+                pcd = o3d.geometry.PointCloud(
+                    o3d.utility.Vector3dVector(cached["points"])
+                )
+                pcd.colors = o3d.utility.Vector3dVector(cached["colors"])
+                pcd.normals = o3d.utility.Vector3dVector(cached["normals"])
+            return pcd
+
+    pcd = o3d.io.read_point_cloud(ply_path)
+    print(pcd)
+    print("Has colors:", pcd.has_colors())
+    num_points = len(pcd.points)
+    print(f"Point count: {num_points}")
+
+    if point_budget is not None:
+        pcd = downsample_to_budget(pcd, point_budget)
+
+    if not pcd.has_colors():
+        # 在白背景上稍微深一点
+        pcd.paint_uniform_color([0.2, 0.5, 0.9])
 
-# 法向归一化一下（虽然大部分情况下内部会做，这里显式一下）
-pcd.normalize_normals()
-# =====================================================
+    # 按原始点数决定是否做全局一致化，降采样后的大点云同样跳过
+    estimate_normals(pcd, num_points)
 
-# 2. 创建离屏渲染器（不会创建窗口）
-renderer = rendering.OffscreenRenderer(WIDTH, HEIGHT)
+    if cache_path is not None:
+        # 先写临时文件再重命名，避免并行进程读到写了一半的缓存
+        temp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            temp_path,
+            points=np.asarray(pcd.points, dtype=np.float32),
+            colors=np.asarray(pcd.colors, dtype=np.float32),
+            normals=np.asarray(pcd.normals, dtype=np.float32),
+        )
+        os.replace(temp_path, cache_path)
+    return pcd
+
+
+def create_renderer(
+    width: int = WIDTH, height: int = HEIGHT
+) -> rendering.OffscreenRenderer:
+    """创建离屏渲染器（不会创建窗口）
+
+    Args:
+        width: 图像宽度
+        height: 图像高度
+
+    Returns:
+        rendering.OffscreenRenderer: 白色背景的渲染器
+    """
+    renderer = rendering.OffscreenRenderer(width, height)
+    # 白色背景
+    renderer.scene.set_background([1.0, 1.0, 1.0, 1.0])  # RGBA
+    return renderer
+
+
+def render_orbit(
+    renderer: rendering.OffscreenRenderer,
+    pcd: o3d.geometry.PointCloud,
+    video_path: str,
+    fps: int = FPS,
+    duration: float = DURATION,
+    radius_scale: float = RADIUS_SCALE,
+    frames_dir: Optional[str] = None,
+) -> str:
+    """渲染相机绕点云中心一周的视频
+
+    渲染器中已有的几何体会被替换，因此同一个渲染器可以依次渲染多个点云。
+    每帧渲染后直接送入编码器，内存占用与帧数无关。
+
+    Args:
+        renderer: 离屏渲染器
+        pcd: 点云
+        video_path: 输出视频路径
+        fps: 视频帧率
+        duration: 视频时长（秒）
+        radius_scale: 相机距离相对点云包围盒对角线的比例
+        frames_dir: 如果不为 None，额外将每一帧保存为 PNG 到该目录
+
+    Returns:
+        str: 输出视频路径
+    """
+    n_frames = int(fps * duration)
+
+    # 点云材质
+    mat = rendering.MaterialRecord()
+    # 使用带光照的 shader + 法向信息，模拟“单侧效果”
+    mat.shader = "defaultLit"
+    mat.point_size = 2.0
+
+    renderer.scene.clear_geometry()
+    renderer.scene.add_geometry("pcd", pcd, mat)
+
+    # 相机绕点云中心一周
+    bbox   = pcd.get_axis_aligned_bounding_box()
+    center = bbox.get_center()
+    extent = bbox.get_extent()
+
+    # 相机距离，根据点云尺度 + 缩放因子
+    radius = np.linalg.norm(extent) * radius_scale
+
+    # 上方向设为 -Y，保证画面不再上下颠倒
+    up = np.array([0.0, -1.0, 0.0])
+
+    if frames_dir is not None:
+        os.makedirs(frames_dir, exist_ok=True)
+    print("Rendering frames and writing video to", video_path)
+    with imageio.get_writer(
+        video_path,
+        fps=fps,
+        codec="libx264",
+        quality=8,
+    ) as writer:
+        for i in range(n_frames):
+            theta = 2.0 * np.pi * i / n_frames
+
+            # 水平绕圈 + 稍微抬高
+            eye = center + radius * np.array([
+                np.cos(theta),
+                0.2,
+                np.sin(theta)
+            ])
 
-# 白色背景
-renderer.scene.set_background([1.0, 1.0, 1.0, 1.0])  # RGBA
+            renderer.scene.camera.look_at(center, eye, up)
 
-# 点云材质
-mat = rendering.MaterialRecord()
-# 使用带光照的 shader + 法向信息，模拟“单侧效果”
-mat.shader = "defaultLit"
-mat.point_size = 2.0
+            img = np.asarray(renderer.render_to_image())
+            writer.append_data(img)
+            if frames_dir is not None:
+                frame_path = os.path.join(frames_dir, f"frame_{i:04d}.png")
+                imageio.imwrite(frame_path, img)
 
-renderer.scene.add_geometry("pcd", pcd, mat)
+            if i % 30 == 0:
+                print(f"  frame {i}/{n_frames}")
+    return video_path
 
-# 3. 相机绕点云中心一周
-bbox   = pcd.get_axis_aligned_bounding_box()
-center = bbox.get_center()
-extent = bbox.get_extent()
 
-# 相机距离，根据点云尺度 + 缩放因子
-radius = np.linalg.norm(extent) * RADIUS_SCALE
+def expand_ply_paths(ply_paths: Union[str, Sequence[str]]) -> List[str]:
+    """展开 PLY 路径列表中的 glob 模式
 
-# 上方向设为 -Y，保证画面不再上下颠倒
-up = np.array([0.0, -1.0, 0.0])
+    Args:
+        ply_paths: 单个路径或 glob 模式，或它们的列表
 
-images = []
-print("Rendering frames...")
+    Returns:
+        List[str]: 去重并排序后的 PLY 文件路径
+    """
+    if isinstance(ply_paths, str):
+        ply_paths = [ply_paths]
+    expanded = set()
+    for pattern in ply_paths:
+        matches = glob.glob(os.path.expanduser(pattern))
+        if not matches:
+            print(f"Warning: no PLY file matches {pattern}")
+        expanded.update(matches)
+    return sorted(expanded)
 
-for i in range(N_FRAMES):
-    theta = 2.0 * np.pi * i / N_FRAMES
 
-    # 水平绕圈 + 稍微抬高
-    eye = center + radius * np.array([
-        np.cos(theta),
-        0.2,
-        np.sin(theta)
-    ])
+def get_output_names(files: Sequence[str]) -> Dict[str, str]:
+    """为每个 PLY 文件生成输出子目录名
 
-    renderer.scene.camera.look_at(center, eye, up)
+    子目录名是文件相对所有输入文件公共目录的路径（去掉扩展名），因此不同目录下的同名
+    PLY 不会互相覆盖；所有输入在同一目录时与文件名相同。
+
+    Args:
+        files: PLY 文件路径
+
+    Returns:
+        Dict[str, str]: 文件路径到输出子目录名的映射
+    """
+    if not files:
+        return {}
+    abs_files = {path: os.path.abspath(path) for path in files}
+    root = os.path.commonpath([os.path.dirname(p) for p in abs_files.values()])
+    return {
+        path: os.path.splitext(os.path.relpath(abs_path, root))[0]
+        for path, abs_path in abs_files.items()
+    }
+
+
+def _render_file(
+    renderer: rendering.OffscreenRenderer,
+    ply_path: str,
+    out_dir: str,
+    output_name: str,
+    fps: int,
+    duration: float,
+    radius_scale: float,
+    save_frames: bool,
+    point_budget: Optional[int],
+    normal_cache_dir: Optional[str],
+) -> str:
+    """渲染单个 PLY 文件到 {out_dir}/{output_name}/"""
+    target_dir = os.path.join(out_dir, output_name)
+    os.makedirs(target_dir, exist_ok=True)
+    pcd = load_point_cloud(ply_path, point_budget, normal_cache_dir)
+    return render_orbit(
+        renderer,
+        pcd,
+        os.path.join(target_dir, "orbit.mp4"),
+        fps=fps,
+        duration=duration,
+        radius_scale=radius_scale,
+        frames_dir=os.path.join(target_dir, "frames") if save_frames else None,
+    )
+
+
+def _init_worker(width: int, height: int) -> None:
+    """进程池初始化：每个工作进程只创建一次渲染器"""
+    global _WORKER_RENDERER
+    _WORKER_RENDERER = create_renderer(width, height)
+
+
+def _try_render_file(
+    renderer: rendering.OffscreenRenderer, kwargs: dict
+) -> Tuple[str, bool, str]:
+    """渲染单个文件并捕获异常，单个文件失败不影响其余文件
+
+    Returns:
+        Tuple[str, bool, str]: PLY 路径，是否成功，以及输出视频路径或错误信息
+    """
+    try:
+        return kwargs["ply_path"], True, _render_file(renderer, **kwargs)
+    except Exception as e:
+        print(f"Failed to render {kwargs['ply_path']}: {e}")
+        return kwargs["ply_path"], False, str(e)
+
+
+def _render_file_in_worker(kwargs: dict) -> Tuple[str, bool, str]:
+    return _try_render_file(_WORKER_RENDERER, kwargs)
+
+
+def render_point_clouds(
+    ply_paths: Union[str, Sequence[str]],
+    out_dir: str = "pointcloud_renders",
+    width: int = WIDTH,
+    height: int = HEIGHT,
+    fps: int = FPS,
+    duration: float = DURATION,
+    radius_scale: float = RADIUS_SCALE,
+    save_frames: bool = False,
+    processes: int = 1,
+    points_per_pixel: Optional[float] = None,
+    normal_cache_dir: Optional[str] = None,
+) -> List[str]:
+    """批量渲染点云绕圈视频
+
+    Args:
+        ply_paths: PLY 文件路径或 glob 模式，或它们的列表
+        out_dir: 输出目录，每个 PLY 写入 {out_dir}/{子目录}/orbit.mp4，子目录见
+            get_output_names
+        width: 图像宽度
+        height: 图像高度
+        fps: 视频帧率
+        duration: 视频时长（秒）
+        radius_scale: 相机距离相对点云包围盒对角线的比例
+        save_frames: 是否额外保存每一帧 PNG 到 {out_dir}/{子目录}/frames
+        processes: 进程数，每个进程持有一个渲染器
+        points_per_pixel: 每个像素最多分配的点数，点数超过 width * height *
+            points_per_pixel 的点云先做体素降采样（建议值 POINTS_PER_PIXEL）。默认 None
+            表示不降采样
+        normal_cache_dir: 法向缓存目录，None 表示不缓存
+
+    Returns:
+        List[str]: 成功渲染的输出视频路径。失败的文件会被跳过并在最后汇总打印
+    """
+    files = expand_ply_paths(ply_paths)
+    output_names = get_output_names(files)
+    point_budget = None
+    if points_per_pixel is not None:
+        point_budget = get_point_budget(width, height, points_per_pixel)
+    print(f"Rendering {len(files)} point clouds to {out_dir}")
+    tasks = [
+        dict(
+            ply_path=ply_path,
+            out_dir=out_dir,
+            output_name=output_names[ply_path],
+            fps=fps,
+            duration=duration,
+            radius_scale=radius_scale,
+            save_frames=save_frames,
+            point_budget=point_budget,
+            normal_cache_dir=normal_cache_dir,
+        )
+        for ply_path in files
+    ]
 
-    img_o3d = renderer.render_to_image()
-    img = np.asarray(img_o3d)
+    if processes <= 1:
+        renderer = create_renderer(width, height)
+        results = [_try_render_file(renderer, task) for task in tasks]
+    else:
+        # 使用 spawn，避免在 fork 出的进程中继承渲染器的图形上下文
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            processes=processes, initializer=_init_worker, initargs=(width, height)
+        ) as pool:
+            results = pool.map(_render_file_in_worker, tasks, chunksize=1)
 
-    frame_path = os.path.join(OUT_DIR, f"frame_{i:04d}.png")
-    imageio.imwrite(frame_path, img)
-    images.append(img)
+    videos = [output for _, success, output in results if success]
+    failures = [(path, error) for path, success, error in results if not success]
+    print(f"Rendered {len(videos)}/{len(results)} point clouds")
+    if failures:
+        print(f"Failed to render {len(failures)} point clouds:")
+        for path, error in failures:
+            print(f"  {path}: {error}")
+    return videos
 
-    if i % 30 == 0:
-        print(f"  frame {i}/{N_FRAMES}")
 
-print("Writing video to", VIDEO_PATH)
-imageio.mimsave(
-    VIDEO_PATH,
-    images,
-    fps=FPS,
-    codec="libx264",
-    quality=8,
-)
-print("Done!")
+if __name__ == "__main__":
+    fire.Fire(render_point_clouds)
@@ -1,154 +1,394 @@
+import json
 import os
 import subprocess
-import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from tqdm import tqdm
+
+from encoding import ENCODE_PROFILES, encode_video
+
+
+def _run_static_video_ffmpeg(
+    input_args: List[str],
+    output_video_path: str,
+    num_frames: int,
+    fps: int,
+    filter_args: List[str],
+    profile: str,
+    threads: Optional[int],
+    timeout: Optional[float],
+) -> bool:
+    """运行ffmpeg命令并处理错误
+
+    先写入临时文件（例如cam00.tmp.mp4，保留扩展名以便ffmpeg识别格式），成功后再重命名为
+    输出路径，因此输出路径上不会留下未写完的视频。
+    """
+    root, ext = os.path.splitext(output_video_path)
+    tmp_video_path = f"{root}.tmp{ext}"
+    success = False
+    try:
+        stats = encode_video(
+            input_args,
+            tmp_video_path,
+            num_frames,
+            profile=profile,
+            threads=threads,
+            fps=fps,
+            filter_args=filter_args,
+            timeout=timeout,
+        )
+        os.replace(tmp_video_path, output_video_path)
+        success = True
+        print(
+            f"成功生成视频: {output_video_path} "
+            f"({stats['profile']}, {stats['fps']:.1f} fps)"
+        )
+        return True
+    except subprocess.TimeoutExpired:
+        print(f"ffmpeg超时 ({timeout}秒): {output_video_path}")
+        return False
+    except subprocess.CalledProcessError as e:
+        print(f"ffmpeg命令执行失败: {e.stderr}")
+        return False
+    except FileNotFoundError:
+        print("错误: 未找到ffmpeg，请确保已安装ffmpeg并添加到系统PATH中")
+        return False
+    except Exception as e:
+        print(f"生成视频时出错: {str(e)}")
+        return False
+    finally:
+        # 删除未写完的视频, 避免被当作已完成
+        if not success and os.path.exists(tmp_video_path):
+            os.remove(tmp_video_path)
+
 
 def create_static_video_from_first_frame(
     input_video_path: str,
     output_video_path: str,
     num_frames: int = 81,
-    fps: int = 30
+    fps: int = 30,
+    threads: Optional[int] = None,
+    timeout: Optional[float] = None,
+    profile: str = "standard",
 ) -> bool:
     """
-    从输入视频中提取第1帧，复制指定次数后生成新视频（使用ffmpeg）
-    
+    从输入视频中提取第1帧，重复指定次数后生成新视频（使用ffmpeg）
+
+    只解码一次第1帧，并在同一个ffmpeg进程中用loop滤镜重复它，不需要临时文件。
+
     Args:
         input_video_path: 输入视频路径
         output_video_path: 输出视频路径
         num_frames: 输出视频的帧数
         fps: 输出视频的帧率
-        
+        threads: ffmpeg使用的线程数，默认为encoding.budget_threads(profile)，即CPU核数
+            （不超过编码配置的max_threads）
+        timeout: ffmpeg的超时时间（秒），默认不限制
+        profile: 编码配置，见encoding.ENCODE_PROFILES
+
     Returns:
         bool: 是否成功生成视频
     """
-    try:
-        # 检查输入视频是否存在
-        if not os.path.exists(input_video_path):
-            print(f"错误: 输入视频不存在: {input_video_path}")
-            return False
-        
-        # 创建临时目录存储提取的第一帧
-        with tempfile.TemporaryDirectory() as temp_dir:
-            first_frame_path = os.path.join(temp_dir, "frame_000.png")
-            
-            # 使用ffmpeg提取第一帧
-            extract_cmd = [
-                "ffmpeg",
-                "-i", input_video_path,
-                "-vframes", "1",  # 只提取一帧
-                "-y",  # 覆盖输出文件
-                first_frame_path
-            ]
-            
-            print(f"正在提取第一帧...")
-            result = subprocess.run(
-                extract_cmd,
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            if not os.path.exists(first_frame_path):
-                print(f"错误: 无法提取第一帧")
-                return False
-            
-            print(f"成功提取第一帧: {first_frame_path}")
-            
-            # 复制第一帧为多个文件
-            print(f"正在复制帧，共 {num_frames} 帧...")
-            for i in range(1, num_frames):
-                frame_path = os.path.join(temp_dir, f"frame_{i:03d}.png")
-                # 使用硬链接或复制
-                try:
-                    os.link(first_frame_path, frame_path)
-                except:
-                    # 如果硬链接失败，使用复制
-                    import shutil
-                    shutil.copy2(first_frame_path, frame_path)
-                
-                if (i + 1) % 10 == 0:
-                    print(f"已复制 {i + 1}/{num_frames} 帧")
-            
-            # 使用ffmpeg将图片序列转换为视频
-            input_pattern = os.path.join(temp_dir, "frame_%03d.png")
-            
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-y",  # 覆盖输出文件
-                "-framerate", str(fps),  # 帧率
-                "-start_number", "0",  # 起始帧编号
-                "-i", input_pattern,  # 输入图片模式
-                "-frames:v", str(num_frames),  # 限制帧数
-                "-c:v", "libx264",  # 视频编码器
-                "-pix_fmt", "yuv420p",  # 像素格式
-                "-crf", "23",  # 质量参数
-                output_video_path
-            ]
-            
-            print(f"正在生成视频...")
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True)
-            
-            print(f"成功生成视频: {output_video_path}")
-            return True
-        
-    except subprocess.CalledProcessError as e:
-        print(f"ffmpeg命令执行失败: {e.stderr}")
+    # 检查输入视频是否存在
+    if not os.path.exists(input_video_path):
+        print(f"错误: 输入视频不存在: {input_video_path}")
         return False
-    except FileNotFoundError:
-        print("错误: 未找到ffmpeg，请确保已安装ffmpeg并添加到系统PATH中")
+
+    # trim只保留第1帧, loop将其重复num_frames-1次, setpts重新生成时间戳
+    filter_args = [
+        "-vf", (
+            f"trim=end_frame=1,loop=loop={num_frames - 1}:size=1:start=0,"
+            f"setpts=N/({fps}*TB)"
+        ),
+    ]
+    return _run_static_video_ffmpeg(
+        ["-i", input_video_path],
+        output_video_path,
+        num_frames,
+        fps,
+        filter_args,
+        profile,
+        threads,
+        timeout,
+    )
+
+
+def create_static_video_from_image(
+    image_path: str,
+    output_video_path: str,
+    num_frames: int = 81,
+    fps: int = 30,
+    threads: Optional[int] = None,
+    timeout: Optional[float] = None,
+    profile: str = "standard",
+) -> bool:
+    """
+    将单张图片（例如渲染时的第000帧）重复指定次数后生成静态视频
+
+    Args:
+        image_path: 输入图片路径
+        output_video_path: 输出视频路径
+        num_frames: 输出视频的帧数
+        fps: 输出视频的帧率
+        threads: ffmpeg使用的线程数，默认为encoding.budget_threads(profile)，即CPU核数
+            （不超过编码配置的max_threads）
+        timeout: ffmpeg的超时时间（秒），默认不限制
+        profile: 编码配置，见encoding.ENCODE_PROFILES
+
+    Returns:
+        bool: 是否成功生成视频
+    """
+    if not os.path.exists(image_path):
+        print(f"错误: 输入图片不存在: {image_path}")
         return False
-    except Exception as e:
-        print(f"生成视频时出错: {str(e)}")
+
+    # -loop 1: 循环输入图片
+    input_args = ["-loop", "1", "-framerate", str(fps), "-i", image_path]
+    return _run_static_video_ffmpeg(
+        input_args,
+        output_video_path,
+        num_frames,
+        fps,
+        [],
+        profile,
+        threads,
+        timeout,
+    )
+
+
+def _load_manifest(manifest_path: str) -> Set[str]:
+    """读取已处理目录的清单"""
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _load_target_folders(targets_file: str, base_dir: str) -> List[str]:
+    """读取目标目录列表（例如unzip.py生成的extracted_folders.txt）
+
+    相对路径按base_dir解析。
+    """
+    with open(targets_file, "r", encoding="utf-8") as f:
+        names = [line.strip() for line in f if line.strip()]
+    return [os.path.join(base_dir, name) for name in names]
+
+
+def _count_video_frames(video_path: str, timeout: Optional[float] = None) -> int:
+    """用ffprobe统计视频的帧数，无法读取时返回0"""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-count_packets",
+        "-show_entries",
+        "stream=nb_read_packets",
+        "-of",
+        "csv=p=0",
+        video_path,
+    ]
+    try:
+        result = subprocess.run(
+            cmd, check=True, capture_output=True, text=True, timeout=timeout
+        )
+        return int(result.stdout.strip().split(",")[0])
+    except (
+        subprocess.CalledProcessError,
+        subprocess.TimeoutExpired,
+        FileNotFoundError,
+        ValueError,
+    ):
+        return 0
+
+
+def _is_complete_video(
+    video_path: str, num_frames: int, timeout: Optional[float] = None
+) -> bool:
+    """检查已有的视频是否完整：文件非空且帧数等于num_frames"""
+    if not os.path.isfile(video_path) or os.path.getsize(video_path) == 0:
         return False
+    return _count_video_frames(video_path, timeout=timeout) == num_frames
 
 
-def process_directory(base_dir: str = "/home/xu_zifan/.objaverse/renders/renders"):
+def _process_render_folder(
+    render_folder: str,
+    num_frames: int = 81,
+    fps: int = 30,
+    threads: Optional[int] = None,
+    timeout: Optional[float] = None,
+    profile: str = "standard",
+) -> Tuple[str, str, float]:
     """
-    处理指定目录下的所有子目录中的cam01.mp4视频
-    
+    为单个渲染目录生成cam00.mp4
+
+    Args:
+        render_folder: 渲染目录路径
+        num_frames: 输出视频的帧数
+        fps: 输出视频的帧率
+        threads: ffmpeg使用的线程数，默认同create_static_video_from_first_frame
+        timeout: ffmpeg的超时时间（秒）
+        profile: 编码配置，见encoding.ENCODE_PROFILES
+
+    Returns:
+        Tuple[str, str, float]: 目录名，状态（"processed", "exists", "missing" 或
+            "failed"）和耗时（秒）。只有通过_is_complete_video检查的cam00.mp4才算
+            "exists"，不完整的视频会被删除并重新生成。
+    """
+    start_time = time.perf_counter()
+    video_dir = os.path.join(render_folder, "videos")
+    cam01_path = os.path.join(video_dir, "cam01.mp4")
+    cam00_path = os.path.join(video_dir, "cam00.mp4")
+    folder_name = os.path.basename(os.path.normpath(render_folder))
+
+    if os.path.exists(cam00_path):
+        if _is_complete_video(cam00_path, num_frames, timeout=timeout):
+            return folder_name, "exists", 0.0
+        print(f"已有视频不完整，重新生成: {cam00_path}")
+        os.remove(cam00_path)
+    if not os.path.exists(cam01_path):
+        return folder_name, "missing", 0.0
+
+    success = create_static_video_from_first_frame(
+        cam01_path,
+        cam00_path,
+        num_frames=num_frames,
+        fps=fps,
+        threads=threads,
+        timeout=timeout,
+        profile=profile,
+    )
+    status = "processed" if success else "failed"
+    return folder_name, status, time.perf_counter() - start_time
+
+
+def process_directory(
+    base_dir: str = "/home/xu_zifan/.objaverse/renders/renders",
+    processes: Optional[int] = None,
+    manifest_path: Optional[str] = None,
+    targets_file: Optional[str] = None,
+    ffmpeg_threads: int = 2,
+    timeout: Optional[float] = 300,
+    summary_path: Optional[str] = None,
+    encode_profile: str = "standard",
+    num_frames: int = 81,
+) -> Dict[str, object]:
+    """
+    并行处理指定目录下的所有子目录中的cam01.mp4视频
+
+    每个ffmpeg进程使用ffmpeg_threads个线程，默认进程数为CPU核数除以该线程数，
+    避免进程之间争抢CPU。已经生成cam00.mp4的目录记录在清单文件中，再次运行时直接跳过，
+    不需要对每个目录重复检查文件是否存在。处理结果和失败的目录写入JSON汇总文件。
+
     Args:
         base_dir: 基础目录路径
+        processes: 进程数，默认为CPU核数 // ffmpeg_threads
+        manifest_path: 清单文件路径，默认为base_dir/revideo_manifest.txt
+        targets_file: 目标目录列表文件（例如extracted_folders.txt），每行一个目录，
+            默认处理base_dir下的所有目录
+        ffmpeg_threads: 每个ffmpeg进程的线程数
+        timeout: 每个目录的ffmpeg超时时间（秒），None表示不限制
+        summary_path: JSON汇总文件路径，默认为base_dir/revideo_summary.json
+        encode_profile: 编码配置，见encoding.ENCODE_PROFILES
+        num_frames: 输出视频的帧数
+
+    Returns:
+        Dict[str, object]: 汇总信息
     """
-    base_path = Path(base_dir)
-    
-    if not base_path.exists():
+    if not os.path.isdir(base_dir):
         print(f"错误: 目录不存在: {base_dir}")
-        return
-    
-    # 查找所有包含cam01.mp4的videos目录
-    processed_count = 0
-    failed_count = 0
-    
-    for video_dir in base_path.glob("*/videos"):
-        cam01_path = video_dir / "cam01.mp4"
-        
-        if cam01_path.exists():
-            cam00_path = video_dir / "cam00.mp4"
-            
-            # 如果cam00.mp4已存在，跳过
-            if cam00_path.exists():
-                print(f"\n跳过（已存在）: {video_dir}")
-                continue
-            
-            print(f"\n处理目录: {video_dir}")
-            print(f"输入视频: {cam01_path}")
-            print(f"输出视频: {cam00_path}")
-            
-            success = create_static_video_from_first_frame(
-                str(cam01_path),
-                str(cam00_path),
-                num_frames=81,
-                fps=30
-            )
-            
-            if success:
-                processed_count += 1
-            else:
-                failed_count += 1
-    
+        return {}
+
+    if manifest_path is None:
+        manifest_path = os.path.join(base_dir, "revideo_manifest.txt")
+    if summary_path is None:
+        summary_path = os.path.join(base_dir, "revideo_summary.json")
+    if processes is None:
+        processes = max(1, (os.cpu_count() or 1) // ffmpeg_threads)
+    done = _load_manifest(manifest_path)
+
+    if targets_file is not None:
+        candidates = _load_target_folders(targets_file, base_dir)
+    else:
+        candidates = [entry.path for entry in os.scandir(base_dir) if entry.is_dir()]
+    render_folders = [
+        folder
+        for folder in candidates
+        if os.path.basename(os.path.normpath(folder)) not in done
+    ]
+    print(
+        f"待处理目录: {len(render_folders)} 个, 已跳过: "
+        f"{len(candidates) - len(render_folders)} 个, 进程数: {processes}"
+    )
+
+    start_time = time.time()
+    counts = {"processed": 0, "exists": 0, "missing": 0, "failed": 0}
+    failures = []
+    encode_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=processes) as executor, open(
+        manifest_path, "a", encoding="utf-8"
+    ) as manifest:
+        futures = {
+            executor.submit(
+                _process_render_folder,
+                folder,
+                num_frames=num_frames,
+                threads=ffmpeg_threads,
+                timeout=timeout,
+                profile=encode_profile,
+            ): folder
+            for folder in render_folders
+        }
+        for future in tqdm(
+            as_completed(futures), total=len(futures), desc="Generating cam00"
+        ):
+            try:
+                folder_name, status, seconds = future.result()
+            except Exception as e:
+                folder_name = os.path.basename(os.path.normpath(futures[future]))
+                status, seconds = "failed", 0.0
+                print(f"处理 {folder_name} 时出错: {str(e)}")
+            counts[status] += 1
+            encode_seconds += seconds
+            # "exists"只在已有视频通过完整性检查后返回
+            if status in ("processed", "exists"):
+                manifest.write(f"{folder_name}\n")
+                manifest.flush()
+            elif status == "failed":
+                failures.append(folder_name)
+
+    summary = dict(
+        base_dir=base_dir,
+        targets_file=targets_file,
+        processes=processes,
+        ffmpeg_threads=ffmpeg_threads,
+        encode_profile=encode_profile,
+        timeout=timeout,
+        skipped_from_manifest=len(candidates) - len(render_folders),
+        counts=counts,
+        failures=failures,
+        wall_seconds=time.time() - start_time,
+        encode_seconds=encode_seconds,
+        encode_fps=(
+            counts["processed"] * num_frames / encode_seconds
+            if encode_seconds > 0
+            else None
+        ),
+    )
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
     print(f"\n处理完成!")
-    print(f"成功: {processed_count} 个")
-    print(f"失败: {failed_count} 个")
+    print(f"成功: {counts['processed']} 个")
+    print(f"已存在: {counts['exists']} 个")
+    print(f"缺少cam01.mp4: {counts['missing']} 个")
+    print(f"失败: {counts['failed']} 个")
+    print(f"汇总已保存到: {summary_path}")
+    return summary
 
 
 def process_single_directory(target_dir: str):
@@ -188,14 +428,41 @@ def process_single_directory(target_dir: str):
 
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1:
-        # 如果提供了命令行参数，处理指定目录
-        target_dir = sys.argv[1]
-        print(f"处理单个目录: {target_dir}")
-        process_single_directory(target_dir)
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "target_dir",
+        nargs="?",
+        default=None,
+        help="处理单个目录; 不提供时处理base_dir下的所有目录",
+    )
+    parser.add_argument(
+        "--base_dir", default="/home/xu_zifan/.objaverse/renders/renders"
+    )
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--targets_file", default=None)
+    parser.add_argument("--ffmpeg_threads", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--summary_path", default=None)
+    parser.add_argument(
+        "--encode_profile", default="standard", choices=list(ENCODE_PROFILES)
+    )
+    args = parser.parse_args()
+
+    if args.target_dir is not None:
+        # 如果提供了目录参数，处理指定目录
+        print(f"处理单个目录: {args.target_dir}")
+        process_single_directory(args.target_dir)
     else:
         # 否则处理所有目录
         print("处理所有目录...")
-        process_directory()
\ No newline at end of file
+        process_directory(
+            base_dir=args.base_dir,
+            processes=args.processes,
+            targets_file=args.targets_file,
+            ffmpeg_threads=args.ffmpeg_threads,
+            timeout=args.timeout,
+            summary_path=args.summary_path,
+            encode_profile=args.encode_profile,
+        )
@@ -0,0 +1,114 @@
+"""Tests of the batched trajectory math against the per-matrix loops it replaced."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from trajectory import (  # noqa: E402
+    generate_trajectory,
+    get_c2w,
+    parse_matrix,
+    recammaster_to_w2c,
+    relative_poses,
+    rigid_inverse,
+)
+
+TRANSFORM_MATRIX = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, -1, 0, 0], [0, 0, 0, 1]])
+
+
+def random_rigid_transforms(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    transforms = np.tile(np.eye(4), (n, 1, 1))
+    for i in range(n):
+        rotation, _ = np.linalg.qr(rng.normal(size=(3, 3)))
+        transforms[i, :3, :3] = rotation
+        transforms[i, :3, 3] = rng.normal(scale=100.0, size=3)
+    return transforms
+
+
+def legacy_recammaster_to_w2c(cameras: np.ndarray) -> np.ndarray:
+    w2cs = []
+    for cam in cameras:
+        cam = np.vstack([cam[:3], [0.0, 0.0, 0.0, 1.0]])[:, [1, 2, 0, 3]]
+        cam[:3, 1] *= -1.0
+        cam[:3, 3] /= 100
+        w2cs.append(np.linalg.inv(cam))
+    return np.array(w2cs)
+
+
+def legacy_relative_poses(w2cs: np.ndarray) -> np.ndarray:
+    abs2rel = np.eye(4) @ w2cs[0]
+    return np.array(
+        [np.eye(4)] + [abs2rel @ np.linalg.inv(w2c) for w2c in w2cs[1:]]
+    )
+
+
+def test_parse_matrix_pads_rows_of_three():
+    matrix = parse_matrix("[1 2 3] [4 5 6] [7 8 9] [10 11 12]")
+    assert matrix.shape == (4, 4)
+    np.testing.assert_array_equal(matrix[:, 3], 0.0)
+    np.testing.assert_array_equal(matrix[3, :3], [10, 11, 12])
+
+
+@pytest.mark.parametrize("n", [1, 5])
+def test_rigid_inverse_matches_linalg_inv(n):
+    transforms = random_rigid_transforms(n)
+    inverse = rigid_inverse(transforms)
+    assert inverse.shape == (n, 4, 4)
+    np.testing.assert_allclose(inverse, np.linalg.inv(transforms), atol=1e-9)
+
+
+@pytest.mark.parametrize("n", [1, 5])
+def test_recammaster_to_w2c_matches_loop(n):
+    cameras = random_rigid_transforms(n)
+    w2cs = recammaster_to_w2c(cameras.copy())
+    assert w2cs.shape == (n, 4, 4)
+    np.testing.assert_allclose(w2cs, legacy_recammaster_to_w2c(cameras), atol=1e-9)
+
+    # [N, 3, 4] cameras are padded to homogeneous matrices
+    np.testing.assert_allclose(recammaster_to_w2c(cameras[:, :3].copy()), w2cs)
+
+
+@pytest.mark.parametrize("n", [1, 5])
+def test_relative_poses_matches_loop(n):
+    w2cs = random_rigid_transforms(n, seed=1)
+    poses = relative_poses(w2cs)
+    assert poses.shape == (n, 4, 4)
+    np.testing.assert_allclose(poses[0], np.eye(4))
+    np.testing.assert_allclose(poses, legacy_relative_poses(w2cs), atol=1e-9)
+
+
+@pytest.mark.parametrize("n", [1, 5])
+@pytest.mark.parametrize("relative_c2w", [True, False])
+def test_get_c2w_matches_loop(n, relative_c2w):
+    w2cs = random_rigid_transforms(n, seed=2)
+    c2ws = get_c2w(w2cs, TRANSFORM_MATRIX, relative_c2w=relative_c2w)
+    assert c2ws.shape == (n, 4, 4)
+    assert c2ws.dtype == np.float32
+    if relative_c2w:
+        expected = legacy_relative_poses(w2cs)
+    else:
+        expected = np.array([np.linalg.inv(w2c) for w2c in w2cs])
+    np.testing.assert_allclose(
+        c2ws, (TRANSFORM_MATRIX @ expected).astype(np.float32), rtol=1e-5, atol=1e-4
+    )
+
+
+@pytest.mark.parametrize("angle", [360.0, -360.0, [360.0, 360.0]])
+def test_full_orbit_does_not_repeat_first_frame(angle):
+    c2ws = generate_trajectory("orbit", num_frames=8, angle=angle).reshape(-1, 8, 4, 4)
+    eyes = c2ws[..., :3, 3]
+    # consecutive eyes, including last -> first, are all the same distance apart
+    steps = np.linalg.norm(eyes - np.roll(eyes, 1, axis=1), axis=-1)
+    np.testing.assert_allclose(steps, steps[:, :1].repeat(8, axis=1), rtol=1e-4)
+
+
+def test_partial_orbit_ends_at_angle():
+    target = np.array([0.5, 0.0, 0.25])
+    c2ws = generate_trajectory("orbit", num_frames=5, target=target, angle=180.0)
+    np.testing.assert_allclose(
+        c2ws[-1, :3, 3] - target, -(c2ws[0, :3, 3] - target), atol=1e-5
+    )
@@ -0,0 +1,391 @@
+"""Batched camera trajectory math shared by blender_script.py and vis_cam.py.
+
+All functions operate on stacks of 4x4 homogeneous matrices with shape [N, 4, 4]. Only
+`set_camera_from_c2w_matrix` needs Blender, so the rest can be used outside of it.
+"""
+
+import json
+import os
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Identity pose used as the first frame of relative trajectories.
+IDENTITY_POSE = np.eye(4)
+
+
+def parse_matrix(matrix_str: str) -> np.ndarray:
+    """Parses a matrix from the ReCamMaster extrinsics.json string format.
+
+    Args:
+        matrix_str (str): Matrix rows formatted as "[a b c d] [e f g h] ...". Rows with
+            3 values are padded with a trailing 0.
+
+    Returns:
+        np.ndarray: The parsed matrix.
+    """
+    rows = matrix_str.strip().split("] [")
+    matrix = []
+    for row in rows:
+        values = list(map(float, row.replace("[", "").replace("]", "").split()))
+        if len(values) == 3:
+            values.append(0.0)
+        matrix.append(values)
+    return np.array(matrix)
+
+
+def rigid_inverse(transforms: np.ndarray) -> np.ndarray:
+    """Inverts rigid transforms with the rotation transpose instead of np.linalg.inv.
+
+    Args:
+        transforms (np.ndarray): Rigid transforms of shape [..., 4, 4] whose upper-left
+            3x3 block is orthogonal.
+
+    Returns:
+        np.ndarray: The inverse transforms, with the same shape.
+    """
+    transforms = np.asarray(transforms, dtype=np.float64)
+    rotation_t = np.swapaxes(transforms[..., :3, :3], -1, -2)
+    inverse = np.zeros_like(transforms)
+    inverse[..., :3, :3] = rotation_t
+    inverse[..., :3, 3] = -np.einsum("...ij,...j->...i", rotation_t, transforms[..., :3, 3])
+    inverse[..., 3, 3] = 1.0
+    return inverse
+
+
+def to_homogeneous(matrices: np.ndarray) -> np.ndarray:
+    """Pads [..., 3, 4] matrices with a [0, 0, 0, 1] row. [..., 4, 4] are returned as is.
+
+    Args:
+        matrices (np.ndarray): Matrices of shape [..., 3, 4] or [..., 4, 4].
+
+    Returns:
+        np.ndarray: Matrices of shape [..., 4, 4].
+    """
+    matrices = np.asarray(matrices, dtype=np.float64)
+    if matrices.shape[-2] == 4:
+        return matrices
+    bottom = np.broadcast_to(
+        np.array([0.0, 0.0, 0.0, 1.0]), matrices.shape[:-2] + (1, 4)
+    )
+    return np.concatenate([matrices, bottom], axis=-2)
+
+
+def recammaster_to_w2c(cameras: np.ndarray) -> np.ndarray:
+    """Converts ReCamMaster camera matrices to Blender world-to-camera matrices.
+
+    Remaps the axes of the (Unreal Engine) cameras, flips the second axis, and converts
+    the translation from centimeters to meters.
+
+    Args:
+        cameras (np.ndarray): Camera-to-world matrices of shape [N, 3 or 4, 4], as
+            parsed and transposed from extrinsics.json.
+
+    Returns:
+        np.ndarray: World-to-camera matrices of shape [N, 4, 4].
+    """
+    cameras = to_homogeneous(cameras)[:, :, [1, 2, 0, 3]]
+    cameras[:, :3, 1] *= -1.0
+    cameras[:, :3, 3] /= 100
+    return rigid_inverse(cameras)
+
+
+def relative_poses(w2cs: np.ndarray) -> np.ndarray:
+    """Returns the camera-to-world poses relative to the first camera.
+
+    Args:
+        w2cs (np.ndarray): World-to-camera matrices of shape [N, 4, 4].
+
+    Returns:
+        np.ndarray: Camera-to-world matrices of shape [N, 4, 4], where the first pose
+            is the identity.
+    """
+    w2cs = np.asarray(w2cs, dtype=np.float64)
+    poses = IDENTITY_POSE @ w2cs[0] @ rigid_inverse(w2cs)
+    poses[0] = IDENTITY_POSE
+    return poses
+
+
+def get_c2w(
+    w2cs: Union[np.ndarray, Sequence[np.ndarray]],
+    transform_matrix: np.ndarray,
+    relative_c2w: bool = True,
+) -> np.ndarray:
+    """Converts world-to-camera matrices to camera-to-world matrices.
+
+    Args:
+        w2cs (Union[np.ndarray, Sequence[np.ndarray]]): World-to-camera matrices of
+            shape [N, 4, 4].
+        transform_matrix (np.ndarray): 4x4 axis remap applied to every pose.
+        relative_c2w (bool, optional): Whether to make the poses relative to the first
+            camera. Defaults to True.
+
+    Returns:
+        np.ndarray: float32 camera-to-world matrices of shape [N, 4, 4].
+    """
+    w2cs = np.asarray(w2cs, dtype=np.float64)
+    if relative_c2w:
+        poses = relative_poses(w2cs)
+    else:
+        poses = rigid_inverse(w2cs)
+    return (np.asarray(transform_matrix) @ poses).astype(np.float32)
+
+
+def load_recammaster_c2ws(
+    extrinsics_path: str,
+    cam_name: str,
+    transform_matrix: np.ndarray,
+    num_frames: int = 81,
+    relative_c2w: bool = True,
+) -> np.ndarray:
+    """Loads the camera-to-world matrices of a ReCamMaster trajectory.
+
+    Args:
+        extrinsics_path (str): Path to the ReCamMaster extrinsics.json.
+        cam_name (str): Name of the camera in extrinsics.json, e.g. "cam03".
+        transform_matrix (np.ndarray): 4x4 axis remap applied to every pose.
+        num_frames (int, optional): Number of frames to load. Defaults to 81.
+        relative_c2w (bool, optional): Whether to make the poses relative to the first
+            camera. Defaults to True.
+
+    Raises:
+        RuntimeError: If the extrinsics file does not exist.
+
+    Returns:
+        np.ndarray: float32 camera-to-world matrices of shape [num_frames, 4, 4].
+    """
+    if not os.path.exists(extrinsics_path):
+        raise RuntimeError(f"load extrinsics file failed: {extrinsics_path}")
+
+    with open(extrinsics_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    cameras = np.stack(
+        [parse_matrix(data[f"frame{i}"][cam_name]) for i in range(num_frames)]
+    )
+    cameras = np.transpose(cameras, (0, 2, 1))
+    return get_c2w(recammaster_to_w2c(cameras), transform_matrix, relative_c2w)
+
+
+def set_camera_from_c2w_matrix(cam, c2w_matrix: np.ndarray) -> None:
+    """将camera-to-world矩阵应用于Blender相机
+
+    这是get_3x4_RT_matrix_from_blender函数的逆过程
+
+    Args:
+        cam (bpy.types.Object): Blender相机对象
+        c2w_matrix (np.ndarray): 相机到世界的转换矩阵(4x4或3x4)
+    """
+    # only available inside of Blender
+    from mathutils import Matrix
+
+    cam.matrix_world = Matrix(to_homogeneous(c2w_matrix).tolist())
+
+
+# Object center after `normalize_scene`, and the up axis of the Blender world.
+DEFAULT_TARGET = (0.0, 2.0, 0.0)
+WORLD_UP = np.array([0.0, 0.0, 1.0])
+
+TRAJECTORY_FAMILIES = ("orbit", "arc", "dolly", "pan", "tilt")
+# total rotation in degrees of each family when no angle is given
+DEFAULT_ANGLES = {"orbit": 360.0, "arc": 60.0, "dolly": 0.0, "pan": 30.0, "tilt": 20.0}
+
+
+def look_at(
+    eyes: np.ndarray, targets: np.ndarray, up: np.ndarray = WORLD_UP
+) -> np.ndarray:
+    """Builds camera-to-world matrices of cameras looking from eyes at targets.
+
+    The matrices use the same convention as the poses returned by `get_c2w` (x right,
+    y down, z forward), so they can be placed with `set_camera_for_frame`.
+
+    Args:
+        eyes (np.ndarray): Camera positions of shape [..., 3].
+        targets (np.ndarray): Points the cameras look at, broadcastable to eyes.
+        up (np.ndarray, optional): World up axis. Defaults to +Z.
+
+    Returns:
+        np.ndarray: Camera-to-world matrices of shape [..., 4, 4].
+    """
+    eyes = np.asarray(eyes, dtype=np.float64)
+    forward = np.broadcast_to(targets, eyes.shape) - eyes
+    forward = forward / np.linalg.norm(forward, axis=-1, keepdims=True)
+    right = np.cross(forward, up)
+    right = right / np.linalg.norm(right, axis=-1, keepdims=True)
+    down = np.cross(forward, right)
+
+    c2ws = np.zeros(eyes.shape[:-1] + (4, 4))
+    c2ws[..., :3, 0] = right
+    c2ws[..., :3, 1] = down
+    c2ws[..., :3, 2] = forward
+    c2ws[..., :3, 3] = eyes
+    c2ws[..., 3, 3] = 1.0
+    return c2ws
+
+
+def _spherical_to_cartesian(
+    azimuth: np.ndarray, elevation: np.ndarray, radius: np.ndarray
+) -> np.ndarray:
+    """Converts angles in radians around the world up axis to [..., 3] offsets."""
+    return np.stack(
+        np.broadcast_arrays(
+            radius * np.cos(elevation) * np.cos(azimuth),
+            radius * np.cos(elevation) * np.sin(azimuth),
+            radius * np.sin(elevation),
+        ),
+        axis=-1,
+    )
+
+
+def generate_trajectory(
+    family: str,
+    num_frames: int = 81,
+    target: Sequence[float] = DEFAULT_TARGET,
+    distance: Union[float, np.ndarray] = 2.0,
+    azimuth: Union[float, np.ndarray] = -90.0,
+    elevation: Union[float, np.ndarray] = 0.0,
+    angle: Optional[Union[float, np.ndarray]] = None,
+    end_distance: Union[float, np.ndarray] = 1.2,
+) -> np.ndarray:
+    """Generates a procedural camera trajectory.
+
+    The first camera sits at `distance` from `target`, at the given `azimuth` and
+    `elevation` (in degrees) around the world up axis. The defaults place it at the
+    origin looking at the normalized object, like the first frame of the ReCamMaster
+    trajectories. The families are:
+
+    - "orbit": circles the target at a constant elevation by `angle` (default 360).
+    - "arc": sweeps around the target by `angle` (default 60) while rising by
+      `angle / 4` degrees of elevation.
+    - "dolly": moves straight towards the target, from `distance` to `end_distance`.
+    - "pan": stays in place and turns left by `angle` (default 30).
+    - "tilt": stays in place and tilts up by `angle` (default 20).
+
+    Every numeric parameter may also be an array of shape [M], which generates M
+    trajectories at once.
+
+    Full turns (|angle| == 360) of "orbit" and "pan" end where they start, so
+    their frames are spread over [0, angle) and the first frame is not repeated at the
+    end of the loop.
+
+    Args:
+        family (str): One of TRAJECTORY_FAMILIES.
+        num_frames (int, optional): Number of frames. Defaults to 81.
+        target (Sequence[float], optional): Point the trajectory is built around.
+            Defaults to DEFAULT_TARGET.
+        distance (Union[float, np.ndarray], optional): Distance of the first camera
+            from the target. Defaults to 2.0.
+        azimuth (Union[float, np.ndarray], optional): Azimuth of the first camera in
+            degrees. Defaults to -90.0.
+        elevation (Union[float, np.ndarray], optional): Elevation of the first camera
+            in degrees. Defaults to 0.0.
+        angle (Optional[Union[float, np.ndarray]], optional): Total rotation of the
+            trajectory in degrees. If None, uses the default of the family. Defaults
+            to None.
+        end_distance (Union[float, np.ndarray], optional): Final distance from the
+            target of "dolly" trajectories. Defaults to 1.2.
+
+    Raises:
+        ValueError: If the family is not supported.
+
+    Returns:
+        np.ndarray: float32 camera-to-world matrices of shape [num_frames, 4, 4], or
+            [M, num_frames, 4, 4] if array parameters were given.
+    """
+    if family not in DEFAULT_ANGLES:
+        raise ValueError(
+            f"family must be one of {', '.join(TRAJECTORY_FAMILIES)}. Got {family}."
+        )
+    if angle is None:
+        angle = DEFAULT_ANGLES[family]
+
+    # parameters get a trailing frame axis, so they broadcast against t
+    distance, azimuth, elevation, angle, end_distance = (
+        np.asarray(x, dtype=np.float64)[..., None]
+        for x in (distance, azimuth, elevation, angle, end_distance)
+    )
+    t = np.linspace(0.0, 1.0, num_frames)
+    if family in ("orbit", "pan"):
+        closed_loop = np.isclose(np.abs(angle), 360.0)
+        t = np.where(closed_loop, np.linspace(0.0, 1.0, num_frames, endpoint=False), t)
+    azimuth, elevation, angle = (np.radians(x) for x in (azimuth, elevation, angle))
+    target = np.asarray(target, dtype=np.float64)
+
+    if family in ("orbit", "arc"):
+        frame_azimuth = azimuth + angle * t
+        frame_elevation = elevation + (angle / 4 * t if family == "arc" else 0.0)
+        offsets = _spherical_to_cartesian(frame_azimuth, frame_elevation, distance)
+        eyes = target + offsets
+        targets = target
+    elif family == "dolly":
+        frame_distance = distance + (end_distance - distance) * t
+        eyes = target + _spherical_to_cartesian(azimuth, elevation, frame_distance)
+        targets = target
+    else:
+        eye = target + _spherical_to_cartesian(azimuth, elevation, distance)
+        # angles of the initial viewing direction, which points back at the target
+        view_azimuth, view_elevation = azimuth + np.pi, -elevation
+        if family == "pan":
+            view_azimuth = view_azimuth + angle * t
+        else:
+            view_elevation = np.clip(
+                view_elevation + angle * t, -np.radians(89), np.radians(89)
+            )
+        forward = _spherical_to_cartesian(view_azimuth, view_elevation, 1.0)
+        eyes = np.broadcast_to(eye, forward.shape)
+        targets = eyes + forward
+
+    return look_at(eyes, targets).astype(np.float32)
+
+
+def sample_trajectories(
+    num_trajectories: int,
+    num_frames: int = 81,
+    families: Sequence[str] = TRAJECTORY_FAMILIES,
+    distance_range: Tuple[float, float] = (1.6, 2.4),
+    azimuth_range: Tuple[float, float] = (-120.0, -60.0),
+    elevation_range: Tuple[float, float] = (-10.0, 30.0),
+    angle_scale_range: Tuple[float, float] = (0.5, 1.5),
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Samples random procedural trajectories.
+
+    Args:
+        num_trajectories (int): Number of trajectories to sample.
+        num_frames (int, optional): Number of frames per trajectory. Defaults to 81.
+        families (Sequence[str], optional): Families to sample uniformly from.
+            Defaults to TRAJECTORY_FAMILIES.
+        distance_range (Tuple[float, float], optional): Range of the starting distance
+            from the target. Defaults to (1.6, 2.4).
+        azimuth_range (Tuple[float, float], optional): Range of the starting azimuth in
+            degrees. Defaults to (-120.0, -60.0).
+        elevation_range (Tuple[float, float], optional): Range of the starting
+            elevation in degrees. Defaults to (-10.0, 30.0).
+        angle_scale_range (Tuple[float, float], optional): Range of the factor applied
+            to the default angle of each family. Defaults to (0.5, 1.5).
+        seed (Optional[int], optional): Random seed. Defaults to None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The float32 camera-to-world matrices of shape
+            [num_trajectories, num_frames, 4, 4], and the family of each trajectory.
+    """
+    rng = np.random.default_rng(seed)
+    sampled_families = rng.choice(np.asarray(families), size=num_trajectories)
+    distance = rng.uniform(*distance_range, size=num_trajectories)
+    azimuth = rng.uniform(*azimuth_range, size=num_trajectories)
+    elevation = rng.uniform(*elevation_range, size=num_trajectories)
+    angle_scale = rng.uniform(*angle_scale_range, size=num_trajectories)
+
+    c2ws = np.empty((num_trajectories, num_frames, 4, 4), dtype=np.float32)
+    for family in np.unique(sampled_families):
+        mask = sampled_families == family
+        c2ws[mask] = generate_trajectory(
+            family,
+            num_frames=num_frames,
+            distance=distance[mask],
+            azimuth=azimuth[mask],
+            elevation=elevation[mask],
+            angle=DEFAULT_ANGLES[family] * angle_scale[mask],
+            end_distance=distance[mask] * 0.6,
+        )
+    return c2ws, sampled_families
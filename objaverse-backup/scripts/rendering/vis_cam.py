@@ -2,11 +2,14 @@
 
 import bpy
 import os
-import json
+import sys
 import numpy as np
-from mathutils import Matrix, Vector
+from mathutils import Vector
 import math
 
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from trajectory import load_recammaster_c2ws, set_camera_from_c2w_matrix
+
 # 清除当前场景
 def reset_scene():
     # 删除所有对象
@@ -17,51 +20,6 @@ def reset_scene():
     for material in bpy.data.materials:
         bpy.data.materials.remove(material, do_unlink=True)
 
-# 相机外参解析函数
-def parse_matrix(matrix_str):
-    rows = matrix_str.strip().split('] [')
-    matrix = []
-    for row in rows:
-        row = row.replace('[', '').replace(']', '')
-        if len((list(map(float, row.split())))) == 3:
-            matrix.append((list(map(float, row.split()))) + [0.])
-        else:
-            matrix.append(list(map(float, row.split())))
-    return np.array(matrix)
-
-# 计算相机到世界的转换矩阵
-def get_c2w(w2cs, transform_matrix, relative_c2w=True):
-    if relative_c2w:
-        target_cam_c2w = np.array([
-            [1, 0, 0, 0],
-            [0, 1, 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ])
-        abs2rel = target_cam_c2w @ w2cs[0]
-        ret_poses = [target_cam_c2w, ] + [abs2rel @ np.linalg.inv(w2c) for w2c in w2cs[1:]]
-    else:
-        ret_poses = [np.linalg.inv(w2c) for w2c in w2cs]
-    ret_poses = [transform_matrix @ x for x in ret_poses]
-    return np.array(ret_poses, dtype=np.float32)
-
-# 设置相机参数
-def set_camera_from_c2w_matrix(cam, c2w_matrix):
-    # 确保是4x4矩阵
-    if c2w_matrix.shape == (3, 4):
-        c2w_matrix = np.vstack([c2w_matrix, np.array([0, 0, 0, 1])])
-    
-    # 转换为Blender的Matrix对象
-    mat = Matrix(
-        ((c2w_matrix[0, 0], c2w_matrix[0, 1], c2w_matrix[0, 2], c2w_matrix[0, 3]),
-         (c2w_matrix[1, 0], c2w_matrix[1, 1], c2w_matrix[1, 2], c2w_matrix[1, 3]),
-         (c2w_matrix[2, 0], c2w_matrix[2, 1], c2w_matrix[2, 2], c2w_matrix[2, 3]),
-         (0, 0, 0, 1))
-    )
-    
-    # 设置相机的matrix_world
-    cam.matrix_world = mat
-
 # 创建相机
 def create_camera(name="Camera"):
     # 创建相机数据
@@ -180,24 +138,10 @@ def main():
         print(f"请将extrinsics.json放在与此脚本相同目录下")
         raise RuntimeError("failed")
         return
-        
-    with open(extrinsics_path, 'r') as file:
-        data = json.load(file)
-    
+
     # 处理相机参数
-    cameras_data = [parse_matrix(data[f"frame{i}"][f"cam09"]) for i in range(0, 81, 1)]
-    cameras_data = np.transpose(np.stack(cameras_data), (0, 2, 1))
-    w2cs = []
-    for cam_data in cameras_data:
-        if cam_data.shape[0] == 3:
-            cam_data = np.vstack((cam_data, np.array([[0, 0, 0, 1]])))
-        cam_data = cam_data[:, [1, 2, 0, 3]]
-        cam_data[:3, 1] *= -1.
-        cam_data[:3, 3] /= 100
-        w2cs.append(np.linalg.inv(cam_data))
-    
     transform_matrix = np.array([[-1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]])
-    c2ws = get_c2w(w2cs, transform_matrix, True)
+    c2ws = load_recammaster_c2ws(extrinsics_path, "cam09", transform_matrix)
     flip_z_rotation = np.array([
     [0, 1, 0, 0],
     [-1, 0, 0, 0],
@@ -3,6 +3,12 @@
 import hashlib
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence
+
+# Read size used for hashing. Large reads keep hashing bound by the disk and sha256
+# instead of by the number of read syscalls.
+HASH_BLOCK_SIZE = 1 << 20
 
 
 def get_uid_from_str(string: str) -> str:
@@ -18,11 +24,13 @@ def get_uid_from_str(string: str) -> str:
     return str(uuid.uuid5(namespace, string))
 
 
-def get_file_hash(file_path: str) -> str:
+def get_file_hash(file_path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
     """Get the sha256 hash of a file.
 
     Args:
         file_path (str): Path to the file.
+        block_size (int, optional): Number of bytes to read at a time. Defaults to
+            HASH_BLOCK_SIZE (1 MiB).
 
     Returns:
         str: sha256 hash of the file.
@@ -37,9 +45,65 @@ def get_file_hash(file_path: str) -> str:
                 f"The symbolic link points to a file that doesn't exist: {resolved_path}"
             )
     sha256 = hashlib.sha256()
-    # Read the file from the path
-    with open(file_path, "rb") as f:
+    # Read the file from the path into a single reused buffer
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
         # Loop till the end of the file
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256.update(byte_block)
+        while True:
+            num_bytes = f.readinto(buffer)
+            if not num_bytes:
+                break
+            sha256.update(view[:num_bytes])
+    return sha256.hexdigest()
+
+
+def get_file_hashes(
+    file_paths: Sequence[str], max_workers: Optional[int] = None
+) -> Dict[str, str]:
+    """Get the sha256 hashes of several files with a thread pool.
+
+    hashlib releases the GIL while hashing large buffers, so the reads and hashes of
+    different files overlap.
+
+    Args:
+        file_paths (Sequence[str]): Paths to the files.
+        max_workers (Optional[int], optional): Number of threads. If None, uses the
+            ThreadPoolExecutor default. Defaults to None.
+
+    Returns:
+        Dict[str, str]: Mapping from each file path to its sha256 hash.
+    """
+    if len(file_paths) <= 1:
+        return {file_path: get_file_hash(file_path) for file_path in file_paths}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(file_paths, executor.map(get_file_hash, file_paths)))
+
+
+def write_chunks_with_hash(chunks: Iterable[bytes], file_path: str) -> str:
+    """Writes a stream of chunks to a file while computing its sha256 hash.
+
+    The chunks are written to f"{file_path}.tmp", which is renamed to file_path once
+    it is complete, so file_path never holds a partial file.
+
+    Args:
+        chunks (Iterable[bytes]): Chunks of the contents of the file, e.g. from
+            `requests.Response.iter_content`.
+        file_path (str): Path to write the file to.
+
+    Returns:
+        str: sha256 hash of the file.
+    """
+    tmp_path = f"{file_path}.tmp"
+    sha256 = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                sha256.update(chunk)
+                f.write(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     return sha256.hexdigest()
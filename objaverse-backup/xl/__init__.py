@@ -1,8 +1,13 @@
 """A package for downloading and processing Objaverse-XL."""
 
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Callable, Dict, Optional
 
 import pandas as pd
+from tqdm import tqdm
 
 from objaverse.xl.github import GitHubDownloader
 from objaverse.xl.sketchfab import SketchfabDownloader
@@ -17,6 +22,97 @@ downloaders = {
 }
 
 
+def allocate_processes(
+    object_counts: Dict[str, int],
+    processes: int,
+    source_processes: Optional[Dict[str, int]] = None,
+) -> Dict[str, int]:
+    """Splits a budget of download processes between sources that run at once.
+
+    The budget is hard: the allocated processes never add up to more than processes.
+    Sources without objects are dropped. If there are more sources than processes,
+    only the processes sources with the most objects get a process, and the others
+    are left out of the allocation so that the caller runs them afterwards. Otherwise
+    every source gets at least one process, and the rest of the budget is handed out
+    one process at a time to the source with the most objects per process, skipping
+    sources at their limit.
+
+    Args:
+        object_counts (Dict[str, int]): Number of objects to download of each source.
+        processes (int): Total number of download processes.
+        source_processes (Optional[Dict[str, int]], optional): Maximum number of
+            processes of each source, e.g. to be polite to a host. Sources that are
+            not in it are only limited by the budget. Defaults to None.
+
+    Returns:
+        Dict[str, int]: The number of processes of each source that runs at once.
+    """
+    if source_processes is None:
+        source_processes = {}
+    sources = sorted(
+        (source for source, count in object_counts.items() if count > 0),
+        key=lambda source: (-object_counts[source], source),
+    )
+    allocation = {source: 1 for source in sources[: max(processes, 1)]}
+    for _ in range(processes - len(allocation)):
+        candidates = [
+            source
+            for source in allocation
+            if allocation[source] < source_processes.get(source, processes)
+        ]
+        if not candidates:
+            break
+        source = max(
+            candidates, key=lambda source: object_counts[source] / allocation[source]
+        )
+        allocation[source] += 1
+    return allocation
+
+
+class _ProgressReporter:
+    """Single progress bar over the objects of every source, updated from the threads
+    that run the sources."""
+
+    def __init__(
+        self,
+        object_counts: Dict[str, int],
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+    ) -> None:
+        self.totals = object_counts
+        self.completed = {source: 0 for source in object_counts}
+        self.progress_callback = progress_callback
+        self.lock = threading.Lock()
+        self.progress_bar = tqdm(
+            total=sum(object_counts.values()), desc="Downloading objects"
+        )
+
+    def update(self, source: str, num_objects: int) -> None:
+        with self.lock:
+            # objects that were already downloaded are only counted once the source
+            # finishes, so never go above the total of the source
+            num_objects = min(
+                num_objects, self.totals[source] - self.completed[source]
+            )
+            self.completed[source] += num_objects
+            self.progress_bar.update(num_objects)
+            self.progress_bar.set_postfix(
+                {
+                    source: f"{self.completed[source]}/{self.totals[source]}"
+                    for source in self.totals
+                }
+            )
+            if self.progress_callback is not None:
+                self.progress_callback(
+                    source, self.completed[source], self.totals[source]
+                )
+
+    def finish(self, source: str) -> None:
+        self.update(source, self.totals[source])
+
+    def close(self) -> None:
+        self.progress_bar.close()
+
+
 def get_annotations(
     download_dir: str = "~/.objaverse", refresh: bool = False
 ) -> pd.DataFrame:
@@ -62,11 +158,11 @@ def download_objects(
         processes (Optional[int], optional): Number of processes to use for
             downloading.  If None, will use the number of CPUs on the machine.
             Defaults to None.
-        save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "files"]],
+        save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]],
             optional): Format to save the repository. If None, the repository will
             not be saved. If "files" is specified, each file will be saved
             individually. Otherwise, the repository can be saved as a "zip", "tar",
-            or "tar.gz" file. Defaults to None.
+            "tar.gz" or "tar.zst" file. Defaults to None.
         handle_found_object (Optional[Callable], optional): Called when an object is
             successfully found and downloaded. Here, the object has the same sha256
             as the one that was downloaded with Objaverse-XL. If None, the object
@@ -104,6 +200,30 @@ def download_objects(
             - metadata (Dict[Hashable, Any]): Metadata about the 3D object, which is
                 particular to the source.
             Return is not used. Defaults to None.
+        concurrent_sources (bool, optional): Whether to download the sources at the
+            same time. Each source then runs in its own thread with its share of
+            processes (see `allocate_processes`), so the total number of download
+            processes stays at processes, and a single progress bar covers every
+            source. Sources that do not fit in the budget, when there are fewer
+            processes than sources, are downloaded one after the other with processes
+            each once the concurrent sources finish. If False, the sources are
+            downloaded one after the other with processes each, as they were before
+            concurrent_sources existed. Defaults to False.
+        source_processes (Optional[Dict[str, int]], optional): Maximum number of
+            download processes of each source with concurrent_sources, e.g.
+            {"thingiverse": 4}. Defaults to None.
+        progress_callback (Optional[Callable[[str, int, int], None]], optional):
+            Called with the source, the number of finished objects of the source and
+            its total number of objects each time objects finish with
+            concurrent_sources. Defaults to None.
+        mp_context (Optional[str], optional): Start method of the download processes.
+            Defaults to None with concurrent_sources=False, which uses the default
+            start method of the platform. With concurrent_sources, the Pools are
+            created from the source threads, and forking a process while other
+            threads may hold locks (e.g. of tqdm or the logger) can deadlock the
+            child, so it defaults to "forkserver" where available and "spawn"
+            otherwise. The handlers must then be picklable by reference, i.e.
+            module-level functions rather than lambdas or closures.
 
     Returns:
         Dict[str, str]: Mapping of file identifiers to local paths of the downloaded
@@ -117,17 +237,67 @@ def download_objects(
             f"Invalid sources: {sources}. Must be a subset of {all_sources}."
         )
 
+    concurrent_sources = kwargs.pop("concurrent_sources", False)
+    source_processes = kwargs.pop("source_processes", None)
+    progress_callback = kwargs.pop("progress_callback", None)
+
     downloaded_objects = {}
-    for source in sources:
+    if not concurrent_sources or len(sources) <= 1:
+        for source in sources:
+            source_downloads = downloaders[source].download_objects(
+                objects[objects["source"] == source],
+                download_dir,
+                processes,
+                handle_found_object,
+                handle_modified_object,
+                handle_missing_object,
+                **kwargs,
+            )
+            downloaded_objects.update(source_downloads)
+        return downloaded_objects
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    source_objects = {
+        source: objects[objects["source"] == source] for source in sources
+    }
+    object_counts = {source: len(df) for source, df in source_objects.items()}
+    allocation = allocate_processes(object_counts, processes, source_processes)
+    if kwargs.get("mp_context") is None:
+        start_methods = multiprocessing.get_all_start_methods()
+        kwargs["mp_context"] = (
+            "forkserver" if "forkserver" in start_methods else "spawn"
+        )
+
+    # the download processes do the work, so one thread per source only waits on
+    # its Pool
+    reporter = _ProgressReporter(object_counts, progress_callback)
+
+    def download_source(source: str, source_processes: int) -> Dict[str, str]:
         source_downloads = downloaders[source].download_objects(
-            objects[objects["source"] == source],
+            source_objects[source],
             download_dir,
-            processes,
+            source_processes,
             handle_found_object,
             handle_modified_object,
             handle_missing_object,
+            progress_callback=partial(reporter.update, source),
             **kwargs,
         )
-        downloaded_objects.update(source_downloads)
+        reporter.finish(source)
+        return source_downloads
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(allocation)) as executor:
+            concurrent = sorted(allocation)
+            for source_downloads in executor.map(
+                download_source, concurrent, [allocation[s] for s in concurrent]
+            ):
+                downloaded_objects.update(source_downloads)
+        # sources that did not fit in the budget get every process once it is free
+        for source in sorted(sources - set(allocation)):
+            downloaded_objects.update(download_source(source, processes))
+    finally:
+        reporter.close()
 
     return downloaded_objects
@@ -54,11 +54,11 @@ class ObjaverseSource(ABC):
                 to. Supports all file systems supported by fsspec. If None, the objects
                 will be disregarded after they are downloaded and processed. Defaults to
                 "~/.objaverse".
-            save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "files"]],
+            save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]],
                 optional): Format to save the repository. If None, the repository will
                 not be saved. If "files" is specified, each file will be saved
                 individually. Otherwise, the repository can be saved as a "zip", "tar",
-                or "tar.gz" file. Defaults to None.
+                "tar.gz" or "tar.zst" file. Defaults to None.
             handle_found_object (Optional[Callable], optional): Called when an object is
                 successfully found and downloaded. Here, the object has the same sha256
                 as the one that was downloaded with Objaverse-XL. If None, the object
@@ -1,14 +1,29 @@
 """Script to download objects from GitHub."""
 
+import fcntl
+import glob
 import json
 import multiprocessing
 import os
 import shutil
+import sqlite3
 import subprocess
 import tarfile
 import tempfile
+import time
+import zipfile
+from contextlib import ExitStack, closing, contextmanager
 from multiprocessing import Pool
-from typing import Callable, Dict, List, Literal, Optional
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import fsspec
 import pandas as pd
@@ -16,9 +31,16 @@ import requests
 from loguru import logger
 from tqdm import tqdm
 
-from objaverse.utils import get_file_hash
+from objaverse.manifest import Manifest, get_manifest_path
+from objaverse.utils import get_file_hashes
 from objaverse.xl.abstract import ObjaverseSource
 
+# save_repo_format values that are written as a single archive
+ARCHIVE_FORMATS = ["zip", "tar", "tar.gz", "tar.zst"]
+
+# compression level of "tar.zst" archives; zstd's default
+ZSTD_LEVEL = 3
+
 FILE_EXTENSIONS = [
     ".obj",
     ".glb",
@@ -34,6 +56,27 @@ FILE_EXTENSIONS = [
     ".blend",
 ]
 
+# Files that 3D objects commonly reference (materials, buffers, and textures). With
+# fetch_mode="sparse", these are checked out next to the expected objects.
+SIDECAR_EXTENSIONS = [
+    ".mtl",
+    ".bin",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".tga",
+    ".bmp",
+    ".tif",
+    ".tiff",
+    ".gif",
+    ".webp",
+    ".exr",
+    ".hdr",
+    ".dds",
+    ".ktx",
+    ".ktx2",
+]
+
 
 class GitHubDownloader(ObjaverseSource):
     """Script to download objects from GitHub."""
@@ -81,6 +124,59 @@ class GitHubDownloader(ObjaverseSource):
         commit_hash = item["fileIdentifier"].split("/")[6]
         return f"{org}/{repo}/{commit_hash}"
 
+    @classmethod
+    def _get_repo_id_hashes(cls, file_identifiers: pd.Series) -> pd.Series:
+        """Vectorised version of _get_repo_id_with_hash.
+
+        Args:
+            file_identifiers (pd.Series): GitHub URLs of the form
+                https://github.com/{org}/{repo}/blob/{commit_hash}/{path}.
+
+        Returns:
+            pd.Series: The "{org}/{repo}/{commit_hash}" of each URL.
+        """
+        parts = file_identifiers.str.split("/", n=7, expand=True)
+        return parts[3] + "/" + parts[4] + "/" + parts[6]
+
+    @classmethod
+    def _group_objects_by_repo(
+        cls, repo_id_hashes: pd.Series, objects: pd.DataFrame
+    ) -> Dict[str, Dict[str, str]]:
+        """Groups the objects by repo.
+
+        The repos are factorized with pandas and the objects sorted by repo, so each
+        repo's objects are a contiguous slice. The only per-object Python work left is
+        filling the dictionary of each repo from its slice, which the return type
+        needs.
+
+        Args:
+            repo_id_hashes (pd.Series): The repoIdHash of each object, see
+                _get_repo_id_hashes.
+            objects (pd.DataFrame): Objects with the fileIdentifier and sha256
+                columns.
+
+        Returns:
+            Dict[str, Dict[str, str]]: Maps each repoIdHash to a dictionary of the
+                fileIdentifier to the sha256 of its objects.
+        """
+        # codes number the repos 0..n-1 in order of appearance
+        codes, unique_repo_id_hashes = pd.factorize(
+            repo_id_hashes, use_na_sentinel=False
+        )
+        order = codes.argsort(kind="stable")
+        sorted_codes = codes[order]
+        boundaries = ((sorted_codes[1:] != sorted_codes[:-1]).nonzero()[0] + 1).tolist()
+        starts = [0] + boundaries
+        ends = boundaries + [len(codes)]
+        file_identifiers = objects["fileIdentifier"].to_numpy()[order].tolist()
+        sha256s = objects["sha256"].to_numpy()[order].tolist()
+        return {
+            repo_id_hash: dict(zip(file_identifiers[start:end], sha256s[start:end]))
+            for repo_id_hash, start, end in zip(
+                unique_repo_id_hashes.tolist(), starts, ends
+            )
+        }
+
     @classmethod
     def _git_shallow_clone(cls, repo_url: str, target_directory: str) -> bool:
         """Helper function to shallow clone a repo with git.
@@ -96,6 +192,467 @@ class GitHubDownloader(ObjaverseSource):
             ["git", "clone", "--depth", "1", repo_url, target_directory],
         )
 
+    @classmethod
+    def _get_repo_path(cls, github_url: str) -> str:
+        """Returns the path of a file inside of its repo from its GitHub URL.
+
+        Args:
+            github_url (str): URL of the file, in the format of
+                https://github.com/{org}/{repo}/blob/{commit_hash}/{path}.
+
+        Returns:
+            str: The path of the file relative to the root of the repo.
+        """
+        return "/".join(github_url.split("/")[7:])
+
+    @classmethod
+    def _get_sparse_patterns(cls, expected_objects: Dict[str, str]) -> List[str]:
+        """Returns the sparse-checkout patterns of the expected objects.
+
+        The patterns match each expected object, the 3D and sidecar files (see
+        SIDECAR_EXTENSIONS) in its directory and in the directories below it, and the
+        .gitattributes file needed to detect LFS files. Objects at the root of the repo
+        only match sidecar files up to one directory deep, so that the whole repo is not
+        checked out.
+
+        Args:
+            expected_objects (Dict[str, str]): Dictionary of objects that one expects to
+                find in the repo, keyed by their GitHub URL.
+
+        Returns:
+            List[str]: Non-cone sparse-checkout patterns, anchored at the repo root.
+        """
+        extensions = FILE_EXTENSIONS + SIDECAR_EXTENSIONS
+        extensions = extensions + [ext.upper() for ext in extensions]
+
+        patterns = {"/.gitattributes"}
+        directories = set()
+        for github_url in expected_objects:
+            repo_path = cls._get_repo_path(github_url)
+            patterns.add(f"/{repo_path}")
+            directories.add(os.path.dirname(repo_path))
+        for directory in directories:
+            for ext in extensions:
+                if directory:
+                    patterns.add(f"/{directory}/**/*{ext}")
+                else:
+                    patterns.add(f"/*{ext}")
+                    patterns.add(f"/*/*{ext}")
+        return sorted(patterns)
+
+    @classmethod
+    def _git_sparse_clone(
+        cls, repo_url: str, target_directory: str, patterns: Sequence[str]
+    ) -> bool:
+        """Helper function to clone only the files matching patterns of a repo.
+
+        The clone is shallow and blob-less, so only the blobs of the files that are
+        checked out by the sparse-checkout patterns are downloaded.
+
+        Args:
+            repo_url (str): URL of the repo to clone.
+            target_directory (str): Directory to clone the repo to.
+            patterns (Sequence[str]): Non-cone sparse-checkout patterns of the files to
+                check out.
+
+        Returns:
+            bool: True if the clone was successful, False otherwise.
+        """
+        if not cls._run_command_with_check(
+            [
+                "git",
+                "clone",
+                "--depth",
+                "1",
+                "--filter=blob:none",
+                "--no-checkout",
+                repo_url,
+                target_directory,
+            ]
+        ):
+            return False
+
+        # write the patterns directly, which works on git versions without
+        # `git sparse-checkout set --no-cone`
+        if not cls._write_sparse_checkout(target_directory, patterns):
+            return False
+
+        # populate the index and the working tree, fetching only the matching blobs
+        return cls._run_command_with_check(
+            ["git", "read-tree", "-mu", "HEAD"], target_directory
+        )
+
+    @classmethod
+    def _write_sparse_checkout(cls, repo_dir: str, patterns: Sequence[str]) -> bool:
+        """Enables a non-cone sparse checkout of the patterns in a git repo.
+
+        The patterns are written directly, which works on git versions without
+        `git sparse-checkout set --no-cone`.
+
+        Args:
+            repo_dir (str): Directory of the git repo.
+            patterns (Sequence[str]): Non-cone sparse-checkout patterns.
+
+        Returns:
+            bool: True if the sparse checkout was enabled, False otherwise.
+        """
+        if not cls._run_command_with_check(
+            ["git", "config", "core.sparseCheckout", "true"], repo_dir
+        ):
+            return False
+        sparse_checkout_path = os.path.join(repo_dir, ".git", "info", "sparse-checkout")
+        os.makedirs(os.path.dirname(sparse_checkout_path), exist_ok=True)
+        with open(sparse_checkout_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(patterns) + "\n")
+        return True
+
+    @classmethod
+    def _git_fetch_commit(
+        cls,
+        repo_url: str,
+        target_directory: str,
+        commit_hash: str,
+        sparse_patterns: Optional[Sequence[str]] = None,
+    ) -> bool:
+        """Helper function to fetch and check out a single commit of a repo.
+
+        Unlike cloning the default branch and then fetching the commit, only the
+        commit is transferred. This needs the server to allow fetching by SHA, which
+        GitHub does.
+
+        Args:
+            repo_url (str): URL of the repo.
+            target_directory (str): Directory to fetch the repo to.
+            commit_hash (str): Full hash of the commit to check out.
+            sparse_patterns (Optional[Sequence[str]], optional): If not None, makes a
+                blob-less fetch and only checks out the files matching these non-cone
+                sparse-checkout patterns. Defaults to None.
+
+        Returns:
+            bool: True if the commit was checked out, False otherwise.
+        """
+        os.makedirs(target_directory, exist_ok=True)
+        if not cls._run_command_with_check(["git", "init"], target_directory):
+            return False
+        if not cls._run_command_with_check(
+            ["git", "remote", "add", "origin", repo_url], target_directory
+        ):
+            return False
+
+        fetch_command = ["git", "fetch", "--depth", "1"]
+        if sparse_patterns is not None:
+            if not cls._write_sparse_checkout(target_directory, sparse_patterns):
+                return False
+            fetch_command.append("--filter=blob:none")
+        if not cls._run_command_with_check(
+            fetch_command + ["origin", commit_hash], target_directory
+        ):
+            return False
+        return cls._run_command_with_check(
+            ["git", "checkout", "--detach", "FETCH_HEAD"], target_directory
+        )
+
+    @classmethod
+    def _get_dir_size(cls, root_dir: str) -> int:
+        """Returns the total size in bytes of the files in a directory."""
+        return sum(
+            os.path.getsize(file)
+            for file in cls._list_files(root_dir)
+            if not os.path.islink(file)
+        )
+
+    @classmethod
+    def _get_mirror_dir(cls, mirror_cache_dir: str, org: str, repo: str) -> str:
+        """Returns the directory of the bare mirror of a repo in the mirror cache."""
+        return os.path.join(os.path.expanduser(mirror_cache_dir), org, f"{repo}.git")
+
+    @classmethod
+    @contextmanager
+    def _mirror_lock(
+        cls,
+        mirror_dir: str,
+        blocking: bool = True,
+        shared: bool = False,
+        name: Literal["lock", "update.lock"] = "lock",
+    ) -> Iterator[bool]:
+        """Holds a lock on a mirror, shared across processes.
+
+        A mirror has two locks. Working copies hold "lock" shared for as long as they
+        borrow objects from the mirror, and eviction takes it exclusively, so a mirror
+        is never deleted while it is in use. "update.lock" is held exclusively while
+        commits are fetched into the mirror, so concurrent fetches don't collide.
+
+        Args:
+            mirror_dir (str): Directory of the bare mirror.
+            blocking (bool, optional): Whether to wait for the lock. Defaults to True.
+            shared (bool, optional): Whether to take the lock shared instead of
+                exclusive. Defaults to False.
+            name (Literal["lock", "update.lock"], optional): Which lock of the mirror
+                to take. Defaults to "lock".
+
+        Yields:
+            bool: True if the lock was acquired. Always True if blocking.
+        """
+        os.makedirs(os.path.dirname(mirror_dir), exist_ok=True)
+        with open(f"{mirror_dir}.{name}", "a", encoding="utf-8") as lock_file:
+            flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def _update_mirror(
+        cls, repo_url: str, mirror_dir: str, commit_hash: Optional[str]
+    ) -> Tuple[Optional[str], bool]:
+        """Makes sure that the mirror of a repo has a commit, fetching it if needed.
+
+        The mirror is a bare repo that only holds the commits that were requested, each
+        kept reachable by a refs/objaverse/<commit> ref. The caller must hold the
+        "update.lock" of the mirror.
+
+        Args:
+            repo_url (str): URL of the repo.
+            mirror_dir (str): Directory of the bare mirror.
+            commit_hash (Optional[str]): Commit to make available. If None, fetches the
+                HEAD of the default branch.
+
+        Returns:
+            Tuple[Optional[str], bool]: The hash of the available commit, or None if it
+                could not be fetched, and whether anything was fetched into the mirror.
+        """
+        if not os.path.exists(os.path.join(mirror_dir, "HEAD")):
+            os.makedirs(mirror_dir, exist_ok=True)
+            for command in (
+                ["git", "init", "--bare"],
+                ["git", "remote", "add", "origin", repo_url],
+                # never prune the commits, they are kept for later requests
+                ["git", "config", "gc.auto", "0"],
+            ):
+                if not cls._run_command_with_check(command, mirror_dir):
+                    shutil.rmtree(mirror_dir, ignore_errors=True)
+                    return None, False
+
+        if commit_hash is not None:
+            has_commit = subprocess.run(
+                ["git", "cat-file", "-e", f"{commit_hash}^{{commit}}"],
+                cwd=mirror_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            if has_commit.returncode == 0:
+                return commit_hash, False
+
+        fetched = commit_hash is not None and cls._run_command_with_check(
+            ["git", "fetch", "--depth", "1", "origin", commit_hash], mirror_dir
+        )
+        if not fetched:
+            # fall back to the default branch if the commit cannot be fetched by SHA
+            if not cls._run_command_with_check(
+                ["git", "fetch", "--depth", "1", "origin", "HEAD"], mirror_dir
+            ):
+                return None, False
+        result = subprocess.run(
+            ["git", "rev-parse", "FETCH_HEAD"],
+            cwd=mirror_dir,
+            capture_output=True,
+            check=True,
+        )
+        fetched_hash = result.stdout.strip().decode("utf-8")
+        cls._run_command_with_check(
+            ["git", "update-ref", f"refs/objaverse/{fetched_hash}", fetched_hash],
+            mirror_dir,
+        )
+        return fetched_hash, True
+
+    @classmethod
+    def _connect_mirror_index(cls, mirror_cache_dir: str) -> sqlite3.Connection:
+        """Opens the index of the mirror cache, building it on first use.
+
+        The index (mirrors.sqlite in the cache) records the size and last use of each
+        mirror when it is fetched into or evicted, so that eviction does not have to
+        walk the whole cache. Mirrors of a cache that has no index yet are scanned once.
+
+        Args:
+            mirror_cache_dir (str): Directory of the mirror cache.
+
+        Returns:
+            sqlite3.Connection: Connection to the index, with a mirrors table of
+                (mirror_dir, size, last_used) rows.
+        """
+        cache_dir = os.path.expanduser(mirror_cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        connection = sqlite3.connect(
+            os.path.join(cache_dir, "mirrors.sqlite"), timeout=60
+        )
+        # BEGIN IMMEDIATE so only one process builds the index
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            has_table = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mirrors'"
+            ).fetchone()
+            if has_table is None:
+                connection.execute(
+                    "CREATE TABLE mirrors (mirror_dir TEXT PRIMARY KEY, "
+                    "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+                )
+                mirror_dirs = glob.glob(os.path.join(cache_dir, "*", "*.git"))
+                connection.executemany(
+                    "INSERT INTO mirrors VALUES (?, ?, ?)",
+                    (
+                        (
+                            mirror_dir,
+                            cls._get_dir_size(mirror_dir),
+                            os.path.getmtime(mirror_dir),
+                        )
+                        for mirror_dir in mirror_dirs
+                    ),
+                )
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            connection.close()
+            raise
+        return connection
+
+    @classmethod
+    def _git_clone_from_mirror(
+        cls,
+        repo_url: str,
+        target_directory: str,
+        mirror_cache_dir: str,
+        mirror_dir: str,
+        commit_hash: Optional[str],
+        sparse_patterns: Optional[Sequence[str]] = None,
+    ) -> Tuple[bool, str, int]:
+        """Checks out a commit of a repo from its mirror in the mirror cache.
+
+        The commit is fetched into the mirror if it is not there yet. The working copy
+        borrows the objects of the mirror through .git/objects/info/alternates, like
+        `git clone --shared`, so nothing is copied. Its origin is repo_url, so LFS
+        files are pulled from the remote. The caller must hold the shared lock of the
+        mirror (see `_mirror_lock`) until the .git directory of the working copy is
+        removed, so that the mirror is not evicted while the working copy uses it.
+
+        The mirror always holds the full blobs of its commits, including with
+        fetch_mode="sparse". A sparse request that misses the cache therefore fetches
+        the whole commit, and in return every later request of the commit, sparse or
+        full, is served from disk. Only the checkout is sparse.
+
+        Args:
+            repo_url (str): URL of the repo.
+            target_directory (str): Directory to check the repo out to.
+            mirror_cache_dir (str): Directory of the mirror cache, where the size of
+                the mirror is recorded.
+            mirror_dir (str): Directory of the bare mirror.
+            commit_hash (Optional[str]): Commit to check out. If None, checks out the
+                HEAD of the default branch.
+            sparse_patterns (Optional[Sequence[str]], optional): If not None, only
+                checks out the files matching these non-cone sparse-checkout patterns.
+                Defaults to None.
+
+        Returns:
+            Tuple[bool, str, int]: Whether the checkout was successful, the fetch
+                method ("mirror" if served from disk, "mirror+fetch" otherwise), and
+                the number of bytes the mirror grew by.
+        """
+        with cls._mirror_lock(mirror_dir, name="update.lock"):
+            with closing(cls._connect_mirror_index(mirror_cache_dir)) as index:
+                row = index.execute(
+                    "SELECT size FROM mirrors WHERE mirror_dir = ?", (mirror_dir,)
+                ).fetchone()
+            available_hash, fetched = cls._update_mirror(
+                repo_url, mirror_dir, commit_hash
+            )
+            if available_hash is None:
+                return False, "mirror+fetch", 0
+            # only walk the mirror when it changed or was never recorded
+            if fetched or row is None:
+                size = cls._get_dir_size(mirror_dir)
+            else:
+                size = row[0]
+            size_before = row[0] if row is not None else 0
+            bytes_fetched = size - size_before if fetched else 0
+            method = "mirror+fetch" if fetched else "mirror"
+
+            # mark the mirror as recently used for the LRU eviction
+            os.utime(mirror_dir)
+            with closing(cls._connect_mirror_index(mirror_cache_dir)) as index:
+                with index:
+                    index.execute(
+                        "INSERT OR REPLACE INTO mirrors VALUES (?, ?, ?)",
+                        (mirror_dir, size, time.time()),
+                    )
+
+            # `git clone --shared` does not set up the alternates when the mirror has
+            # no branches, so set them up by hand
+            os.makedirs(target_directory, exist_ok=True)
+            if not cls._run_command_with_check(
+                ["git", "init"], target_directory
+            ) or not cls._run_command_with_check(
+                ["git", "remote", "add", "origin", repo_url], target_directory
+            ):
+                return False, method, bytes_fetched
+            alternates_path = os.path.join(
+                target_directory, ".git", "objects", "info", "alternates"
+            )
+            os.makedirs(os.path.dirname(alternates_path), exist_ok=True)
+            with open(alternates_path, "w", encoding="utf-8") as f:
+                f.write(os.path.abspath(os.path.join(mirror_dir, "objects")) + "\n")
+            if sparse_patterns is not None and not cls._write_sparse_checkout(
+                target_directory, sparse_patterns
+            ):
+                return False, method, bytes_fetched
+            success = cls._run_command_with_check(
+                ["git", "checkout", "--detach", available_hash], target_directory
+            )
+        return success, method, bytes_fetched
+
+    @classmethod
+    def _evict_mirrors(cls, mirror_cache_dir: str, max_bytes: int) -> None:
+        """Deletes the least recently used mirrors until the cache fits in max_bytes.
+
+        Sizes come from the index of the cache (see `_connect_mirror_index`), so the
+        cache is not walked. Mirrors that are in use by a working copy of any process
+        are skipped.
+
+        Args:
+            mirror_cache_dir (str): Directory of the mirror cache.
+            max_bytes (int): Maximum total size of the mirrors in bytes.
+
+        Returns:
+            None
+        """
+        with closing(cls._connect_mirror_index(mirror_cache_dir)) as index:
+            (total_size,) = index.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM mirrors"
+            ).fetchone()
+            if total_size <= max_bytes:
+                return
+            mirrors = index.execute(
+                "SELECT mirror_dir, size FROM mirrors ORDER BY last_used"
+            ).fetchall()
+            for mirror_dir, size in mirrors:
+                if total_size <= max_bytes:
+                    break
+                with cls._mirror_lock(mirror_dir, blocking=False) as acquired:
+                    if not acquired:
+                        continue
+                    logger.debug(f"Evicting {mirror_dir} from the mirror cache")
+                    shutil.rmtree(mirror_dir, ignore_errors=True)
+                    with index:
+                        index.execute(
+                            "DELETE FROM mirrors WHERE mirror_dir = ?", (mirror_dir,)
+                        )
+                total_size -= size
+
     @classmethod
     def _run_command_with_check(
         cls, command: List[str], cwd: Optional[str] = None
@@ -131,13 +688,21 @@ class GitHubDownloader(ObjaverseSource):
         repo_id: str,
         fs: fsspec.AbstractFileSystem,
         base_dir: str,
-        save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "files"]],
+        save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]],
         expected_objects: Dict[str, str],
         handle_found_object: Optional[Callable],
         handle_modified_object: Optional[Callable],
         handle_missing_object: Optional[Callable],
         handle_new_object: Optional[Callable],
         commit_hash: Optional[str],
+        fetch_mode: Literal["full", "sparse"] = "full",
+        hash_only_expected: bool = False,
+        hash_workers: Optional[int] = 4,
+        mirror_cache_dir: Optional[str] = None,
+        mirror_cache_max_bytes: Optional[int] = None,
+        handler_queue: Optional["multiprocessing.Queue"] = None,
+        staging_dir: Optional[str] = None,
+        manifest: Optional[Manifest] = None,
     ) -> Dict[str, str]:
         """Process a single repo.
 
@@ -148,6 +713,28 @@ class GitHubDownloader(ObjaverseSource):
             expected_objects (Dict[str, str]): Dictionary of objects that one expects to
                 find in the repo. Keys are the "fileIdentifier" (i.e., the GitHub URL in
                 this case) and values are the "sha256" of the objects.
+            fetch_mode (Literal["full", "sparse"], optional): "full" clones the whole
+                repo. "sparse" makes a blob-less clone that only checks out, and pulls
+                the LFS files of, the expected objects and their sidecar files.
+                Defaults to "full".
+            hash_only_expected (bool, optional): Whether to only hash the files that
+                are in expected_objects. Defaults to False.
+            hash_workers (Optional[int], optional): Number of threads used to hash
+                the files of the repo. Defaults to 4.
+            mirror_cache_dir (Optional[str], optional): Local directory of the bare
+                repo mirror cache. If None, the repo is fetched from the network.
+                Defaults to None.
+            mirror_cache_max_bytes (Optional[int], optional): Size cap of the mirror
+                cache. Least recently used mirrors are evicted above it. If None, the
+                cache is not capped. Defaults to None.
+            handler_queue (Optional[multiprocessing.Queue], optional): If not None,
+                found and modified objects are staged in staging_dir and put on this
+                queue for the handler processes, instead of being handled here.
+                Defaults to None.
+            staging_dir (Optional[str], optional): Directory of the staging area used
+                with handler_queue. Defaults to None.
+            manifest (Optional[Manifest], optional): If not None, the saved repo is
+                recorded in it. Defaults to None.
             {and the rest of the args are the same as download_objects}
 
         Returns:
@@ -158,12 +745,63 @@ class GitHubDownloader(ObjaverseSource):
         org, repo = repo_id.split("/")
 
         out = {}
-        with tempfile.TemporaryDirectory() as temp_dir:
+        with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as mirror_locks:
             # clone the repo to a temp directory
             target_directory = os.path.join(temp_dir, repo)
-            successful_clone = cls._git_shallow_clone(
-                f"https://githubfast.com/{org}/{repo}.git", target_directory
-            )
+            repo_url = f"https://githubfast.com/{org}/{repo}.git"
+            sparse_patterns = None
+            if fetch_mode == "sparse":
+                sparse_patterns = cls._get_sparse_patterns(expected_objects)
+            elif fetch_mode != "full":
+                raise ValueError(
+                    f"fetch_mode must be one of full, sparse. Got {fetch_mode}"
+                )
+
+            # fetch the pinned commit directly, and only fall back to cloning the
+            # default branch if the server refuses to fetch it by SHA
+            successful_clone = False
+            fetch_method = "clone"
+            mirror_bytes_fetched = 0
+            if mirror_cache_dir is not None:
+                mirror_dir = cls._get_mirror_dir(mirror_cache_dir, org, repo)
+                # the working copy borrows the objects of the mirror until its .git
+                # directory is removed, so keep the mirror from being evicted until then
+                mirror_locks.enter_context(cls._mirror_lock(mirror_dir, shared=True))
+                (
+                    successful_clone,
+                    fetch_method,
+                    mirror_bytes_fetched,
+                ) = cls._git_clone_from_mirror(
+                    repo_url,
+                    target_directory,
+                    mirror_cache_dir,
+                    mirror_dir,
+                    commit_hash,
+                    sparse_patterns,
+                )
+                if not successful_clone:
+                    shutil.rmtree(target_directory, ignore_errors=True)
+            elif commit_hash is not None:
+                successful_clone = cls._git_fetch_commit(
+                    repo_url, target_directory, commit_hash, sparse_patterns
+                )
+                if successful_clone:
+                    fetch_method = "commit"
+                else:
+                    logger.debug(
+                        f"Could not fetch {commit_hash=} of {repo_id} directly. "
+                        "Cloning instead."
+                    )
+                    shutil.rmtree(target_directory, ignore_errors=True)
+            if not successful_clone and fetch_method == "clone":
+                if sparse_patterns is not None:
+                    successful_clone = cls._git_sparse_clone(
+                        repo_url, target_directory, sparse_patterns
+                    )
+                else:
+                    successful_clone = cls._git_shallow_clone(
+                        repo_url, target_directory
+                    )
             if not successful_clone:
                 logger.error(f"Could not clone {repo_id}")
                 if handle_missing_object is not None:
@@ -202,13 +840,21 @@ class GitHubDownloader(ObjaverseSource):
                             ["git", "checkout", commit_hash], target_directory
                         ):
                             repo_commit_hash = commit_hash
+                            fetch_method = "clone+fetch"
                         else:
                             logger.error(
                                 f"Error in git checkout! Sticking with {repo_commit_hash=} instead of {commit_hash=}"
                             )
 
             # pull the lfs files
-            cls._pull_lfs_files(target_directory)
+            if sparse_patterns is not None:
+                # `git lfs pull --include` takes paths relative to the repo root
+                cls._pull_lfs_files(
+                    target_directory,
+                    include=[pattern.lstrip("/") for pattern in sparse_patterns],
+                )
+            else:
+                cls._pull_lfs_files(target_directory)
 
             # get all the files in the repo
             files = cls._list_files(target_directory)
@@ -218,41 +864,59 @@ class GitHubDownloader(ObjaverseSource):
                 if any(file.lower().endswith(ext) for ext in FILE_EXTENSIONS)
             ]
 
-            # get the sha256 for each file
-            file_hashes = []
-            for file in tqdm(files_with_3d_extension, desc="Handling 3D object files"):
-                file_hash = get_file_hash(file)
-                # remove the temp_dir from the file path
-                github_url = file.replace(
+            # remove the temp_dir from the file paths
+            github_urls = {
+                file: file.replace(
                     target_directory,
                     f"https://githubfast.com/{org}/{repo}/blob/{repo_commit_hash}",
                 )
+                for file in files_with_3d_extension
+            }
+            if hash_only_expected:
+                files_with_3d_extension = [
+                    file
+                    for file in files_with_3d_extension
+                    if github_urls[file] in expected_objects
+                ]
+
+            # get the sha256 for each file, hashing several files at once
+            hashes = get_file_hashes(files_with_3d_extension, max_workers=hash_workers)
+            file_hashes = []
+            for file in tqdm(files_with_3d_extension, desc="Handling 3D object files"):
+                file_hash = hashes[file]
+                github_url = github_urls[file]
                 file_hashes.append(dict(sha256=file_hash, fileIdentifier=github_url))
 
                 # handle the object under different conditions
                 if github_url in expected_objects:
                     out[github_url] = file[len(target_directory) + 1 :]
                     if expected_objects[github_url] == file_hash:
-                        if handle_found_object is not None:
-                            handle_found_object(
-                                local_path=file,
-                                file_identifier=github_url,
-                                sha256=file_hash,
-                                metadata=dict(
-                                    github_organization=org, github_repo=repo
-                                ),
-                            )
+                        kind, handler = "found", handle_found_object
+                        handler_kwargs = dict(
+                            local_path=file,
+                            file_identifier=github_url,
+                            sha256=file_hash,
+                            metadata=dict(github_organization=org, github_repo=repo),
+                        )
                     else:
-                        if handle_modified_object is not None:
-                            handle_modified_object(
-                                local_path=file,
-                                file_identifier=github_url,
-                                new_sha256=file_hash,
-                                old_sha256=expected_objects[github_url],
-                                metadata=dict(
-                                    github_organization=org, github_repo=repo
-                                ),
-                            )
+                        kind, handler = "modified", handle_modified_object
+                        handler_kwargs = dict(
+                            local_path=file,
+                            file_identifier=github_url,
+                            new_sha256=file_hash,
+                            old_sha256=expected_objects[github_url],
+                            metadata=dict(github_organization=org, github_repo=repo),
+                        )
+                    if handler is not None and handler_queue is not None:
+                        # blocks while the queue is full, which bounds the staged
+                        # objects waiting on disk
+                        staged_path, stage_dir = cls._stage_object(
+                            file, target_directory, staging_dir
+                        )
+                        handler_kwargs["local_path"] = staged_path
+                        handler_queue.put((kind, stage_dir, handler_kwargs))
+                    elif handler is not None:
+                        handler(**handler_kwargs)
                 elif handle_new_object is not None:
                     handle_new_object(
                         local_path=file,
@@ -269,41 +933,47 @@ class GitHubDownloader(ObjaverseSource):
             ) as f:
                 json.dump(file_hashes, f, indent=2)
 
-            # remove the .git directory
+            # record how the repo was fetched, with the size of the git objects (and
+            # LFS files) as an estimate of the bytes transferred
+            fetch_info = dict(
+                method=fetch_method,
+                fetch_mode=fetch_mode,
+                commit_hash=repo_commit_hash,
+                bytes_fetched=mirror_bytes_fetched
+                + cls._get_dir_size(os.path.join(target_directory, ".git")),
+            )
+            logger.info(
+                f"Fetched {repo_id} with {fetch_method} ({fetch_mode}): "
+                f"{fetch_info['bytes_fetched'] / 1e6:.2f} MB"
+            )
+            with open(
+                os.path.join(target_directory, ".objaverse-fetch-info.json"),
+                "w",
+                encoding="utf-8",
+            ) as f:
+                json.dump(fetch_info, f, indent=2)
+
+            # remove the .git directory, which no longer needs the mirror
             shutil.rmtree(os.path.join(target_directory, ".git"))
+            mirror_locks.close()
 
             if save_repo_format is None:
                 # remove the paths, since it's not downloaded
                 out = {}
             else:
                 logger.debug(f"Saving {org}/{repo} as {save_repo_format}")
-                # save the repo to a zip file
-                if save_repo_format == "zip":
-                    shutil.make_archive(target_directory, "zip", target_directory)
-                elif save_repo_format == "tar":
-                    with tarfile.open(
-                        os.path.join(temp_dir, f"{repo}.tar"), "w"
-                    ) as tar:
-                        tar.add(target_directory, arcname=repo)
-                elif save_repo_format == "tar.gz":
-                    with tarfile.open(
-                        os.path.join(temp_dir, f"{repo}.tar.gz"), "w:gz"
-                    ) as tar:
-                        tar.add(target_directory, arcname=repo)
-                elif save_repo_format == "files":
-                    pass
-                else:
+                if save_repo_format not in ARCHIVE_FORMATS + ["files"]:
                     raise ValueError(
-                        f"save_repo_format must be one of zip, tar, tar.gz, files. Got {save_repo_format}"
+                        f"save_repo_format must be one of zip, tar, tar.gz, tar.zst, files. Got {save_repo_format}"
                     )
 
                 dirname = os.path.join(base_dir, "repos", org)
                 fs.makedirs(dirname, exist_ok=True)
                 if save_repo_format != "files":
-                    # move the repo to the correct location (with put)
-                    fs.put(
-                        os.path.join(temp_dir, f"{repo}.{save_repo_format}"),
-                        os.path.join(dirname, f"{repo}.{save_repo_format}"),
+                    # stream the archive straight to the correct location
+                    saved_path = os.path.join(dirname, f"{repo}.{save_repo_format}")
+                    cls._write_repo_archive(
+                        target_directory, repo, save_repo_format, fs, saved_path
                     )
 
                     for file_identifier in out.copy():
@@ -312,6 +982,7 @@ class GitHubDownloader(ObjaverseSource):
                         )
                 else:
                     # move the repo to the correct location (with put)
+                    saved_path = os.path.join(dirname, repo)
                     fs.put(target_directory, dirname, recursive=True)
 
                     for file_identifier in out.copy():
@@ -319,6 +990,13 @@ class GitHubDownloader(ObjaverseSource):
                             dirname, repo, out[file_identifier]
                         )
 
+                if manifest is not None:
+                    manifest.add(
+                        cls.get_manifest_namespace(save_repo_format),
+                        repo_id,
+                        saved_path,
+                    )
+
         # get each object that was missing from the expected objects
         if handle_missing_object is not None:
             obtained_urls = {x["fileIdentifier"] for x in file_hashes}
@@ -330,8 +1008,182 @@ class GitHubDownloader(ObjaverseSource):
                         metadata=dict(github_organization=org, github_repo=repo),
                     )
 
+        if mirror_cache_dir is not None and mirror_cache_max_bytes is not None:
+            cls._evict_mirrors(mirror_cache_dir, mirror_cache_max_bytes)
+
         return out
 
+    @classmethod
+    def _write_repo_archive(
+        cls,
+        repo_directory: str,
+        repo: str,
+        save_repo_format: Literal["zip", "tar", "tar.gz", "tar.zst"],
+        fs: fsspec.AbstractFileSystem,
+        path: str,
+    ) -> None:
+        """Archives a repo directly into a file opened with fs.
+
+        The archive is written as a stream, so it never takes up local disk space and
+        the repo is only read once. If writing fails, the partial archive is removed.
+
+        Args:
+            repo_directory (str): Local directory of the repo to archive.
+            repo (str): Name of the repo, used as the root directory of tar archives.
+                Zip archives have the files of the repo at their root.
+            save_repo_format (Literal["zip", "tar", "tar.gz", "tar.zst"]): Format of
+                the archive. "tar.zst" needs the zstandard package and compresses
+                with multiple threads.
+            fs (fsspec.AbstractFileSystem): File system to write the archive to.
+            path (str): Path of the archive on fs.
+
+        Returns:
+            None
+        """
+        try:
+            with fs.open(path, "wb") as f:
+                if save_repo_format == "zip":
+                    # zipfile writes data descriptors when f is not seekable
+                    with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                        for root, dirs, files in os.walk(repo_directory):
+                            dirs.sort()
+                            for name in dirs + sorted(files):
+                                file_path = os.path.join(root, name)
+                                zip_file.write(
+                                    file_path,
+                                    os.path.relpath(file_path, repo_directory),
+                                )
+                elif save_repo_format == "tar.zst":
+                    try:
+                        import zstandard
+                    except ImportError as e:
+                        raise ImportError(
+                            'save_repo_format="tar.zst" requires the zstandard package'
+                        ) from e
+                    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+                    with compressor.stream_writer(f, closefd=False) as writer:
+                        with tarfile.open(fileobj=writer, mode="w|") as tar:
+                            tar.add(repo_directory, arcname=repo)
+                else:
+                    # "w|" and "w|gz" write the tar as a stream, without seeking
+                    mode = "w|gz" if save_repo_format == "tar.gz" else "w|"
+                    with tarfile.open(fileobj=f, mode=mode) as tar:
+                        tar.add(repo_directory, arcname=repo)
+        except BaseException:
+            if fs.exists(path):
+                fs.rm(path)
+            raise
+
+    @classmethod
+    def _stage_object(
+        cls, file: str, repo_directory: str, staging_dir: str
+    ) -> Tuple[str, str]:
+        """Hard-links an object and its sidecar files into the staging area.
+
+        Only the object and the sidecar files (see SIDECAR_EXTENSIONS) it may reference
+        are staged, selected like the sparse checkout of `_get_sparse_patterns`: those
+        in the directory of the object and the directories below it, or only one
+        directory deep for objects at the root of the repo. They keep their paths
+        relative to the object. Files are hard-linked when possible, which costs no
+        extra disk space, and copied otherwise (see `_can_hard_link`).
+
+        Args:
+            file (str): Path to the object inside of the cloned repo.
+            repo_directory (str): Root directory of the cloned repo.
+            staging_dir (str): Directory of the staging area.
+
+        Returns:
+            Tuple[str, str]: The path to the staged object, and the staging directory
+                of the object, to be deleted once it is handled.
+        """
+        stage_dir = tempfile.mkdtemp(dir=staging_dir)
+        source_dir = os.path.dirname(file)
+        relative_dir = os.path.relpath(source_dir, repo_directory)
+        destination_dir = os.path.normpath(os.path.join(stage_dir, relative_dir))
+        sidecar_extensions = tuple(SIDECAR_EXTENSIONS)
+
+        staged_files = [file]
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = [d for d in dirs if d != ".git"]
+            # objects at the root of the repo only get sidecars one directory deep
+            if source_dir == repo_directory and root != source_dir:
+                dirs[:] = []
+            staged_files.extend(
+                os.path.join(root, f)
+                for f in files
+                if f.lower().endswith(sidecar_extensions)
+            )
+
+        for src in staged_files:
+            dst = os.path.join(destination_dir, os.path.relpath(src, source_dir))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            try:
+                os.link(src, dst)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copy2(src, dst)
+        return os.path.join(destination_dir, os.path.basename(file)), stage_dir
+
+    @classmethod
+    def _can_hard_link(cls, source_dir: str, destination_dir: str) -> bool:
+        """Returns whether files of source_dir can be hard-linked into destination_dir.
+
+        Args:
+            source_dir (str): Directory the files are linked from.
+            destination_dir (str): Directory the files are linked into.
+
+        Returns:
+            bool: True if a test file could be hard-linked.
+        """
+        with tempfile.NamedTemporaryFile(dir=source_dir) as source_file:
+            destination = os.path.join(
+                destination_dir, os.path.basename(source_file.name)
+            )
+            try:
+                os.link(source_file.name, destination)
+            except OSError:
+                return False
+            os.remove(destination)
+            return True
+
+    @classmethod
+    def _handler_worker(
+        cls,
+        handler_queue: "multiprocessing.Queue",
+        handle_found_object: Optional[Callable],
+        handle_modified_object: Optional[Callable],
+    ) -> None:
+        """Calls the object handlers on the staged objects until it receives None.
+
+        Note: This function is run in the handler processes of download_objects. It is
+        not intended to be called directly.
+
+        Args:
+            handler_queue (multiprocessing.Queue): Queue of staged objects, with items
+                of the form (kind, stage_dir, handler_kwargs), where kind is "found" or
+                "modified".
+            handle_found_object (Optional[Callable]): See download_objects.
+            handle_modified_object (Optional[Callable]): See download_objects.
+
+        Returns:
+            None
+        """
+        handlers = dict(found=handle_found_object, modified=handle_modified_object)
+        while True:
+            item = handler_queue.get()
+            if item is None:
+                break
+            kind, stage_dir, handler_kwargs = item
+            try:
+                handlers[kind](**handler_kwargs)
+            except Exception:
+                logger.exception(
+                    f"Error handling {kind} object {handler_kwargs['file_identifier']}"
+                )
+            finally:
+                shutil.rmtree(stage_dir, ignore_errors=True)
+
     @classmethod
     def _list_files(cls, root_dir: str) -> List[str]:
         return [
@@ -341,9 +1193,14 @@ class GitHubDownloader(ObjaverseSource):
         ]
 
     @classmethod
-    def _pull_lfs_files(cls, repo_dir: str) -> None:
+    def _pull_lfs_files(
+        cls, repo_dir: str, include: Optional[Sequence[str]] = None
+    ) -> None:
         if cls._has_lfs_files(repo_dir):
-            subprocess.run(["git", "lfs", "pull"], cwd=repo_dir, check=True)
+            command = ["git", "lfs", "pull"]
+            if include is not None:
+                command.append(f"--include={','.join(include)}")
+            subprocess.run(command, cwd=repo_dir, check=True)
 
     @classmethod
     def _has_lfs_files(cls, repo_dir: str) -> bool:
@@ -369,6 +1226,49 @@ class GitHubDownloader(ObjaverseSource):
         commit_hash = result.stdout.strip().decode("utf-8")
         return commit_hash
 
+    @classmethod
+    def get_manifest_namespace(
+        cls, save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]]
+    ) -> str:
+        """Returns the manifest namespace of the repos saved with save_repo_format."""
+        return f"github/repos/{save_repo_format}"
+
+    @classmethod
+    def scan_downloaded_repos(
+        cls,
+        download_dir: str,
+        save_repo_format: Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]],
+    ) -> Dict[str, str]:
+        """Lists the repos saved in download_dir by globbing the file system.
+
+        Args:
+            download_dir (str): The base directory the repos were downloaded to.
+            save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]]): The
+                format the repos were saved in.
+
+        Returns:
+            Dict[str, str]: Maps the "{org}/{repo}" to the path of each saved repo.
+        """
+        base_download_dir = os.path.join(download_dir, "github")
+        fs, _ = fsspec.core.url_to_fs(base_download_dir)
+
+        # Getting immediate subdirectories of root_path
+        downloaded_repos = {}
+        if save_repo_format == "files":
+            downloaded_repo_dirs = fs.glob(base_download_dir + "/repos/*/*/")
+            for x in downloaded_repo_dirs:
+                downloaded_repos["/".join(x.split("/")[-2:])] = x
+        else:
+            downloaded_repo_dirs = fs.glob(
+                base_download_dir + f"/repos/*/*.{save_repo_format}"
+            )
+            for x in downloaded_repo_dirs:
+                org, repo = x.split("/")[-2:]
+                repo = repo[: -len(f".{save_repo_format}")]
+                repo_id = f"{org}/{repo}"
+                downloaded_repos[repo_id] = x
+        return downloaded_repos
+
     @classmethod
     def _parallel_process_repo(cls, args) -> Dict[str, str]:
         """Helper function to process a repo in parallel.
@@ -394,6 +1294,14 @@ class GitHubDownloader(ObjaverseSource):
             handle_modified_object,
             handle_missing_object,
             handle_new_object,
+            fetch_mode,
+            hash_only_expected,
+            hash_workers,
+            mirror_cache_dir,
+            mirror_cache_max_bytes,
+            manifest,
+            handler_queue,
+            staging_dir,
         ) = args
         repo_id = "/".join(repo_id_hash.split("/")[:2])
         commit_hash = repo_id_hash.split("/")[2]
@@ -408,12 +1316,117 @@ class GitHubDownloader(ObjaverseSource):
             handle_missing_object=handle_missing_object,
             handle_new_object=handle_new_object,
             commit_hash=commit_hash,
+            fetch_mode=fetch_mode,
+            hash_only_expected=hash_only_expected,
+            hash_workers=hash_workers,
+            mirror_cache_dir=mirror_cache_dir,
+            mirror_cache_max_bytes=mirror_cache_max_bytes,
+            handler_queue=handler_queue,
+            staging_dir=staging_dir,
+            manifest=manifest,
         )
 
     @classmethod
-    def _process_group(cls, group):
-        key, group_df = group
-        return key, group_df.set_index("fileIdentifier")["sha256"].to_dict()
+    def _parallel_process_repo_with_count(cls, args) -> Tuple[int, Dict[str, str]]:
+        # also returns the number of expected objects, which are done with the repo
+        return len(args[4]), cls._parallel_process_repo(args)
+
+    @classmethod
+    def _imap_repos(
+        cls,
+        pool: Pool,
+        all_args: List[Tuple],
+        progress_callback: Optional[Callable[[int], None]],
+    ) -> List[Dict[str, str]]:
+        """Processes the repos on the pool while reporting the progress.
+
+        Args:
+            pool (Pool): Pool of the download processes.
+            all_args (List[Tuple]): Arguments of _parallel_process_repo for each repo.
+            progress_callback (Optional[Callable[[int], None]]): See download_objects.
+                If None, a progress bar of the repos is shown instead.
+
+        Returns:
+            List[Dict[str, str]]: The output of _parallel_process_repo for each repo.
+        """
+        out = []
+        for num_objects, repo_out in tqdm(
+            pool.imap_unordered(cls._parallel_process_repo_with_count, all_args),
+            total=len(all_args),
+            desc="Downloading repositories",
+            disable=progress_callback is not None,
+        ):
+            out.append(repo_out)
+            if progress_callback is not None:
+                progress_callback(num_objects)
+        return out
+
+    @classmethod
+    def _download_with_handler_queue(
+        cls,
+        all_args: List[tuple],
+        processes: int,
+        handle_found_object: Optional[Callable],
+        handle_modified_object: Optional[Callable],
+        handler_queue_size: int,
+        handler_processes: int,
+        staging_dir: Optional[str],
+        progress_callback: Optional[Callable[[int], None]] = None,
+        mp_context: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """Processes the repos while separate processes handle the found objects.
+
+        Args:
+            all_args (List[tuple]): Arguments of _parallel_process_repo for each repo,
+                without the handler queue and staging directory.
+            processes (int): Number of download processes.
+            handle_found_object (Optional[Callable]): See download_objects.
+            handle_modified_object (Optional[Callable]): See download_objects.
+            handler_queue_size (int): Maximum number of staged objects in the queue.
+            handler_processes (int): Number of handler processes.
+            staging_dir (Optional[str]): Directory of the staging area. If None, a
+                temporary directory is used.
+            progress_callback (Optional[Callable[[int], None]], optional): See
+                download_objects. Defaults to None.
+            mp_context (Optional[str], optional): See download_objects. Defaults to
+                None.
+
+        Returns:
+            List[Dict[str, str]]: The output of _parallel_process_repo for each repo.
+        """
+        staging_root = tempfile.mkdtemp(prefix="objaverse-staging-", dir=staging_dir)
+        # the repos are cloned into the default temporary directory
+        if not cls._can_hard_link(tempfile.gettempdir(), staging_root):
+            logger.warning(
+                f"Cannot hard-link from {tempfile.gettempdir()} into {staging_root}, "
+                "e.g. because they are on different file systems. Staged objects and "
+                "their sidecar files will be copied instead."
+            )
+        context = multiprocessing.get_context(mp_context)
+        with context.Manager() as manager:
+            handler_queue = manager.Queue(maxsize=handler_queue_size)
+            handler_workers = [
+                context.Process(
+                    target=cls._handler_worker,
+                    args=(handler_queue, handle_found_object, handle_modified_object),
+                )
+                for _ in range(handler_processes)
+            ]
+            for worker in handler_workers:
+                worker.start()
+
+            try:
+                all_args = [args + (handler_queue, staging_root) for args in all_args]
+                with context.Pool(processes=processes) as pool:
+                    out = cls._imap_repos(pool, all_args, progress_callback)
+            finally:
+                # let the handlers finish the queued objects, then stop them
+                for _ in handler_workers:
+                    handler_queue.put(None)
+                for worker in handler_workers:
+                    worker.join()
+                shutil.rmtree(staging_root, ignore_errors=True)
+        return out
 
     @classmethod
     def download_objects(
@@ -476,11 +1489,12 @@ class GitHubDownloader(ObjaverseSource):
                 - metadata (Dict[str, Any]): Metadata about the 3D object, including the
                     GitHub organization and repo names.
                 Return is not used. Defaults to None.
-            save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "files"]],
+            save_repo_format (Optional[Literal["zip", "tar", "tar.gz", "tar.zst", "files"]],
                 optional): Format to save the repository. If None, the repository will
                 not be saved. If "files" is specified, each file will be saved
                 individually. Otherwise, the repository can be saved as a "zip", "tar",
-                or "tar.gz" file. Defaults to None.
+                "tar.gz" or "tar.zst" file, which is streamed directly to download_dir.
+                "tar.zst" needs the zstandard package. Defaults to None.
             handle_new_object (Optional[Callable], optional): Called when a new object
                 is found. Here, the object is not used in Objaverse-XL, but is still
                 downloaded with the repository. The object may have not been used
@@ -493,6 +1507,63 @@ class GitHubDownloader(ObjaverseSource):
                 - metadata (Dict[str, Any]): Metadata about the 3D object, including the
                     GitHub organization and repo names.
                 Return is not used. Defaults to None.
+            fetch_mode (Literal["full", "sparse"], optional): How to fetch each repo.
+                "full" shallow clones the whole repo. "sparse" makes a shallow,
+                blob-less clone with a sparse checkout of only the expected objects and
+                the sidecar files (materials, buffers, textures) in their directories,
+                and only pulls their LFS files. With "sparse", handle_new_object is only
+                called for the other 3D objects in those directories, and the saved
+                repo only contains the checked out files. Defaults to "full".
+            hash_only_expected (bool, optional): Whether to only hash the 3D files whose
+                GitHub URL is in objects. The other 3D files of the repo are then not
+                passed to handle_new_object. Defaults to False.
+            hash_workers (Optional[int], optional): Number of threads used to hash
+                the files of each repo. Defaults to 4.
+            mirror_cache_dir (Optional[str], optional): Local directory of a persistent
+                cache of bare repo mirrors, keyed by org/repo. Each requested commit is
+                fetched into the mirror once, and later requests for it (any subset or
+                fetch_mode) are checked out from disk with `git clone --shared`. The
+                mirror holds full blobs even with fetch_mode="sparse", so a sparse
+                request that misses the cache fetches the whole commit. LFS files are
+                still pulled from the remote. If None, every repo is fetched from the
+                network. Defaults to None.
+            mirror_cache_max_bytes (Optional[int], optional): Size cap of the mirror
+                cache in bytes. After each repo, the least recently used mirrors are
+                evicted until the cache fits, using the sizes recorded in the
+                mirrors.sqlite index of the cache. If None, the cache is not capped.
+                Defaults to None.
+            handler_queue_size (Optional[int], optional): If not None, found and
+                modified objects are not handled inside of the download processes.
+                Instead, each object and its sidecar files are hard-linked (or copied)
+                into a staging area and put on a queue of at most handler_queue_size objects,
+                which handler_processes separate processes consume. Downloads block
+                while the queue is full, so slow handlers (e.g. rendering) do not keep
+                repo checkouts around and the staging area stays bounded. Defaults to
+                None.
+            handler_processes (int, optional): Number of processes that call
+                handle_found_object and handle_modified_object with handler_queue_size.
+                Defaults to 1.
+            staging_dir (Optional[str], optional): Local directory of the staging area
+                used with handler_queue_size. Hard links need it on the same file system
+                as the temporary clones, otherwise a warning is logged and the staged
+                files are copied. If None, a temporary directory is used. Defaults to
+                None.
+            use_manifest (bool, optional): Whether to look up the repos that are
+                already downloaded in a SQLite manifest instead of globbing
+                download_dir, and to record each saved repo in it. The first run scans
+                download_dir once to build the manifest. Use `objaverse.manifest
+                reconcile` to rebuild it after changing download_dir by other means.
+                Defaults to False.
+            manifest_path (Optional[str], optional): Local path of the manifest. If
+                None, uses `objaverse.manifest.get_manifest_path(download_dir)`.
+                Defaults to None.
+            progress_callback (Optional[Callable[[int], None]], optional): If not
+                None, called with the number of objects finished each time a repo
+                finishes downloading, and the progress bar of this source is hidden.
+                Defaults to None.
+            mp_context (Optional[str], optional): Start method of the download and
+                handler processes, e.g. "spawn" or "forkserver". If None, uses the
+                default start method of the platform. Defaults to None.
 
         Raises:
             ValueError: If download_dir is None and save_repo_format is not None.
@@ -504,6 +1575,18 @@ class GitHubDownloader(ObjaverseSource):
         """
         save_repo_format = kwargs.get("save_repo_format", None)
         handle_new_object = kwargs.get("handle_new_object", None)
+        fetch_mode = kwargs.get("fetch_mode", "full")
+        hash_only_expected = kwargs.get("hash_only_expected", False)
+        hash_workers = kwargs.get("hash_workers", 4)
+        mirror_cache_dir = kwargs.get("mirror_cache_dir", None)
+        mirror_cache_max_bytes = kwargs.get("mirror_cache_max_bytes", None)
+        handler_queue_size = kwargs.get("handler_queue_size", None)
+        handler_processes = kwargs.get("handler_processes", 1)
+        staging_dir = kwargs.get("staging_dir", None)
+        use_manifest = kwargs.get("use_manifest", False)
+        manifest_path = kwargs.get("manifest_path", None)
+        progress_callback = kwargs.get("progress_callback", None)
+        mp_context = kwargs.get("mp_context", None)
 
         if processes is None:
             processes = multiprocessing.cpu_count()
@@ -519,29 +1602,22 @@ class GitHubDownloader(ObjaverseSource):
         fs, path = fsspec.core.url_to_fs(base_download_dir)
         fs.makedirs(path, exist_ok=True)
 
-        # Getting immediate subdirectories of root_path
-        if save_repo_format == "files":
-            downloaded_repo_dirs = fs.glob(base_download_dir + "/repos/*/*/")
-            downloaded_repo_ids = {
-                "/".join(x.split("/")[-2:]) for x in downloaded_repo_dirs
-            }
+        # get the repos that are already downloaded, from the manifest if enabled
+        manifest = None
+        if use_manifest:
+            manifest = Manifest(manifest_path or get_manifest_path(download_dir))
+            downloaded_repo_ids = manifest.get_keys(
+                cls.get_manifest_namespace(save_repo_format),
+                lambda: cls.scan_downloaded_repos(download_dir, save_repo_format),
+            )
         else:
-            downloaded_repo_dirs = fs.glob(
-                base_download_dir + f"/repos/*/*.{save_repo_format}"
+            downloaded_repo_ids = set(
+                cls.scan_downloaded_repos(download_dir, save_repo_format)
             )
-            downloaded_repo_ids = set()
-            for x in downloaded_repo_dirs:
-                org, repo = x.split("/")[-2:]
-                repo = repo[: -len(f".{save_repo_format}")]
-                repo_id = f"{org}/{repo}"
-                downloaded_repo_ids.add(repo_id)
-
-        # make copy of objects
-        objects = objects.copy()
 
         # get the unique repoIds
-        objects["repoIdHash"] = objects.apply(cls._get_repo_id_with_hash, axis=1)
-        repo_id_hashes = set(objects["repoIdHash"].unique().tolist())
+        objects_repo_id_hashes = cls._get_repo_id_hashes(objects["fileIdentifier"])
+        repo_id_hashes = set(objects_repo_id_hashes.unique().tolist())
         repo_ids = {
             "/".join(repo_id_hash.split("/")[:2]) for repo_id_hash in repo_id_hashes
         }
@@ -566,17 +1642,11 @@ class GitHubDownloader(ObjaverseSource):
             f"Found {len(repo_ids_to_download)} repoIds not yet downloaded. Downloading now..."
         )
 
-        # get the objects to download
-        groups = list(objects.groupby("repoIdHash"))
-        with Pool(processes=processes) as pool:
-            out_list = list(
-                tqdm(
-                    pool.imap_unordered(cls._process_group, groups),
-                    total=len(groups),
-                    desc="Grouping objects by repository",
-                )
-            )
-        objects_per_repo_id_hash = dict(out_list)
+        # get the objects to download, grouped by repo
+        to_download = objects_repo_id_hashes.isin(repo_id_hashes_to_download)
+        objects_per_repo_id_hash = cls._group_objects_by_repo(
+            objects_repo_id_hashes[to_download], objects[to_download]
+        )
 
         all_args = [
             (
@@ -589,18 +1659,32 @@ class GitHubDownloader(ObjaverseSource):
                 handle_modified_object,
                 handle_missing_object,
                 handle_new_object,
+                fetch_mode,
+                hash_only_expected,
+                hash_workers,
+                mirror_cache_dir,
+                mirror_cache_max_bytes,
+                manifest,
             )
             for repo_id_hash in repo_id_hashes_to_download
         ]
 
-        with Pool(processes=processes) as pool:
-            # use tqdm to show progress
-            out = list(
-                tqdm(
-                    pool.imap_unordered(cls._parallel_process_repo, all_args),
-                    total=len(all_args),
-                    desc="Downloading repositories",
-                )
+        if handler_queue_size is None:
+            all_args = [args + (None, None) for args in all_args]
+            context = multiprocessing.get_context(mp_context)
+            with context.Pool(processes=processes) as pool:
+                out = cls._imap_repos(pool, all_args, progress_callback)
+        else:
+            out = cls._download_with_handler_queue(
+                all_args,
+                processes=processes,
+                handle_found_object=handle_found_object,
+                handle_modified_object=handle_modified_object,
+                handler_queue_size=handler_queue_size,
+                handler_processes=handler_processes,
+                staging_dir=staging_dir,
+                progress_callback=progress_callback,
+                mp_context=mp_context,
             )
 
         out_dict = {}
@@ -6,22 +6,25 @@ import multiprocessing
 import os
 import tempfile
 import urllib.request
-from multiprocessing import Pool
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import fsspec
 import pandas as pd
 import requests
+from fsspec.implementations.local import LocalFileSystem
 from loguru import logger
 from tqdm import tqdm
 
-from objaverse.utils import get_file_hash
+from objaverse.manifest import Manifest, get_manifest_path
+from objaverse.utils import HASH_BLOCK_SIZE, write_chunks_with_hash
 from objaverse.xl.abstract import ObjaverseSource
 
 
 class SketchfabDownloader(ObjaverseSource):
     """A class for downloading and processing Objaverse 1.0."""
 
+    MANIFEST_NAMESPACE = "sketchfab/glbs"
+
     @classmethod
     def get_annotations(
         cls, download_dir: str = "~/.objaverse", refresh: bool = False
@@ -213,6 +216,7 @@ class SketchfabDownloader(ObjaverseSource):
         expected_sha256: str,
         handle_found_object: Optional[Callable] = None,
         handle_modified_object: Optional[Callable] = None,
+        manifest: Optional[Manifest] = None,
     ) -> Tuple[str, Optional[str]]:
         """Download the object for the given uid.
 
@@ -262,6 +266,8 @@ class SketchfabDownloader(ObjaverseSource):
                 - metadata (Dict[str, Any]): Metadata about the 3D object, including the
                     GitHub organization and repo names.
                 Return is not used.
+            manifest (Optional[Manifest]): If not None, the saved object is recorded in
+                it. Defaults to None.
 
 
         Returns:
@@ -270,23 +276,27 @@ class SketchfabDownloader(ObjaverseSource):
         """
         hf_url = f"https://hf-mirror.com/datasets/allenai/objaverse/resolve/main/{hf_object_path}"
 
+        # a local download_dir gets the object directly, a remote one with put
+        path = None
+        is_local = False
+        if download_dir is not None:
+            filename = os.path.join(download_dir, "hf-objaverse-v1", hf_object_path)
+            fs, path = fsspec.core.url_to_fs(filename)
+            is_local = isinstance(fs, LocalFileSystem)
+
         with tempfile.TemporaryDirectory() as temp_dir:
-            # download the file locally
-            temp_path = os.path.join(temp_dir, hf_object_path)
-            os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-            temp_path_tmp = f"{temp_path}.tmp"
-            with open(temp_path_tmp, "wb") as file:
-                with urllib.request.urlopen(hf_url) as response:
-                    file.write(response.read())
-            os.rename(temp_path_tmp, temp_path)
+            object_path = path if is_local else os.path.join(temp_dir, hf_object_path)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
 
-            # get the sha256 of the downloaded file
-            sha256 = get_file_hash(temp_path)
+            # download the file, computing its sha256 while streaming
+            with urllib.request.urlopen(hf_url) as response:
+                chunks = iter(lambda: response.read(HASH_BLOCK_SIZE), b"")
+                sha256 = write_chunks_with_hash(chunks, object_path)
 
             if sha256 == expected_sha256:
                 if handle_found_object is not None:
                     handle_found_object(
-                        local_path=temp_path,
+                        local_path=object_path,
                         file_identifier=file_identifier,
                         sha256=sha256,
                         metadata={},
@@ -294,23 +304,49 @@ class SketchfabDownloader(ObjaverseSource):
             else:
                 if handle_modified_object is not None:
                     handle_modified_object(
-                        local_path=temp_path,
+                        local_path=object_path,
                         file_identifier=file_identifier,
                         new_sha256=sha256,
                         old_sha256=expected_sha256,
                         metadata={},
                     )
 
-            if download_dir is not None:
-                filename = os.path.join(download_dir, "hf-objaverse-v1", hf_object_path)
-                fs, path = fsspec.core.url_to_fs(filename)
-                fs.makedirs(os.path.dirname(path), exist_ok=True)
-                fs.put(temp_path, path)
-            else:
-                path = None
+            if path is not None:
+                if not is_local:
+                    fs.makedirs(os.path.dirname(path), exist_ok=True)
+                    fs.put(object_path, path)
+                if manifest is not None:
+                    uid = os.path.basename(hf_object_path).split(".")[0]
+                    manifest.add(cls.MANIFEST_NAMESPACE, uid, path)
 
         return file_identifier, path
 
+    @classmethod
+    def scan_downloaded_objects(cls, download_dir: str) -> Dict[str, str]:
+        """Lists the objects saved in download_dir by globbing the file system.
+
+        Args:
+            download_dir (str): The base directory the objects were downloaded to.
+
+        Returns:
+            Dict[str, str]: Maps the uid to the path of each downloaded object.
+        """
+        versioned_dirname = os.path.join(download_dir, "hf-objaverse-v1")
+        fs, path = fsspec.core.url_to_fs(versioned_dirname)
+
+        # Get the existing file paths. This is much faster than calling fs.exists() for each
+        # file. `glob()` is like walk, but returns a list of files instead of the nested
+        # directory structure. glob() is also faster than find() / walk() since it doesn't
+        # need to traverse the entire directory structure.
+        existing_file_paths = fs.glob(
+            os.path.join(path, "glbs", "*", "*.glb"), refresh=True
+        )
+        return {
+            file.split("/")[-1].split(".")[0]: file
+            for file in existing_file_paths
+            if file.endswith(".glb")  # note partial files end with .glb.tmp
+        }
+
     @classmethod
     def _parallel_download_object(cls, args):
         # workaround since starmap doesn't work well with tqdm
@@ -408,12 +444,31 @@ class SketchfabDownloader(ObjaverseSource):
                 - metadata (Dict[Hashable, Any]): Metadata about the 3D object, which is
                     particular to the source.
                 Return is not used. Defaults to None.
+            use_manifest (bool, optional): Whether to look up the objects that are
+                already downloaded in a SQLite manifest instead of globbing
+                download_dir, and to record each saved object in it. The first run scans
+                download_dir once to build the manifest. Defaults to False.
+            manifest_path (Optional[str], optional): Local path of the manifest. If
+                None, uses `objaverse.manifest.get_manifest_path(download_dir)`.
+                Defaults to None.
+            progress_callback (Optional[Callable[[int], None]], optional): If not
+                None, called with the number of objects finished each time an object
+                finishes downloading, and the progress bar of this source is hidden.
+                Defaults to None.
+            mp_context (Optional[str], optional): Start method of the download
+                processes, e.g. "spawn" or "forkserver". If None, uses the default
+                start method of the platform. Defaults to None.
 
 
         Returns:
             A dictionary mapping the object fileIdentifier to the local path of where
             the object downloaded.
         """
+        use_manifest = kwargs.get("use_manifest", False)
+        manifest_path = kwargs.get("manifest_path", None)
+        progress_callback = kwargs.get("progress_callback", None)
+        mp_context = kwargs.get("mp_context", None)
+
         hf_object_paths = cls._get_object_paths(
             download_dir=download_dir if download_dir is not None else "~/.objaverse"
         )
@@ -431,6 +486,7 @@ class SketchfabDownloader(ObjaverseSource):
 
         out = {}
         objects_to_download = []
+        manifest = None
         if download_dir is None:
             for _, item in objects.iterrows():
                 uid = item["uid"]
@@ -448,20 +504,16 @@ class SketchfabDownloader(ObjaverseSource):
                 )
         else:
             versioned_dirname = os.path.join(download_dir, "hf-objaverse-v1")
-            fs, path = fsspec.core.url_to_fs(versioned_dirname)
-
-            # Get the existing file paths. This is much faster than calling fs.exists() for each
-            # file. `glob()` is like walk, but returns a list of files instead of the nested
-            # directory structure. glob() is also faster than find() / walk() since it doesn't
-            # need to traverse the entire directory structure.
-            existing_file_paths = fs.glob(
-                os.path.join(path, "glbs", "*", "*.glb"), refresh=True
-            )
-            existing_uids = {
-                file.split("/")[-1].split(".")[0]
-                for file in existing_file_paths
-                if file.endswith(".glb")  # note partial files end with .glb.tmp
-            }
+
+            # get the existing uids, from the manifest if enabled
+            if use_manifest:
+                manifest = Manifest(manifest_path or get_manifest_path(download_dir))
+                existing_uids = manifest.get_keys(
+                    cls.MANIFEST_NAMESPACE,
+                    lambda: cls.scan_downloaded_objects(download_dir),
+                )
+            else:
+                existing_uids = set(cls.scan_downloaded_objects(download_dir))
 
             # add the existing downloaded uids to the return dict
             already_downloaded_uids = uids_set.intersection(existing_uids)
@@ -507,20 +559,24 @@ class SketchfabDownloader(ObjaverseSource):
                 sha256,
                 handle_found_object,
                 handle_modified_object,
+                manifest,
             )
             for file_identifier, hf_object_path, sha256 in objects_to_download
         ]
 
         # download the objects in parallel
-        with Pool(processes) as pool:
-            new_object_downloads = list(
-                tqdm(
-                    pool.imap_unordered(cls._parallel_download_object, args),
-                    total=len(args),
-                )
-            )
-
-        for file_identifier, local_path in new_object_downloads:
+        with multiprocessing.get_context(mp_context).Pool(processes) as pool:
+            results = []
+            for result in tqdm(
+                pool.imap_unordered(cls._parallel_download_object, args),
+                total=len(args),
+                disable=progress_callback is not None,
+            ):
+                results.append(result)
+                if progress_callback is not None:
+                    progress_callback(1)
+
+        for file_identifier, local_path in results:
             out[file_identifier] = local_path
 
         return out
@@ -3,22 +3,29 @@
 import multiprocessing
 import os
 import tempfile
-from multiprocessing import Pool
 from typing import Callable, Dict, Optional, Tuple
 
 import fsspec
 import pandas as pd
 import requests
+from fsspec.implementations.local import LocalFileSystem
 from loguru import logger
 from tqdm import tqdm
 
-from objaverse.utils import get_file_hash, get_uid_from_str
+from objaverse.manifest import Manifest, get_manifest_path
+from objaverse.utils import (
+    HASH_BLOCK_SIZE,
+    get_uid_from_str,
+    write_chunks_with_hash,
+)
 from objaverse.xl.abstract import ObjaverseSource
 
 
 class SmithsonianDownloader(ObjaverseSource):
     """Script to download objects from the Smithsonian Institute."""
 
+    MANIFEST_NAMESPACE = "smithsonian/objects"
+
     @classmethod
     def get_annotations(
         cls, download_dir: str = "~/.objaverse", refresh: bool = False
@@ -65,6 +72,7 @@ class SmithsonianDownloader(ObjaverseSource):
         handle_found_object: Optional[Callable],
         handle_modified_object: Optional[Callable],
         handle_missing_object: Optional[Callable],
+        manifest: Optional[Manifest] = None,
     ) -> Tuple[str, Optional[str]]:
         """Downloads a Smithsonian Object from a URL.
 
@@ -114,6 +122,8 @@ class SmithsonianDownloader(ObjaverseSource):
                 - metadata (Dict[str, Any]): Metadata about the 3D object, including the
                     GitHub organization and repo names.
                 Return is not used.
+            manifest (Optional[Manifest], optional): If not None, the saved object is
+                recorded in it. Defaults to None.
 
         Returns:
             Tuple[str, Optional[str]]: Tuple of the URL and the path to the downloaded
@@ -122,37 +132,41 @@ class SmithsonianDownloader(ObjaverseSource):
         """
         uid = get_uid_from_str(file_identifier)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = os.path.join(temp_dir, f"{uid}.glb")
-            temp_path_tmp = f"{temp_path}.tmp"
-
-            response = requests.get(file_identifier)
+        response = requests.get(file_identifier, stream=True)
 
-            # check if the path is valid
-            if response.status_code == 404:
-                logger.warning(f"404 for {file_identifier}")
-                if handle_missing_object is not None:
-                    handle_missing_object(
-                        file_identifier=file_identifier,
-                        sha256=expected_sha256,
-                        metadata={},
-                    )
-                return file_identifier, None
+        # check if the path is valid
+        if response.status_code == 404:
+            logger.warning(f"404 for {file_identifier}")
+            if handle_missing_object is not None:
+                handle_missing_object(
+                    file_identifier=file_identifier,
+                    sha256=expected_sha256,
+                    metadata={},
+                )
+            return file_identifier, None
 
-            with open(temp_path_tmp, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
+        # a local download_dir gets the object directly, a remote one with put
+        path = None
+        is_local = False
+        if download_dir is not None:
+            filename = os.path.join(
+                download_dir, "smithsonian", "objects", f"{uid}.glb"
+            )
+            fs, path = fsspec.core.url_to_fs(filename)
+            is_local = isinstance(fs, LocalFileSystem)
 
-            # rename to temp_path
-            os.rename(temp_path_tmp, temp_path)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            object_path = path if is_local else os.path.join(temp_dir, f"{uid}.glb")
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
 
-            # check the sha256
-            sha256 = get_file_hash(temp_path)
+            # download the file, computing its sha256 while streaming
+            chunks = response.iter_content(chunk_size=HASH_BLOCK_SIZE)
+            sha256 = write_chunks_with_hash(chunks, object_path)
 
             if sha256 == expected_sha256:
                 if handle_found_object is not None:
                     handle_found_object(
-                        local_path=temp_path,
+                        local_path=object_path,
                         file_identifier=file_identifier,
                         sha256=sha256,
                         metadata={},
@@ -160,25 +174,41 @@ class SmithsonianDownloader(ObjaverseSource):
             else:
                 if handle_modified_object is not None:
                     handle_modified_object(
-                        local_path=temp_path,
+                        local_path=object_path,
                         file_identifier=file_identifier,
                         new_sha256=sha256,
                         old_sha256=expected_sha256,
                         metadata={},
                     )
 
-            if download_dir is not None:
-                filename = os.path.join(
-                    download_dir, "smithsonian", "objects", f"{uid}.glb"
-                )
-                fs, path = fsspec.core.url_to_fs(filename)
-                fs.makedirs(os.path.dirname(path), exist_ok=True)
-                fs.put(temp_path, path)
-            else:
-                path = None
+            if path is not None:
+                if not is_local:
+                    fs.makedirs(os.path.dirname(path), exist_ok=True)
+                    fs.put(object_path, path)
+                if manifest is not None:
+                    manifest.add(cls.MANIFEST_NAMESPACE, uid, path)
 
         return file_identifier, path
 
+    @classmethod
+    def scan_downloaded_objects(cls, download_dir: str) -> Dict[str, str]:
+        """Lists the objects saved in download_dir by globbing the file system.
+
+        Args:
+            download_dir (str): The base directory the objects were downloaded to.
+
+        Returns:
+            Dict[str, str]: Maps the uid to the path of each downloaded object.
+        """
+        objects_dir = os.path.join(download_dir, "smithsonian", "objects")
+        fs, _ = fsspec.core.url_to_fs(objects_dir)
+
+        # get the existing glb files
+        existing_glb_files = fs.glob(os.path.join(objects_dir, "*.glb"), refresh=True)
+        return {
+            os.path.basename(file).split(".")[0]: file for file in existing_glb_files
+        }
+
     @classmethod
     def _parallel_download_object(cls, args):
         # workaround since starmap doesn't work well with tqdm
@@ -247,28 +277,50 @@ class SmithsonianDownloader(ObjaverseSource):
                 - metadata (Dict[Hashable, Any]): Metadata about the 3D object, which is
                     particular to the source.
                 Return is not used. Defaults to None.
+            use_manifest (bool, optional): Whether to look up the objects that are
+                already downloaded in a SQLite manifest instead of globbing
+                download_dir, and to record each saved object in it. The first run scans
+                download_dir once to build the manifest. Defaults to False.
+            manifest_path (Optional[str], optional): Local path of the manifest. If
+                None, uses `objaverse.manifest.get_manifest_path(download_dir)`.
+                Defaults to None.
+            progress_callback (Optional[Callable[[int], None]], optional): If not
+                None, called with the number of objects finished each time an object
+                finishes downloading, and the progress bar of this source is hidden.
+                Defaults to None.
+            mp_context (Optional[str], optional): Start method of the download
+                processes, e.g. "spawn" or "forkserver". If None, uses the default
+                start method of the platform. Defaults to None.
 
         Returns:
             Dict[str, str]: A dictionary mapping from the fileIdentifier to the
                 download_path.
         """
+        use_manifest = kwargs.get("use_manifest", False)
+        manifest_path = kwargs.get("manifest_path", None)
+        progress_callback = kwargs.get("progress_callback", None)
+        mp_context = kwargs.get("mp_context", None)
+
         if processes is None:
             processes = multiprocessing.cpu_count()
 
         out = {}
         objects_to_download = []
+        manifest = None
         if download_dir is not None:
             objects_dir = os.path.join(download_dir, "smithsonian", "objects")
             fs, path = fsspec.core.url_to_fs(objects_dir)
             fs.makedirs(path, exist_ok=True)
 
-            # get the existing glb files
-            existing_glb_files = fs.glob(
-                os.path.join(objects_dir, "*.glb"), refresh=True
-            )
-            existing_uids = set(
-                os.path.basename(file).split(".")[0] for file in existing_glb_files
-            )
+            # get the existing uids, from the manifest if enabled
+            if use_manifest:
+                manifest = Manifest(manifest_path or get_manifest_path(download_dir))
+                existing_uids = manifest.get_keys(
+                    cls.MANIFEST_NAMESPACE,
+                    lambda: cls.scan_downloaded_objects(download_dir),
+                )
+            else:
+                existing_uids = set(cls.scan_downloaded_objects(download_dir))
 
             # find the urls that need to be downloaded
             already_downloaded_objects = set()
@@ -306,17 +358,22 @@ class SmithsonianDownloader(ObjaverseSource):
                 handle_found_object,
                 handle_modified_object,
                 handle_missing_object,
+                manifest,
             ]
             for item in objects_to_download
         ]
-        with Pool(processes=processes) as pool:
-            results = list(
-                tqdm(
-                    pool.imap_unordered(cls._parallel_download_object, args),
-                    total=len(objects_to_download),
-                    desc="Downloading Smithsonian Objects",
-                )
-            )
+        context = multiprocessing.get_context(mp_context)
+        with context.Pool(processes=processes) as pool:
+            results = []
+            for result in tqdm(
+                pool.imap_unordered(cls._parallel_download_object, args),
+                total=len(objects_to_download),
+                desc="Downloading Smithsonian Objects",
+                disable=progress_callback is not None,
+            ):
+                results.append(result)
+                if progress_callback is not None:
+                    progress_callback(1)
 
         for file_identifier, download_path in results:
             if download_path is not None:
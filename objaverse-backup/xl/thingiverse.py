@@ -4,16 +4,16 @@ import multiprocessing
 import os
 import tempfile
 import time
-from multiprocessing import Pool
 from typing import Callable, Dict, Optional, Tuple
 
 import fsspec
 import pandas as pd
 import requests
+from fsspec.implementations.local import LocalFileSystem
 from loguru import logger
 from tqdm import tqdm
 
-from objaverse.utils import get_file_hash
+from objaverse.utils import HASH_BLOCK_SIZE, write_chunks_with_hash
 from objaverse.xl.abstract import ObjaverseSource
 
 
@@ -173,24 +173,25 @@ class ThingiverseDownloader(ObjaverseSource):
                 )
             return file_identifier, None
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = os.path.join(temp_dir, filename)
-            temp_path_tmp = temp_path + ".tmp"
-
-            with open(temp_path_tmp, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
+        # a local download_dir gets the object directly, a remote one with put
+        path = None
+        is_local = False
+        if download_dir is not None:
+            fs, path = fsspec.core.url_to_fs(os.path.join(download_dir, filename))
+            is_local = isinstance(fs, LocalFileSystem)
 
-            # rename to temp_path
-            os.rename(temp_path_tmp, temp_path)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            object_path = path if is_local else os.path.join(temp_dir, filename)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
 
-            # check the sha256
-            sha256 = get_file_hash(temp_path)
+            # download the file, computing its sha256 while streaming
+            chunks = response.iter_content(chunk_size=HASH_BLOCK_SIZE)
+            sha256 = write_chunks_with_hash(chunks, object_path)
 
             if sha256 == expected_sha256:
                 if handle_found_object is not None:
                     handle_found_object(
-                        local_path=temp_path,
+                        local_path=object_path,
                         file_identifier=file_identifier,
                         sha256=sha256,
                         metadata={},
@@ -198,20 +199,17 @@ class ThingiverseDownloader(ObjaverseSource):
             else:
                 if handle_modified_object is not None:
                     handle_modified_object(
-                        local_path=temp_path,
+                        local_path=object_path,
                         file_identifier=file_identifier,
                         new_sha256=sha256,
                         old_sha256=expected_sha256,
                         metadata={},
                     )
 
-            if download_dir is not None:
-                filename = os.path.join(download_dir, filename)
-                fs, path = fsspec.core.url_to_fs(filename)
-                fs.makedirs(os.path.dirname(path), exist_ok=True)
-                fs.put(temp_path, path)
-            else:
-                path = None
+            if path is not None:
+                if not is_local:
+                    fs.makedirs(os.path.dirname(path), exist_ok=True)
+                    fs.put(object_path, path)
 
         return file_identifier, path
 
@@ -303,11 +301,21 @@ class ThingiverseDownloader(ObjaverseSource):
                 - metadata (Dict[Hashable, Any]): Metadata about the 3D object, which is
                     particular to the source.
                 Return is not used. Defaults to None.
+            progress_callback (Optional[Callable[[int], None]], optional): If not
+                None, called with the number of objects finished each time an object
+                finishes downloading, and the progress bar of this source is hidden.
+                Defaults to None.
+            mp_context (Optional[str], optional): Start method of the download
+                processes, e.g. "spawn" or "forkserver". If None, uses the default
+                start method of the platform. Defaults to None.
 
         Returns:
             Dict[str, str]: A dictionary mapping from the fileIdentifier to the path of
                 the downloaded file.
         """
+        progress_callback = kwargs.get("progress_callback", None)
+        mp_context = kwargs.get("mp_context", None)
+
         if processes is None:
             processes = multiprocessing.cpu_count()
 
@@ -373,14 +381,18 @@ class ThingiverseDownloader(ObjaverseSource):
             for item in items_to_download
         ]
 
-        with Pool(processes=processes) as pool:
-            results = list(
-                tqdm(
-                    pool.imap_unordered(cls._parallel_download_item, args),
-                    total=len(args),
-                    desc="Downloading Thingiverse Objects",
-                )
-            )
+        context = multiprocessing.get_context(mp_context)
+        with context.Pool(processes=processes) as pool:
+            results = []
+            for result in tqdm(
+                pool.imap_unordered(cls._parallel_download_item, args),
+                total=len(args),
+                desc="Downloading Thingiverse Objects",
+                disable=progress_callback is not None,
+            ):
+                results.append(result)
+                if progress_callback is not None:
+                    progress_callback(1)
 
         for file_identifier, download_path in results:
             if download_path is not None: